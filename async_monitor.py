@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Asyncio-Engine des Hotfolder-Monitors ("pipeline": {"engine": "asyncio"}).
+
+Gleiche Stufen, Callbacks und Konfiguration wie HotfolderMonitor, aber jede Datei ist eine
+Coroutine statt eines Jobs in Thread-Warteschlangen:
+
+- Eine Event-Loop pro Prozess (eigener Thread), geteilt von allen asyncio-Hotfoldern.
+  Tausende wartende Dateien kosten damit Coroutinen, keine OS-Threads.
+- Stabilitätsprüfung und Log-Wartezeit mit asyncio.sleep, Backend-Aufrufe über
+  asyncio.create_subprocess_exec (siehe *_async in backend/).
+- Blockierende Dateisystemzugriffe (stat, Preflight, Log lesen, Verschieben) laufen in einem
+  kleinen Executor (fs_workers Threads, pro Prozess).
+- preflight_workers/evaluate_workers/move_workers begrenzen die gleichzeitigen Jobs je Stufe
+  (Semaphore); ready ist unbegrenzt, das Backend über den Lock der Session serialisiert.
+- Beim Stoppen werden wartende Dateien abgebrochen; laufende Backend-/Auswerte-/Verschiebe-
+  Schritte werden noch beendet.
+"""
+
+__all__ = ["AsyncHotfolderMonitor", "create_monitor", "monitor_class", "get_event_loop_thread"]
+
+import os
+import time
+import asyncio
+import threading
+import concurrent.futures
+
+from hotfolder_monitor import HotfolderMonitor, STAGE_NAMES
+from job_pipeline import HotfolderJob
+from preflight import run_preflight
+from backend.photoshop_backend import BackendUnavailable
+from metrics import STAGE_DURATION, RETRIES_TOTAL
+from profiling import call_timer
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+# Threads der Engine beginnen damit; sie gehören allen asyncio-Hotfoldern gemeinsam
+ASYNC_THREAD_PREFIX = "hf-asyncio-"
+
+
+class _EventLoopThread:
+    """Event-Loop in einem Daemon-Thread plus Executor für Dateisystemzugriffe."""
+
+    def __init__(self, fs_workers: int):
+        self.loop = asyncio.new_event_loop()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=fs_workers,
+                                                              thread_name_prefix=f"{ASYNC_THREAD_PREFIX}fs")
+        self.loop.set_default_executor(self.executor)
+        self.thread = threading.Thread(target=self._run, name=f"{ASYNC_THREAD_PREFIX}loop-0", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def run(self, coroutine, timeout: float = None):
+        """Führt eine Coroutine aus einem anderen Thread aus und wartet auf das Ergebnis."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop_thread(fs_workers: int = 8) -> _EventLoopThread:
+    """Die gemeinsame Event-Loop des Prozesses (fs_workers gilt beim ersten Aufruf)."""
+    global _loop_thread
+    with _loop_lock:
+        if _loop_thread is None:
+            _loop_thread = _EventLoopThread(fs_workers)
+        return _loop_thread
+
+
+def monitor_class(hf_config: dict):
+    """HotfolderMonitor oder AsyncHotfolderMonitor, je nach pipeline.engine."""
+    engine = hf_config.get("pipeline", {}).get("engine", "threads")
+    return AsyncHotfolderMonitor if engine == "asyncio" else HotfolderMonitor
+
+
+def create_monitor(hf_config: dict, on_status_update=None, on_file_processing=None) -> HotfolderMonitor:
+    return monitor_class(hf_config)(hf_config, on_status_update=on_status_update,
+                                    on_file_processing=on_file_processing)
+
+
+class AsyncHotfolderMonitor(HotfolderMonitor):
+    def __init__(self, hf_config: dict, on_status_update=None, on_file_processing=None):
+        super().__init__(hf_config, on_status_update, on_file_processing)
+        self.thread_prefix = ASYNC_THREAD_PREFIX
+        self.runner = None
+        self._tasks = {}                  # Task -> HotfolderJob
+        self._cancelled = []
+        self._depths = {stage: {"queued": 0, "active": 0} for stage in STAGE_NAMES}
+        self._limits = None
+        self._running = False
+        self._remote_executor = None
+
+    def start_profiling(self, duration: float = None, on_finished=None):
+        # Event-Loop und Executor teilen sich alle asyncio-Hotfolder – ein Profil ließe sich
+        # keinem einzelnen Hotfolder zuordnen
+        raise RuntimeError(f"Profil für {self.name} nicht möglich: die asyncio-Engine teilt ihre Threads "
+                           f"mit allen asyncio-Hotfoldern (für ein Profil \"engine\": \"threads\" verwenden)")
+
+    # --- Engine -----------------------------------------------------------------------
+
+    def _start_engine(self):
+        self.runner = get_event_loop_thread(self.pipeline_config["fs_workers"])
+        self.runner.run(self._start_async())
+
+    async def _start_async(self):
+        cfg = self.pipeline_config
+        backend_limit = self.distributed["backend_workers"] if self.job_server else 1
+        self._limits = {
+            "ready": None,
+            "preflight": asyncio.Semaphore(cfg["preflight_workers"]),
+            "backend": asyncio.Semaphore(backend_limit),
+            "evaluate": asyncio.Semaphore(cfg["evaluate_workers"]),
+            "move": asyncio.Semaphore(cfg["move_workers"]),
+        }
+        if self.job_server and self._remote_executor is None:
+            # Warten auf Worker blockiert -> eigene Threads, damit der Dateisystem-Executor frei bleibt
+            self._remote_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=backend_limit, thread_name_prefix=f"{ASYNC_THREAD_PREFIX}remote")
+        self._cancelled = []
+        self._running = True
+
+    def _stop_engine(self) -> list:
+        if not self.runner:
+            return []
+        return self.runner.run(self._stop_async())
+
+    async def _stop_async(self) -> list:
+        self._running = False
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        pending, self._cancelled = self._cancelled, []
+        return pending
+
+    def _engine_running(self) -> bool:
+        return self._running
+
+    def _submit(self, job: HotfolderJob) -> bool:
+        # Aufruf aus dem Watch-Service-Thread oder dem Scan -> in die Loop übergeben
+        self.runner.call_soon(self._spawn, job)
+        return True
+
+    def _spawn(self, job: HotfolderJob):
+        if not self._running:
+            self._forget(job)
+            return
+        task = asyncio.ensure_future(self._process(job))
+        self._tasks[task] = job
+
+    def get_queue_depths(self) -> dict:
+        if not self.runner:
+            return {}
+        return {stage: dict(depth) for stage, depth in self._depths.items()}
+
+    # --- Ablauf einer Datei ---------------------------------------------------------------
+
+    async def _fs(self, func, *args):
+        """Blockierender Dateisystemzugriff im Executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _process(self, job: HotfolderJob):
+        handlers = {
+            "ready": self._stage_ready_async,
+            "preflight": self._stage_preflight_async,
+            "backend": self._stage_backend_async,
+            "evaluate": self._stage_evaluate_async,
+            "move": self._stage_move_async,
+        }
+        stage = "ready"
+        try:
+            while stage:
+                stage = await self._run_stage(stage, handlers[stage], job)
+        except asyncio.CancelledError:
+            if job.document_open:
+                await self._release(job)
+            self._cancelled.append(job)
+            return
+        finally:
+            self._tasks.pop(asyncio.current_task(), None)
+        if job.document_open:
+            await self._release(job)
+        self._on_job_done(job)
+        if not self._tasks:
+            self._on_pipeline_idle()
+
+    async def _run_stage(self, stage: str, handler, job: HotfolderJob):
+        depth = self._depths[stage]
+        limit = self._limits[stage]
+        depth["queued"] += 1
+        try:
+            if limit is not None:
+                await limit.acquire()
+        finally:
+            depth["queued"] -= 1
+        depth["active"] += 1
+        try:
+            with STAGE_DURATION.time(hotfolder=self.name, stage=stage):
+                if stage == "ready":
+                    return await handler(job)
+                # Begonnene Schritte beim Stoppen noch beenden, danach abbrechen
+                inner = asyncio.ensure_future(handler(job))
+                try:
+                    return await asyncio.shield(inner)
+                except asyncio.CancelledError:
+                    await asyncio.gather(inner, return_exceptions=True)
+                    # Letzter Schritt noch fertig geworden (z.B. Datei verschoben) -> regulär abschließen
+                    if not inner.cancelled() and inner.exception() is None and inner.result() is None:
+                        return None
+                    raise
+        finally:
+            depth["active"] -= 1
+            if limit is not None:
+                limit.release()
+
+    async def _release(self, job: HotfolderJob):
+        session = self.backend_session
+        async with session.async_lock:
+            await session.release_async(job.file_name)
+        job.document_open = False
+
+    # --- Stufen -----------------------------------------------------------------------------
+
+    async def _is_file_stable_async(self, file_path: str) -> bool:
+        interval = self.pipeline_config["stable_interval"]
+        checks = self.pipeline_config["stable_checks"]
+        with call_timer("is_file_stable"):
+            try:
+                last_size = await self._fs(os.path.getsize, file_path)
+            except OSError:
+                return False
+            stable_count = 0
+            while stable_count < checks:
+                await asyncio.sleep(interval)
+                try:
+                    current_size = await self._fs(os.path.getsize, file_path)
+                except OSError:
+                    return False
+                if current_size == last_size:
+                    stable_count += 1
+                else:
+                    stable_count = 0
+                    last_size = current_size
+            return True
+
+    async def _stage_ready_async(self, job: HotfolderJob):
+        debug_print(f"Verarbeite Datei: {job.file_path}")
+        with self._step("stability"):
+            # Dateien einer Gruppe gleichzeitig prüfen
+            results = await asyncio.gather(*(self._is_file_stable_async(path) for path in job.paths))
+        if not all(results):
+            debug_print(f"Datei ist nicht stabil (noch im Kopiervorgang?): {job.file_path}")
+            job.outcome = "unstable"
+            return None
+        return self._next_after_ready(job)
+
+    async def _stage_preflight_async(self, job: HotfolderJob):
+        with self._step("preflight"):
+            job.preflight_info, preflight_reasons = await self._fs(run_preflight, job.file_path, self.hf_config)
+        if preflight_reasons:
+            debug_print("Preflight fehlgeschlagen: " + "; ".join(preflight_reasons))
+            self._fault(job, "preflight", {"preflight": {"reasons": preflight_reasons, "info": job.preflight_info}})
+            return "move"
+        return "backend"
+
+    async def _stage_backend_async(self, job: HotfolderJob):
+        if self.on_file_processing:
+            self.on_file_processing(job.file_name)
+        try:
+            if self.job_server:
+                return await asyncio.get_running_loop().run_in_executor(self._remote_executor, self._run_remote, job)
+            if job.phase == "additional":
+                return await self._run_additional_jsx_async(job)
+            return await self._run_contentcheck_async(job)
+        except BackendUnavailable as e:
+            job.document_open = False
+            job.backend_retries += 1
+            max_retries = self.backend_session.settings.get("max_retries", 0)
+            if job.backend_retries <= max_retries:
+                debug_print(f"{e} – {job.file_name} wird erneut eingereiht ({job.backend_retries}/{max_retries}).")
+                RETRIES_TOTAL.inc(hotfolder=self.name)
+                return "backend"
+            debug_print(f"{e} – {job.file_name} nach {max_retries} Versuchen in Fault.")
+            self._fault(job, "backend", {"backend": str(e)})
+            return "move"
+
+    async def _run_contentcheck_async(self, job: HotfolderJob):
+        session = self.backend_session
+        async with session.async_lock:
+            with self._step("open"):
+                opened = await session.open_async(job.file_path, job.file_name)
+            if not opened:
+                debug_print("Fehler beim Öffnen der Datei in Photoshop.")
+                job.outcome = "open_failed"
+                return None
+            job.document_open = True
+            with self._step("contentcheck"):
+                success = await session.contentcheck_async(self.hf_config, job.file_path)
+            if not success or not self._needs_additional_jsx():
+                await session.release_async(job.file_name)
+                job.document_open = False
+        if not success:
+            debug_print("Fehler beim Ausführen des Contentcheck-JSX.")
+            self._fault(job, "jsx")
+            return "move"
+        return "evaluate"
+
+    async def _run_additional_jsx_async(self, job: HotfolderJob):
+        additional_jsx = self.hf_config.get("additional_jsx", "").strip()
+        session = self.backend_session
+        async with session.async_lock:
+            with self._step("additional_jsx"):
+                add_success = await session.additional_async(additional_jsx, job.file_path, job.file_name)
+        job.document_open = True
+        if not add_success:
+            debug_print("Zusätzliches JSX-Skript schlug fehl (wird aber ignoriert).")
+        return "move"
+
+    async def _stage_evaluate_async(self, job: HotfolderJob):
+        logfiles_dir = self.hf_config.get("logfiles_dir", "")
+        job.log_file = os.path.join(logfiles_dir, job.file_name.rsplit(".", 1)[0] + "_log_contentcheck.json")
+        debug_print("Erwarte Logfile: " + job.log_file)
+
+        deadline = time.monotonic() + self.pipeline_config["log_timeout"]
+        poll_interval = self.pipeline_config["log_poll_interval"]
+        with self._step("log_wait"):
+            exists = await self._fs(os.path.exists, job.log_file)
+            while not exists and time.monotonic() < deadline:
+                await asyncio.sleep(poll_interval)
+                exists = await self._fs(os.path.exists, job.log_file)
+
+        if not exists:
+            debug_print("Contentcheck-Logfile wurde nicht erzeugt, verschiebe Datei in Fault.")
+            self._fault(job, "log_missing")
+            return "move"
+
+        with self._step("evaluate"):
+            return await self._fs(self._evaluate_log, job)
+
+    async def _stage_move_async(self, job: HotfolderJob):
+        # Fail-Log schreiben und Verschieben sind reine Dateisystemarbeit
+        return await self._fs(self._stage_move, job)
+
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Backend-Session – Lebenszyklus der Dokumente und der Photoshop-Sitzung:
+
+- Jedes Dokument wird ohne Speichern geschlossen, sobald sein Job fertig ist.
+- Alle purge_every Dokumente werden die Caches geleert.
+- Nach recycle_after_documents Dokumenten oder ab recycle_memory_mb wird die Sitzung
+  neu gestartet. Dokumente, die dabei verloren gehen, werden bei Bedarf neu geöffnet.
+- Stürzt das Backend ab, wird es neu gestartet und BackendUnavailable geworfen,
+  damit der Aufrufer den Job erneut einreiht.
+
+Alle Hotfolder mit gleichem Backend-Typ und Sitzungsnamen teilen sich eine Session
+(es gibt nur eine Photoshop-Instanz); die Einstellungen des ersten Hotfolders gelten.
+Das gilt für beide Engines: Die Threads-Engine hält session.lock, die asyncio-Engine
+(async_monitor.py) session.async_lock und ruft die *_async-Methoden auf – beides ist
+derselbe SessionLock, Aufrufe beider Engines werden also gemeinsam serialisiert.
+"""
+
+__all__ = ["BackendSession", "SessionLock", "get_backend_session", "create_backend", "DEFAULT_BACKEND"]
+
+import asyncio
+import threading
+import concurrent.futures
+
+from backend.photoshop_backend import BackendUnavailable, PhotoshopBackend
+from backend.simulated_backend import SimulatedBackend
+from metrics import REGISTRY, BACKEND_OPERATIONS, BACKEND_ERRORS, BACKEND_GAUGE
+from profiling import call_timer
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+# Standardwerte (pro Hotfolder unter "backend" überschreibbar)
+DEFAULT_BACKEND = {
+    "type": "photoshop",             # "photoshop" oder "simulated"
+    "session": "default",
+    "close_documents": True,
+    "purge_every": 25,               # 0 = nie
+    "recycle_after_documents": 500,  # 0 = nie
+    "recycle_memory_mb": 0,          # 0 = nie
+    "max_retries": 2,                # erneute Versuche nach Absturz
+    "simulated": {}                  # Einstellungen für SimulatedBackend
+}
+
+BACKEND_TYPES = {
+    "photoshop": PhotoshopBackend,
+    "simulated": SimulatedBackend
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_lock_waiters = None              # Executor, in dem asyncio-Tasks auf den SessionLock warten
+
+
+def backend_settings(hf_config: dict) -> dict:
+    settings = dict(DEFAULT_BACKEND)
+    settings.update(hf_config.get("backend", {}))
+    return settings
+
+
+def create_backend(settings: dict):
+    backend_type = settings.get("type", "photoshop")
+    if backend_type not in BACKEND_TYPES:
+        raise ValueError(f"Unbekannter Backend-Typ: {backend_type}")
+    if backend_type == "simulated":
+        return SimulatedBackend(settings.get("simulated", {}))
+    return BACKEND_TYPES[backend_type](settings)
+
+
+def get_backend_session(hf_config: dict):
+    """Liefert die (geteilte) Session für das Backend des Hotfolders."""
+    settings = backend_settings(hf_config)
+    key = (settings["type"], settings["session"])
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = BackendSession(create_backend(settings), settings)
+            _sessions[key] = session
+        return session
+
+
+def _lock_waiter_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _lock_waiters
+    with _sessions_lock:
+        if _lock_waiters is None:
+            # Eigene Threads, damit wartende Tasks den Dateisystem-Executor der Loop nicht belegen
+            _lock_waiters = concurrent.futures.ThreadPoolExecutor(max_workers=16,
+                                                                  thread_name_prefix="backend-lock")
+        return _lock_waiters
+
+
+class SessionLock:
+    """
+    Lock einer Session für beide Engines, reentrant pro Besitzer: Thread (with lock)
+    bzw. asyncio-Task (async with session.async_lock). Ein asyncio-Task wartet bei Bedarf
+    in einem Executor-Thread, die Event-Loop bleibt frei.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._owner = None
+        self._count = 0
+
+    def acquire_for(self, owner, blocking: bool = True) -> bool:
+        with self._cond:
+            if self._owner == owner:
+                self._count += 1
+                return True
+            if self._owner is not None and not blocking:
+                return False
+            while self._owner is not None:
+                self._cond.wait()
+            self._owner = owner
+            self._count = 1
+            return True
+
+    def release_for(self, owner):
+        with self._cond:
+            if self._owner != owner:
+                raise RuntimeError("SessionLock wird nicht vom Aufrufer gehalten")
+            self._count -= 1
+            if self._count == 0:
+                self._owner = None
+                self._cond.notify()
+
+    # Threads-Engine: Besitzer ist der aktuelle Thread
+    def acquire(self, blocking: bool = True) -> bool:
+        return self.acquire_for(threading.get_ident(), blocking)
+
+    def release(self):
+        self.release_for(threading.get_ident())
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class _TaskLock:
+    """async with session.async_lock – hält den SessionLock für den aktuellen asyncio-Task."""
+
+    def __init__(self, lock: SessionLock):
+        self._lock = lock
+        self._owner = None
+
+    async def __aenter__(self):
+        self._owner = asyncio.current_task()
+        if self._lock.acquire_for(self._owner, blocking=False):
+            return self
+        waiting = asyncio.get_running_loop().run_in_executor(_lock_waiter_executor(),
+                                                             self._lock.acquire_for, self._owner)
+        try:
+            await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            # Der Executor-Thread wartet weiter – den Lock sofort wieder freigeben, sobald er ihn hat
+            owner = self._owner
+            waiting.add_done_callback(
+                lambda f: self._lock.release_for(owner) if not f.cancelled() and f.exception() is None else None)
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self._lock.release_for(self._owner)
+        return False
+
+
+class BackendSession:
+    def __init__(self, backend, settings: dict = None):
+        self.backend = backend
+        self.settings = dict(DEFAULT_BACKEND)
+        self.settings.update(settings or {})
+        # Öffnen + JSX eines Dokuments dürfen sich nicht mit anderen Aufrufen überschneiden
+        self.lock = SessionLock()
+        self.generation = 0              # erhöht sich bei jedem Neustart
+        self.open_documents = set()
+        self.documents_since_restart = 0
+        self.documents_since_purge = 0
+        self.stats = {"opened": 0, "closed": 0, "purges": 0, "recycles": 0, "crashes": 0}
+        self.metrics_label = f"{backend.name}:{self.settings.get('session', 'default')}"
+        REGISTRY.register_collector(("backend", self.metrics_label), self._collect_metrics)
+
+    def _call(self, operation: str, func, *args) -> bool:
+        """Backend-Aufruf mit Zählung für die Fehlerquote."""
+        BACKEND_OPERATIONS.inc(backend=self.metrics_label, operation=operation)
+        with call_timer(f"backend.{operation}"):
+            ok = func(*args)
+        if not ok:
+            BACKEND_ERRORS.inc(backend=self.metrics_label, operation=operation)
+        return ok
+
+    def _collect_metrics(self):
+        # Nicht blockieren, während ein Dokument verarbeitet wird – dann gilt der letzte Wert
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            BACKEND_GAUGE.set(len(self.open_documents), backend=self.metrics_label, field="open_documents")
+            BACKEND_GAUGE.set(self.generation, backend=self.metrics_label, field="generation")
+            memory = self.backend.memory_usage_mb()
+            if memory is not None:
+                BACKEND_GAUGE.set(memory, backend=self.metrics_label, field="memory_mb")
+        finally:
+            self.lock.release()
+
+    def _check_alive(self):
+        """Nach einem Fehlschlag: abgestürztes Backend neu starten und BackendUnavailable werfen."""
+        if self.backend.is_alive():
+            return
+        debug_print(f"Backend '{self.backend.name}' reagiert nicht mehr – Neustart.")
+        self.stats["crashes"] += 1
+        self._restart()
+        raise BackendUnavailable(f"Backend '{self.backend.name}' ist abgestürzt")
+
+    def _restart(self):
+        lost = sorted(self.open_documents)
+        if lost:
+            debug_print(f"Neustart verwirft {len(lost)} offene(s) Dokument(e): {lost}")
+        self._call("restart", self.backend.restart)
+        self.generation += 1
+        self.open_documents.clear()
+        self.documents_since_restart = 0
+        self.documents_since_purge = 0
+
+    def open(self, file_path: str, document_name: str) -> bool:
+        with self.lock:
+            if not self._call("open", self.backend.open_document, file_path):
+                self._check_alive()
+                return False
+            self.open_documents.add(document_name)
+            self.stats["opened"] += 1
+            return True
+
+    def contentcheck(self, hf_config: dict, file_path: str) -> bool:
+        with self.lock:
+            if not self._call("contentcheck", self.backend.run_contentcheck, hf_config, file_path):
+                self._check_alive()
+                return False
+            return True
+
+    def additional(self, jsx_script_path: str, file_path: str, document_name: str) -> bool:
+        with self.lock:
+            # Dokument ging durch einen Neustart verloren -> erneut öffnen
+            if document_name not in self.open_documents:
+                if not self.open(file_path, document_name):
+                    return False
+            if not self._call("additional_jsx", self.backend.run_additional_jsx, jsx_script_path, document_name):
+                self._check_alive()
+                return False
+            return True
+
+    def is_open(self, document_name: str) -> bool:
+        with self.lock:
+            return document_name in self.open_documents
+
+    def release(self, document_name: str):
+        """Schließt das Dokument (ohne Speichern) und erledigt Purge/Recycling."""
+        with self.lock:
+            if document_name not in self.open_documents:
+                return
+            self.open_documents.discard(document_name)
+            if self.settings.get("close_documents", True):
+                if self._call("close", self.backend.close_document, document_name):
+                    self.stats["closed"] += 1
+            self.documents_since_restart += 1
+            self.documents_since_purge += 1
+            self._housekeeping()
+
+    def _housekeeping(self):
+        purge_every = self.settings.get("purge_every", 0)
+        if purge_every and self.documents_since_purge >= purge_every:
+            debug_print(f"Purge der Backend-Caches nach {self.documents_since_purge} Dokumenten.")
+            if self._call("purge", self.backend.purge_caches):
+                self.stats["purges"] += 1
+            self.documents_since_purge = 0
+
+        reason = None
+        recycle_after = self.settings.get("recycle_after_documents", 0)
+        if recycle_after and self.documents_since_restart >= recycle_after:
+            reason = f"{self.documents_since_restart} Dokumente"
+        recycle_memory = self.settings.get("recycle_memory_mb", 0)
+        if not reason and recycle_memory:
+            memory = self.backend.memory_usage_mb()
+            if memory is not None and memory >= recycle_memory:
+                reason = f"{memory:.0f} MB Speicher"
+        if reason:
+            debug_print(f"Recycle Backend-Sitzung ({reason}).")
+            self.stats["recycles"] += 1
+            self._restart()
+
+    def status(self) -> dict:
+        with self.lock:
+            return {
+                "backend": self.backend.name,
+                "generation": self.generation,
+                "open_documents": len(self.open_documents),
+                "documents_since_restart": self.documents_since_restart,
+                "memory_mb": self.backend.memory_usage_mb(),
+                **self.stats
+            }
+
+    # --- asyncio-Engine ---------------------------------------------------------------
+    # Öffnen, JSX und Schließen laufen über die *_async-Methoden des Backends; der Aufrufer
+    # hält dabei async_lock. Purge, Neustart und Speicherabfrage sind selten und laufen im Executor.
+
+    @property
+    def async_lock(self) -> _TaskLock:
+        return _TaskLock(self.lock)
+
+    async def _call_async(self, operation: str, func, *args) -> bool:
+        BACKEND_OPERATIONS.inc(backend=self.metrics_label, operation=operation)
+        with call_timer(f"backend.{operation}"):
+            ok = await func(*args)
+        if not ok:
+            BACKEND_ERRORS.inc(backend=self.metrics_label, operation=operation)
+        return ok
+
+    async def _check_alive_async(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._check_alive)
+
+    async def open_async(self, file_path: str, document_name: str) -> bool:
+        if not await self._call_async("open", self.backend.open_document_async, file_path):
+            await self._check_alive_async()
+            return False
+        self.open_documents.add(document_name)
+        self.stats["opened"] += 1
+        return True
+
+    async def contentcheck_async(self, hf_config: dict, file_path: str) -> bool:
+        if not await self._call_async("contentcheck", self.backend.run_contentcheck_async, hf_config, file_path):
+            await self._check_alive_async()
+            return False
+        return True
+
+    async def additional_async(self, jsx_script_path: str, file_path: str, document_name: str) -> bool:
+        # Dokument ging durch einen Neustart verloren -> erneut öffnen
+        if document_name not in self.open_documents:
+            if not await self.open_async(file_path, document_name):
+                return False
+        if not await self._call_async("additional_jsx", self.backend.run_additional_jsx_async,
+                                      jsx_script_path, document_name):
+            await self._check_alive_async()
+            return False
+        return True
+
+    async def release_async(self, document_name: str):
+        if document_name not in self.open_documents:
+            return
+        self.open_documents.discard(document_name)
+        if self.settings.get("close_documents", True):
+            if await self._call_async("close", self.backend.close_document_async, document_name):
+                self.stats["closed"] += 1
+        self.documents_since_restart += 1
+        self.documents_since_purge += 1
+        await asyncio.get_running_loop().run_in_executor(None, self._housekeeping)
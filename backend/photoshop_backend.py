@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Photoshop-Backend – steuert Adobe Photoshop (macOS) über `open` und `osascript`.
+
+Alle Backends bieten dieselben Methoden (siehe Backend); BackendSession
+(backend_session.py) kümmert sich um Schließen, Purge und Neustart.
+Die *_async-Varianten werden von der asyncio-Engine (async_monitor.py) verwendet; Photoshop
+wird dort über asyncio.create_subprocess_exec angesteuert.
+"""
+
+__all__ = ["Backend", "BackendUnavailable", "PhotoshopBackend"]
+
+import os
+import json
+import time
+import asyncio
+import subprocess
+
+from dynamic_jsx_generator import generate_jsx_script, generate_additional_jsx
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+PHOTOSHOP_BUNDLE_ID = "com.adobe.Photoshop"
+
+
+class BackendUnavailable(Exception):
+    """Das Backend (Photoshop) läuft nicht mehr bzw. ist abgestürzt."""
+
+
+class Backend:
+    """
+    Schnittstelle eines Contentcheck-Backends.
+    """
+    name = "backend"
+
+    def open_document(self, file_path: str) -> bool:
+        raise NotImplementedError
+
+    def run_contentcheck(self, hf_config: dict, file_path: str) -> bool:
+        """Führt den Contentcheck für das aktive Dokument aus und schreibt das Logfile."""
+        raise NotImplementedError
+
+    def run_jsx(self, jsx_script_path: str) -> bool:
+        raise NotImplementedError
+
+    def run_additional_jsx(self, jsx_script_path: str, document_name: str) -> bool:
+        """Aktiviert document_name und führt danach das zusätzliche JSX aus."""
+        raise NotImplementedError
+
+    def close_document(self, document_name: str) -> bool:
+        """Schließt das Dokument ohne zu speichern."""
+        raise NotImplementedError
+
+    def purge_caches(self) -> bool:
+        raise NotImplementedError
+
+    def memory_usage_mb(self):
+        """Speicherverbrauch des Backends in MB oder None, falls unbekannt."""
+        return None
+
+    def is_alive(self) -> bool:
+        return True
+
+    def restart(self) -> bool:
+        raise NotImplementedError
+
+    # asyncio-Varianten; ohne eigene Implementierung läuft die blockierende Methode im Executor
+
+    async def open_document_async(self, file_path: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, self.open_document, file_path)
+
+    async def run_contentcheck_async(self, hf_config: dict, file_path: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, self.run_contentcheck, hf_config, file_path)
+
+    async def run_additional_jsx_async(self, jsx_script_path: str, document_name: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, self.run_additional_jsx,
+                                                                jsx_script_path, document_name)
+
+    async def close_document_async(self, document_name: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, self.close_document, document_name)
+
+
+class PhotoshopBackend(Backend):
+    name = "photoshop"
+
+    def __init__(self, settings: dict = None):
+        settings = settings or {}
+        self.restart_timeout = settings.get("restart_timeout", 120)
+
+    def open_document(self, file_path: str) -> bool:
+        cmd_open = self._open_command(file_path)
+        debug_print("Opening file in Photoshop: " + str(cmd_open))
+        try:
+            subprocess.run(cmd_open, check=True)
+            return True
+        except subprocess.CalledProcessError as e:
+            debug_print("Error opening file in Photoshop: " + str(e))
+            return False
+
+    def run_contentcheck(self, hf_config: dict, file_path: str) -> bool:
+        jsx_script_path = generate_jsx_script(hf_config, os.path.basename(file_path))
+        return self.run_jsx(jsx_script_path)
+
+    def run_jsx(self, jsx_script_path: str) -> bool:
+        return self._osascript(self._jsx_file_script(jsx_script_path), "JSX")
+
+    def run_additional_jsx(self, jsx_script_path: str, document_name: str) -> bool:
+        return self.run_jsx(generate_additional_jsx(jsx_script_path, document_name))
+
+    def _run_inline_jsx(self, code: str, label: str) -> bool:
+        return self._osascript(self._inline_jsx_script(code), label)
+
+    @staticmethod
+    def _open_command(file_path: str) -> list:
+        return ["open", "-b", PHOTOSHOP_BUNDLE_ID, file_path]
+
+    @staticmethod
+    def _jsx_file_script(jsx_script_path: str) -> str:
+        return f'tell application id "{PHOTOSHOP_BUNDLE_ID}" to do javascript file "{jsx_script_path}"'
+
+    @staticmethod
+    def _inline_jsx_script(code: str) -> str:
+        # AppleScript-String: Backslashes und Anführungszeichen escapen
+        escaped = code.replace("\\", "\\\\").replace('"', '\\"')
+        return f'tell application id "{PHOTOSHOP_BUNDLE_ID}" to do javascript "{escaped}"'
+
+    @staticmethod
+    def _close_code(document_name: str) -> str:
+        return ("try { app.documents.getByName(" + json.dumps(document_name) + ")"
+                ".close(SaveOptions.DONOTSAVECHANGES); } catch (e) {}")
+
+    def _osascript(self, script: str, label: str) -> bool:
+        try:
+            result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True)
+            debug_print(f"{label} execution result: RC={result.returncode}")
+            if result.stdout:
+                debug_print(f"{label} stdout: {result.stdout}")
+            if result.stderr:
+                debug_print(f"{label} stderr: {result.stderr}")
+            return (result.returncode == 0)
+        except Exception as e:
+            debug_print(f"Error executing {label}: {e}")
+            return False
+
+    def close_document(self, document_name: str) -> bool:
+        return self._run_inline_jsx(self._close_code(document_name), "Close")
+
+    def purge_caches(self) -> bool:
+        return self._run_inline_jsx("app.purge(PurgeTarget.ALLCACHES);", "Purge")
+
+    def _photoshop_rss_kb(self):
+        try:
+            result = subprocess.run(["ps", "-axo", "rss=,comm="], capture_output=True, text=True)
+        except Exception as e:
+            debug_print(f"Fehler beim Abfragen der Prozessliste: {e}")
+            return None
+        total = None
+        for line in result.stdout.splitlines():
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2 and "Adobe Photoshop" in parts[1] and parts[0].isdigit():
+                total = (total or 0) + int(parts[0])
+        return total
+
+    def memory_usage_mb(self):
+        rss_kb = self._photoshop_rss_kb()
+        return rss_kb / 1024.0 if rss_kb is not None else None
+
+    def is_alive(self) -> bool:
+        return self._photoshop_rss_kb() is not None
+
+    def restart(self) -> bool:
+        debug_print("Starte Photoshop neu …")
+        self._osascript(f'tell application id "{PHOTOSHOP_BUNDLE_ID}" to quit saving no', "Quit")
+        deadline = time.monotonic() + self.restart_timeout
+        while self.is_alive() and time.monotonic() < deadline:
+            time.sleep(1)
+        try:
+            subprocess.run(["open", "-g", "-b", PHOTOSHOP_BUNDLE_ID], check=True)
+        except subprocess.CalledProcessError as e:
+            debug_print("Photoshop konnte nicht gestartet werden: " + str(e))
+            return False
+        while not self.is_alive() and time.monotonic() < deadline:
+            time.sleep(1)
+        # Warten, bis Photoshop Apple Events annimmt
+        while time.monotonic() < deadline:
+            if self._run_inline_jsx("app.name;", "Ping"):
+                return True
+            time.sleep(2)
+        return False
+
+    # --- asyncio ------------------------------------------------------------------
+
+    async def _exec_async(self, command: list, label: str) -> bool:
+        try:
+            process = await asyncio.create_subprocess_exec(*command, stdout=subprocess.PIPE,
+                                                           stderr=subprocess.PIPE)
+            stdout, stderr = await process.communicate()
+        except Exception as e:
+            debug_print(f"Error executing {label}: {e}")
+            return False
+        debug_print(f"{label} execution result: RC={process.returncode}")
+        if stdout:
+            debug_print(f"{label} stdout: {stdout.decode('utf-8', 'replace')}")
+        if stderr:
+            debug_print(f"{label} stderr: {stderr.decode('utf-8', 'replace')}")
+        return process.returncode == 0
+
+    async def open_document_async(self, file_path: str) -> bool:
+        return await self._exec_async(self._open_command(file_path), "Open")
+
+    async def run_jsx_async(self, jsx_script_path: str) -> bool:
+        return await self._exec_async(["osascript", "-e", self._jsx_file_script(jsx_script_path)], "JSX")
+
+    async def run_contentcheck_async(self, hf_config: dict, file_path: str) -> bool:
+        # Erzeugen des JSX schreibt ggf. eine Datei -> Executor
+        jsx_script_path = await asyncio.get_running_loop().run_in_executor(
+            None, generate_jsx_script, hf_config, os.path.basename(file_path))
+        return await self.run_jsx_async(jsx_script_path)
+
+    async def run_additional_jsx_async(self, jsx_script_path: str, document_name: str) -> bool:
+        wrapper = await asyncio.get_running_loop().run_in_executor(
+            None, generate_additional_jsx, jsx_script_path, document_name)
+        return await self.run_jsx_async(wrapper)
+
+    async def close_document_async(self, document_name: str) -> bool:
+        return await self._exec_async(["osascript", "-e", self._inline_jsx_script(self._close_code(document_name))],
+                                      "Close")
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Simuliertes Backend – verhält sich nach außen wie Photoshop, läuft aber ohne Adobe-Software
+(z.B. unter Linux, für Benchmarks und zum Nachstellen von Lastsituationen).
+
+- Der Contentcheck liest XMP und PSD-Ebenennamen direkt aus der Datei und schreibt
+  dasselbe Logfile-Format wie das Contentcheck-JSX.
+- Speichermodell: Grundbedarf + Kosten pro offenem Dokument (fix + Vielfaches der Dateigröße)
+  + Cache-Zuwachs pro Operation (durch purge_caches() freigegeben) + Leck pro geschlossenem
+  Dokument (nur durch restart() freigegeben). Über crash_memory_mb stürzt das Backend ab.
+- Die *_async-Varianten warten mit asyncio.sleep statt time.sleep (asyncio-Engine).
+"""
+
+__all__ = ["SimulatedBackend", "DEFAULT_SIMULATED"]
+
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+
+from backend.photoshop_backend import Backend
+from preflight import read_psd_layer_names, PreflightError
+from xmp_reader import find_xmp_packet, read_xmp_fields
+from dynamic_jsx_generator import contentcheck_fields
+from record_cache import records_enabled
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+DEFAULT_SIMULATED = {
+    "open_latency": 0.05,          # Sekunden pro Öffnen
+    "jsx_latency": 0.05,           # Sekunden pro JSX-Aufruf
+    "close_latency": 0.01,
+    "purge_latency": 0.1,
+    "restart_latency": 2.0,
+    "base_memory_mb": 1500,
+    "document_memory_mb": 150,     # fester Anteil pro offenem Dokument
+    "size_factor": 3.0,            # zusätzlich Dateigröße × Faktor
+    "cache_growth_mb": 20,         # pro Operation, freigegeben durch Purge
+    "leak_mb": 5,                  # pro geschlossenem Dokument, freigegeben durch Neustart
+    "crash_memory_mb": 0,          # 0 = nie abstürzen
+    "jsx_failure_rate": 0.0,
+    "seed": None
+}
+
+
+class SimulatedBackend(Backend):
+    name = "simulated"
+
+    def __init__(self, settings: dict = None):
+        self.settings = dict(DEFAULT_SIMULATED)
+        self.settings.update(settings or {})
+        self._random = random.Random(self.settings.get("seed"))
+        self._lock = threading.Lock()
+        self.documents = {}          # Dokumentname -> (Pfad, Speicherkosten in MB)
+        self.active_document = None
+        self.cache_mb = 0.0
+        self.leaked_mb = 0.0
+        self.crashed = False
+        # Zähler für Auswertungen (Benchmarks)
+        self.stats = {"opened": 0, "closed": 0, "purges": 0, "restarts": 0, "crashes": 0, "peak_memory_mb": 0.0}
+
+    def _sleep(self, key: str):
+        delay = self.settings.get(key, 0)
+        if delay:
+            time.sleep(delay)
+
+    def _check_memory(self):
+        memory = self._memory_locked()
+        self.stats["peak_memory_mb"] = max(self.stats["peak_memory_mb"], memory)
+        limit = self.settings.get("crash_memory_mb", 0)
+        if limit and memory > limit:
+            debug_print(f"Simuliertes Backend abgestürzt bei {memory:.0f} MB")
+            self.crashed = True
+            self.stats["crashes"] += 1
+
+    def _memory_locked(self) -> float:
+        documents = sum(cost for _path, cost in self.documents.values())
+        return self.settings["base_memory_mb"] + documents + self.cache_mb + self.leaked_mb
+
+    def open_document(self, file_path: str) -> bool:
+        self._sleep("open_latency")
+        return self._open(file_path)
+
+    def _open(self, file_path: str) -> bool:
+        with self._lock:
+            if self.crashed:
+                return False
+            if not os.path.exists(file_path):
+                return False
+            size_mb = os.path.getsize(file_path) / (1024.0 * 1024.0)
+            cost = self.settings["document_memory_mb"] + size_mb * self.settings["size_factor"]
+            name = os.path.basename(file_path)
+            self.documents[name] = (file_path, cost)
+            self.active_document = name
+            self.cache_mb += self.settings["cache_growth_mb"]
+            self.stats["opened"] += 1
+            self._check_memory()
+            return not self.crashed
+
+    def run_contentcheck(self, hf_config: dict, file_path: str) -> bool:
+        self._sleep("jsx_latency")
+        return self._contentcheck(hf_config, file_path)
+
+    def _contentcheck(self, hf_config: dict, file_path: str) -> bool:
+        with self._lock:
+            if self.crashed or not self.active_document:
+                return False
+            path, _cost = self.documents[self.active_document]
+            self.cache_mb += self.settings["cache_growth_mb"]
+            self._check_memory()
+            if self.crashed:
+                return False
+            if self._random.random() < self.settings.get("jsx_failure_rate", 0.0):
+                return False
+            document_name = self.active_document
+        result = self.read_contentcheck(path, hf_config)
+        logfiles_dir = hf_config.get("logfiles_dir", "")
+        log_file = os.path.join(logfiles_dir, document_name.rsplit(".", 1)[0] + "_log_contentcheck.json")
+        try:
+            if logfiles_dir and not os.path.exists(logfiles_dir):
+                os.makedirs(logfiles_dir)
+            with open(log_file, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+        except OSError as e:
+            debug_print(f"Simuliertes Backend: Logfile nicht schreibbar: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def read_contentcheck(file_path: str, hf_config: dict) -> dict:
+        """Liefert dasselbe Ergebnis wie das spezialisierte Contentcheck-JSX."""
+        required_layers = hf_config.get("required_layers", [])
+        full_record = records_enabled(hf_config)
+        result = {"metadata": read_xmp_fields(find_xmp_packet(file_path), contentcheck_fields(hf_config))}
+        if required_layers or full_record:
+            try:
+                all_names = read_psd_layer_names(file_path)
+            except (OSError, PreflightError):
+                all_names = []
+            if full_record:
+                result["layer_names"] = all_names
+            if required_layers:
+                layer_names = set(all_names)
+                result["layers"] = {name: name in layer_names for name in required_layers}
+        return result
+
+    def run_jsx(self, jsx_script_path: str) -> bool:
+        self._sleep("jsx_latency")
+        return self._jsx()
+
+    def _jsx(self) -> bool:
+        with self._lock:
+            if self.crashed:
+                return False
+            self.cache_mb += self.settings["cache_growth_mb"]
+            self._check_memory()
+            return not self.crashed
+
+    def run_additional_jsx(self, jsx_script_path: str, document_name: str) -> bool:
+        self._activate(document_name)
+        return self.run_jsx(jsx_script_path)
+
+    def _activate(self, document_name: str):
+        with self._lock:
+            if document_name in self.documents:
+                self.active_document = document_name
+
+    def close_document(self, document_name: str) -> bool:
+        self._sleep("close_latency")
+        return self._close(document_name)
+
+    def _close(self, document_name: str) -> bool:
+        with self._lock:
+            if self.crashed:
+                return False
+            if document_name not in self.documents:
+                return True
+            del self.documents[document_name]
+            self.leaked_mb += self.settings["leak_mb"]
+            self.stats["closed"] += 1
+            if self.active_document == document_name:
+                self.active_document = next(iter(self.documents), None)
+            return True
+
+    def purge_caches(self) -> bool:
+        self._sleep("purge_latency")
+        with self._lock:
+            if self.crashed:
+                return False
+            self.cache_mb = 0.0
+            self.stats["purges"] += 1
+            return True
+
+    def memory_usage_mb(self):
+        with self._lock:
+            if self.crashed:
+                return None
+            return self._memory_locked()
+
+    def is_alive(self) -> bool:
+        with self._lock:
+            return not self.crashed
+
+    async def open_document_async(self, file_path: str) -> bool:
+        await asyncio.sleep(self.settings.get("open_latency", 0))
+        return self._open(file_path)
+
+    async def run_contentcheck_async(self, hf_config: dict, file_path: str) -> bool:
+        await asyncio.sleep(self.settings.get("jsx_latency", 0))
+        # Liest XMP/Ebenen aus der Datei und schreibt das Logfile -> Executor
+        return await asyncio.get_running_loop().run_in_executor(None, self._contentcheck, hf_config, file_path)
+
+    async def run_additional_jsx_async(self, jsx_script_path: str, document_name: str) -> bool:
+        self._activate(document_name)
+        await asyncio.sleep(self.settings.get("jsx_latency", 0))
+        return self._jsx()
+
+    async def close_document_async(self, document_name: str) -> bool:
+        await asyncio.sleep(self.settings.get("close_latency", 0))
+        return self._close(document_name)
+
+    def restart(self) -> bool:
+        self._sleep("restart_latency")
+        with self._lock:
+            self.documents.clear()
+            self.active_document = None
+            self.cache_mb = 0.0
+            self.leaked_mb = 0.0
+            self.crashed = False
+            self.stats["restarts"] += 1
+            return True
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Replay eines aufgezeichneten Hotfolder-Traces (siehe event_trace.py) in einem Arbeitsverzeichnis.
+
+- Dateien werden so geschrieben, wie sie aufgezeichnet wurden: gleiche Namen, gleiche
+  Zwischengrößen (Teil-Uploads), Umbenennungen und Löschungen, im aufgezeichneten Takt
+  (--speed 1) oder beschleunigt (--speed 10 = zehnfach).
+- Der Inhalt ist synthetisch (benchmark/workload.py) im Format der Dateiendung; Dateien, die
+  bei der Aufnahme erfolgreich waren, erhalten die Pflicht-Metadaten und -Ebenen.
+- Bewegungen/Löschungen, die der Monitor selbst verursacht hat (Verschieben nach Success/Fault),
+  werden nicht nachgespielt.
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmark.replay_trace trace.jsonl.gz --speed 10 [--hotfolder NAME] [--backend simulated]
+"""
+
+__all__ = ["TraceReplayer", "replay_against_monitor", "main"]
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+from event_trace import read_trace
+from benchmark.workload import build_xmp_packet, jpeg_bytes, tiff_bytes, psd_bytes
+from benchmark.run_benchmark import (DEFAULT_BENCHMARK, _merge, _percentile, _ResourceSampler,
+                                     _histograms_for, _silence_debug_output)
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+_FORMATS = {".psd": "psd", ".psb": "psd", ".tif": "tiff", ".tiff": "tiff", ".jpg": "jpeg", ".jpeg": "jpeg"}
+
+
+def _content_for(name: str, size: int, valid: bool, required_metadata, required_layers) -> bytes:
+    """Synthetischer Inhalt im Format der Dateiendung, auf size Bytes aufgefüllt."""
+    file_format = _FORMATS.get(os.path.splitext(name)[1].lower())
+    width = 256
+    height = max(1, (size - 4096) // (width * 3))
+    xmp = build_xmp_packet({key: f"Replay {key}" for key in required_metadata}) if valid else None
+    if file_format == "jpeg":
+        data = jpeg_bytes(width, height, xmp, max(0, size - 4096))
+    elif file_format == "tiff":
+        data = tiff_bytes(width, height, xmp)
+    elif file_format == "psd":
+        data = psd_bytes(width, height, list(required_layers) if valid else [], xmp)
+    else:
+        data = b""
+    return data + b"\0" * max(0, size - len(data))
+
+
+class TraceReplayer:
+    """Spielt die Ereignisse eines Traces in target_dir nach (eigener Thread)."""
+
+    def __init__(self, trace_path: str, target_dir: str, speed: float = 1.0,
+                 required_metadata=(), required_layers=()):
+        self.header, self.events = read_trace(trace_path)
+        self.target_dir = target_dir
+        self.speed = speed if speed > 0 else 1.0
+        self.required_metadata = list(required_metadata)
+        self.required_layers = list(required_layers)
+        self.finished_at = {}        # endgültiger Dateiname -> Zeitpunkt des letzten Schreibens
+        self._thread = None
+        self._prepare()
+
+    def _prepare(self):
+        """
+        Ordnet jedem aufgezeichneten Pfad eine "Datei-Identität" zu (über Umbenennungen hinweg),
+        bestimmt deren endgültigen Namen, die größte Größe und das aufgezeichnete Ergebnis.
+        """
+        current = {}                 # Pfad -> Identität
+        self.identities = []         # [{"final": name, "size": n, "outcome": o}]
+        self.expected = {}           # endgültiger Pfad -> aufgezeichnetes Ergebnis
+        self.actions = []            # (t, kind, identität, pfad, ziel, größe)
+        finished = set()
+        # Das Verschieben nach Success/Fault wird vor dem Ergebnis des Jobs aufgezeichnet:
+        # moved/deleted, auf das für denselben Pfad als Nächstes das Ergebnis folgt, nicht nachspielen
+        monitor_moves = set()
+        upcoming = {}
+        for index in range(len(self.events) - 1, -1, -1):
+            event = self.events[index]
+            path = event.get("p", "")
+            if event["e"] == "outcome":
+                if event.get("o") in ("success", "fault"):
+                    upcoming[path] = "outcome"
+                continue
+            if event["e"] in ("moved", "deleted") and upcoming.get(path) == "outcome":
+                monitor_moves.add(index)
+            upcoming[path] = event["e"]
+        for index, event in enumerate(self.events):
+            path = event.get("p", "")
+            if path.startswith(".."):
+                continue
+            kind = event["e"]
+            if kind == "outcome":
+                identity = current.get(path)
+                if identity is not None and event["o"] in ("success", "fault"):
+                    self.identities[identity]["outcome"] = event["o"]
+                    self.expected[path] = event["o"]
+                    finished.add(path)
+                continue
+            if kind in ("moved", "deleted") and (path in finished or index in monitor_moves):
+                continue  # hat der Monitor selbst verschoben
+            identity = current.get(path)
+            if identity is None:
+                if kind not in ("created", "modified"):
+                    continue
+                identity = len(self.identities)
+                self.identities.append({"final": path, "size": 0, "outcome": None})
+                current[path] = identity
+            entry = self.identities[identity]
+            if kind == "moved":
+                dest = event.get("d", "")
+                if dest.startswith(".."):
+                    kind, dest = "deleted", None
+                else:
+                    del current[path]
+                    current[dest] = identity
+                    entry["final"] = dest
+            else:
+                dest = None
+            entry["size"] = max(entry["size"], event.get("s", 0))
+            self.actions.append((event["t"], kind, identity, path, dest, event.get("s")))
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.target_dir, *rel.split("/"))
+
+    def _write(self, content: bytes, path: str, size: int):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        mode = "r+b" if os.path.exists(path) else "wb"
+        with open(path, mode) as f:
+            f.seek(0, os.SEEK_END)
+            current = f.tell()
+            if size is None or size >= current:
+                f.write(content[current:size])
+            else:
+                f.truncate(size)
+
+    def _run(self):
+        contents = {}
+        start = time.monotonic()
+        for t, kind, identity, path, dest, size in self.actions:
+            delay = start + t / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            entry = self.identities[identity]
+            if identity not in contents:
+                contents[identity] = _content_for(entry["final"], entry["size"], entry["outcome"] == "success",
+                                                  self.required_metadata, self.required_layers)
+            try:
+                if kind in ("created", "modified"):
+                    self._write(contents[identity], self._abs(path), size)
+                elif kind == "moved":
+                    os.makedirs(os.path.dirname(self._abs(dest)), exist_ok=True)
+                    os.replace(self._abs(path), self._abs(dest))
+                elif kind == "deleted" and os.path.exists(self._abs(path)):
+                    os.remove(self._abs(path))
+            except OSError as e:
+                debug_print(f"Replay: {kind} {path} fehlgeschlagen: {e}")
+            self.finished_at[os.path.basename(entry["final"])] = time.time()
+
+    def start(self):
+        os.makedirs(self.target_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="trace-replayer", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float = None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def duration(self) -> float:
+        return self.actions[-1][0] / self.speed if self.actions else 0.0
+
+
+def replay_against_monitor(trace_path: str, hf_settings: dict = None, speed: float = 1.0,
+                           timeout: float = 600, work_dir: str = None, keep_files: bool = False) -> dict:
+    """
+    Spielt den Trace gegen einen HotfolderMonitor ab (Backend gemäß hf_settings["backend"])
+    und vergleicht die Ergebnisse mit der Aufnahme.
+    """
+    from async_monitor import monitor_class
+
+    cfg = _merge(DEFAULT_BENCHMARK, hf_settings or {})
+    run_id = f"replay-{os.getpid()}-{int(time.time() * 1000)}"
+    base_dir = work_dir or tempfile.mkdtemp(prefix="prism_replay_")
+    dirs = {key: os.path.join(base_dir, key) for key in ("monitor", "success", "fault", "logfiles")}
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+    hf_config = _merge(cfg, {
+        "name": run_id,
+        "monitor_dir": dirs["monitor"],
+        "success_dir": dirs["success"],
+        "fault_dir": dirs["fault"],
+        "logfiles_dir": dirs["logfiles"],
+        "trace": {"enabled": False},
+        "backend": _merge(cfg["backend"], {"session": run_id})
+    })
+
+    replayer = TraceReplayer(trace_path, dirs["monitor"], speed,
+                             cfg["required_metadata"], cfg["required_layers"])
+    expected = {os.path.basename(path): outcome for path, outcome in replayer.expected.items()}
+    completed = {}
+    all_done = threading.Event()
+
+    class ReplayMonitor(monitor_class(hf_config)):
+        def _on_job_done(self, job):
+            super()._on_job_done(job)
+            if job.outcome in ("success", "fault"):
+                completed[job.file_name] = (time.time(), job.outcome)
+                if expected and all(name in completed for name in expected):
+                    all_done.set()
+
+    monitor = ReplayMonitor(hf_config)
+    sampler = _ResourceSampler(cfg["sample_interval"])
+    sampler.start()
+    monitor.start()
+    started = time.time()
+    replayer.start()
+    replayer.join()
+    if expected:
+        all_done.wait(timeout)
+    else:
+        time.sleep(1.0)
+    monitor.stop()
+    sampler.stop()
+
+    latencies = [done - replayer.finished_at.get(name, started) for name, (done, _o) in completed.items()]
+    mismatches = [{"file": name, "recorded": outcome, "replayed": completed.get(name, (None, None))[1]}
+                  for name, outcome in sorted(expected.items()) if completed.get(name, (None, None))[1] != outcome]
+    last_done = max((t for t, _o in completed.values()), default=time.time())
+    elapsed = max(1e-6, last_done - started)
+    result = {
+        "run_id": run_id,
+        "trace": os.path.abspath(trace_path),
+        "recorded_hotfolder": replayer.header.get("hotfolder"),
+        "speed": speed,
+        "events": len(replayer.actions),
+        "files_recorded": len(expected),
+        "files_completed": len(completed),
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": round(len(completed) / elapsed, 3),
+        "latency": {
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99)
+        },
+        "peak_threads": sampler.peak_threads,
+        "peak_rss_mb": round(sampler.peak_rss_mb, 1),
+        "mismatches": mismatches,
+        "breakdown": _histograms_for(run_id),
+        "backend": monitor.backend_session.status()
+    }
+    if not keep_files and not work_dir:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay eines PRisM-RAC-Hotfolder-Traces")
+    parser.add_argument("trace", help="Trace-Datei (.jsonl oder .jsonl.gz)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Beschleunigung (1 = Echtzeit)")
+    parser.add_argument("--hotfolder", help="Einstellungen dieses Hotfolders aus der Konfiguration verwenden")
+    parser.add_argument("--settings", help="JSON-Datei mit Einstellungen (wie DEFAULT_BENCHMARK)")
+    parser.add_argument("--backend", choices=["simulated", "photoshop"], help="Backend-Typ überschreiben")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--output", help="Ergebnis als JSON schreiben")
+    parser.add_argument("--keep-files", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        _silence_debug_output()
+
+    settings = {}
+    if args.hotfolder:
+        from config.config_manager import load_config
+        matches = [hf for hf in load_config().get("hotfolders", []) if hf.get("name") == args.hotfolder]
+        if not matches:
+            print(f"Hotfolder nicht gefunden: {args.hotfolder}")
+            return 2
+        hf = matches[0]
+        settings = {key: hf[key] for key in ("required_metadata", "required_layers", "preflight",
+                                             "pipeline", "backend", "additional_jsx", "jsx_mode") if key in hf}
+    if args.settings:
+        with open(args.settings, "r", encoding="utf-8") as f:
+            settings = _merge(settings, json.load(f))
+    if args.backend:
+        settings = _merge(settings, {"backend": {"type": args.backend}})
+
+    result = replay_against_monitor(args.trace, settings, args.speed, args.timeout, keep_files=args.keep_files)
+    print(f"Replay {result['trace']} ({result['events']} Ereignisse, {args.speed}x)")
+    print(f"  Dateien:    {result['files_completed']}/{result['files_recorded']} abgeschlossen, "
+          f"{result['files_per_second']} Dateien/s")
+    latency = result["latency"]
+    print(f"  Latenz:     p50={latency['p50']} s  p95={latency['p95']} s  p99={latency['p99']} s")
+    print(f"  Spitzen:    {result['peak_threads']} Threads, {result['peak_rss_mb']} MB RSS")
+    print(f"  Abweichungen zur Aufnahme: {len(result['mismatches'])}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    return 0 if not result["mismatches"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Durchsatz-Benchmark des HotfolderMonitor gegen das simulierte Backend.
+
+Aufruf (aus dem Projektverzeichnis):
+    python -m benchmark.run_benchmark --scenario mixed --output bench.json [--compare alt.json]
+
+Ergebnis (JSON): Dateien/s, End-to-End-Latenz (p50/p95/p99, letztes Byte geschrieben ->
+Job abgeschlossen), Spitzenwerte für Threads und RSS, Aufschlüsselung pro Stufe/Schritt
+sowie Abweichungen vom erwarteten Ergebnis (success/fault). Mit --compare wird gegen einen
+früheren Lauf verglichen; bei Verschlechterung über --tolerance endet das Skript mit Code 1.
+Mit --workers N läuft die Backend-Stufe über den Job-Server und N lokale Worker-Agenten
+(je ein Prozess mit eigenem simuliertem Backend).
+"""
+
+__all__ = ["SCENARIOS", "DEFAULT_BENCHMARK", "run_benchmark", "compare_results", "main"]
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import secrets
+import platform
+import tempfile
+import threading
+import subprocess
+
+from benchmark.workload import plan_workload, WorkloadGenerator
+from metrics import REGISTRY
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+DEFAULT_BENCHMARK = {
+    "required_metadata": ["documentTitle", "author", "copyrightNotice"],
+    "required_layers": ["Freisteller"],
+    "preflight": {"enabled": True, "color_modes": ["RGB", "CMYK"], "min_resolution": 150},
+    "pipeline": {"stable_interval": 0.25, "stable_checks": 2, "log_poll_interval": 0.02},
+    "backend": {
+        "type": "simulated",
+        "purge_every": 25,
+        "recycle_after_documents": 200,
+        "simulated": {"open_latency": 0.02, "jsx_latency": 0.02, "close_latency": 0.005,
+                      "purge_latency": 0.05, "restart_latency": 0.5, "seed": 1}
+    },
+    "workload": {},
+    "remote_workers": 0,          # > 0: Job-Server + so viele worker_agent-Prozesse
+    "timeout": 600,               # Sekunden, bis der Lauf abgebrochen wird
+    "sample_interval": 0.05       # Abtastung von Threads und RSS
+}
+
+SCENARIOS = {
+    "steady": {"workload": {"files": 200, "rate": 25.0, "slow_ratio": 0.0}},
+    "burst": {"workload": {"files": 300, "rate": 5.0, "burst_every": 50, "burst_size": 50, "slow_ratio": 0.0}},
+    "slow_copy": {"workload": {"files": 100, "rate": 10.0, "slow_ratio": 0.5, "slow_copy_seconds": 3.0}},
+    "mixed": {"workload": {"files": 300, "rate": 15.0, "burst_every": 100, "burst_size": 40,
+                           "slow_ratio": 0.1, "slow_copy_seconds": 3.0}}
+}
+
+# Kennzahl -> True, wenn höher besser ist (für den Vergleich mit früheren Läufen)
+COMPARED_METRICS = {
+    "files_per_second": True,
+    "latency.p50": False,
+    "latency.p95": False,
+    "latency.p99": False,
+    "peak_threads": False,
+    "peak_rss_mb": False
+}
+
+
+def _merge(base: dict, override: dict) -> dict:
+    result = dict(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def _percentile(values: list, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return round(ordered[index], 4)
+
+
+def _rss_mb():
+    """Aktueller RSS des Prozesses in MB (Linux: /proc, sonst Spitzenwert aus resource)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS liefert Bytes, Linux Kilobytes
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+class _ResourceSampler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.peak_threads = threading.active_count()
+        self.peak_rss_mb = _rss_mb() or 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="benchmark-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss_mb = max(self.peak_rss_mb, _rss_mb() or 0.0)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _histograms_for(hotfolder: str) -> dict:
+    """Stufen- und Schrittzeiten dieses Laufs aus der Metrics-Registry."""
+    breakdown = {}
+    snapshot = REGISTRY.snapshot()["metrics"]
+    for metric, key, label in (("prism_stage_duration_seconds", "stages", "stage"),
+                               ("prism_step_duration_seconds", "steps", "step")):
+        for entry in snapshot.get(metric, {}).get("values", []):
+            if entry["labels"].get("hotfolder") != hotfolder:
+                continue
+            count = entry["count"]
+            breakdown.setdefault(key, {})[entry["labels"][label]] = {
+                "count": count,
+                "total_seconds": entry["sum"],
+                "mean": round(entry["sum"] / count, 5) if count else None,
+                "p95_bucket": entry["p95"]
+            }
+    return breakdown
+
+
+def run_benchmark(settings: dict = None, work_dir: str = None, keep_files: bool = False) -> dict:
+    from async_monitor import monitor_class
+
+    cfg = _merge(DEFAULT_BENCHMARK, settings or {})
+    run_id = f"bench-{os.getpid()}-{int(time.time() * 1000)}"
+    base_dir = work_dir or tempfile.mkdtemp(prefix="prism_bench_")
+    dirs = {key: os.path.join(base_dir, key) for key in ("monitor", "success", "fault", "logfiles")}
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+
+    hf_config = {
+        "name": run_id,
+        "monitor_dir": dirs["monitor"],
+        "success_dir": dirs["success"],
+        "fault_dir": dirs["fault"],
+        "logfiles_dir": dirs["logfiles"],
+        "required_metadata": cfg["required_metadata"],
+        "required_layers": cfg["required_layers"],
+        "preflight": cfg["preflight"],
+        "pipeline": cfg["pipeline"],
+        "trace": cfg.get("trace", {}),
+        # Eigene Session pro Lauf, damit jeder Lauf mit frischem Backend beginnt
+        "backend": _merge(cfg["backend"], {"session": run_id})
+    }
+
+    workers = []
+    if cfg["remote_workers"]:
+        address = "unix://" + os.path.join(base_dir, "jobs.sock")
+        token = secrets.token_hex(16)
+        hf_config["distributed"] = {"enabled": True, "listen": address, "token": token, "heartbeat_interval": 1.0,
+                                    "lease_timeout": 5.0, "backend_workers": 2 * cfg["remote_workers"]}
+        workers = _start_workers(address, cfg["remote_workers"], cfg["backend"], token)
+
+    plan = plan_workload(cfg["workload"], cfg["required_metadata"], cfg["required_layers"])
+    generator = WorkloadGenerator(dirs["monitor"], plan, cfg["workload"],
+                                  cfg["required_metadata"], cfg["required_layers"])
+    completed = {}
+    all_done = threading.Event()
+
+    class BenchmarkMonitor(monitor_class(hf_config)):
+        def _on_job_done(self, job):
+            super()._on_job_done(job)
+            if job.outcome in ("success", "fault"):
+                completed[job.file_name] = (time.time(), job.outcome)
+                if len(completed) >= len(plan):
+                    all_done.set()
+
+    monitor = BenchmarkMonitor(hf_config)
+    sampler = _ResourceSampler(cfg["sample_interval"])
+    sampler.start()
+    monitor.start()
+    started = time.time()
+    generator.start()
+    timed_out = not all_done.wait(cfg["timeout"])
+    finished = time.time()
+    monitor.stop()
+    generator.join(5)
+    sampler.stop()
+    job_server_status = monitor.job_server.status() if monitor.job_server else None
+    if workers:
+        from job_server import stop_job_servers
+        stop_job_servers()
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.wait(10)
+
+    latencies = []
+    mismatches = []
+    for entry in plan:
+        done = completed.get(entry["name"])
+        if not done:
+            continue
+        written = generator.finished_at.get(entry["name"], started)
+        latencies.append(max(0.0, done[0] - written))
+        if done[1] != entry["expected"]:
+            mismatches.append({"file": entry["name"], "expected": entry["expected"], "outcome": done[1]})
+
+    last_done = max((t for t, _outcome in completed.values()), default=finished)
+    elapsed = max(1e-6, last_done - started)
+    session_status = monitor.backend_session.status()
+    result = {
+        "run_id": run_id,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "settings": cfg,
+        "files_planned": len(plan),
+        "files_completed": len(completed),
+        "timed_out": timed_out,
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": round(len(completed) / elapsed, 3),
+        "outcomes": {
+            "success": sum(1 for _t, o in completed.values() if o == "success"),
+            "fault": sum(1 for _t, o in completed.values() if o == "fault")
+        },
+        "mismatches": mismatches,
+        "latency": {
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "max": round(max(latencies), 4) if latencies else None
+        },
+        "peak_threads": sampler.peak_threads,
+        "peak_rss_mb": round(sampler.peak_rss_mb, 1),
+        "breakdown": _histograms_for(run_id),
+        "backend": session_status,
+        "job_server": job_server_status
+    }
+    if not keep_files and not work_dir:
+        shutil.rmtree(base_dir, ignore_errors=True)
+    return result
+
+
+def _start_workers(address: str, count: int, backend: dict, token: str) -> list:
+    """Startet count Worker-Agenten mit simuliertem Backend als eigene Prozesse."""
+    from job_server import TOKEN_ENV
+
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    backend_settings = {key: value for key, value in backend.items() if key != "type"}
+    env = dict(os.environ, **{TOKEN_ENV: token})
+    return [subprocess.Popen([sys.executable, "-m", "worker_agent", "--server", address,
+                              "--backend", "simulated", "--backend-settings", json.dumps(backend_settings),
+                              "--id", f"bench-worker-{index + 1}", "--quiet"], cwd=repo_dir, env=env)
+            for index in range(count)]
+
+
+def _lookup(result: dict, dotted: str):
+    value = result
+    for part in dotted.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def compare_results(current: dict, previous: dict, tolerance: float = 0.1) -> list:
+    """
+    Vergleicht zwei Läufe. Rückgabe: Liste von Verschlechterungen
+    [{"metric", "previous", "current", "change"}] jenseits der Toleranz (relativ).
+    """
+    regressions = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        old = _lookup(previous, metric)
+        new = _lookup(current, metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append({"metric": metric, "previous": old, "current": new, "change": round(change, 3)})
+    return regressions
+
+
+def _print_summary(result: dict):
+    print(f"Lauf {result['run_id']} ({result['files_completed']}/{result['files_planned']} Dateien"
+          f"{', TIMEOUT' if result['timed_out'] else ''})")
+    print(f"  Durchsatz:  {result['files_per_second']} Dateien/s in {result['elapsed_seconds']} s")
+    latency = result["latency"]
+    print(f"  Latenz:     p50={latency['p50']} s  p95={latency['p95']} s  p99={latency['p99']} s")
+    print(f"  Spitzen:    {result['peak_threads']} Threads, {result['peak_rss_mb']} MB RSS")
+    print(f"  Ergebnis:   {result['outcomes']}, Abweichungen: {len(result['mismatches'])}")
+    for name, stats in sorted(result["breakdown"].get("stages", {}).items(), key=lambda item: -item[1]["total_seconds"]):
+        print(f"  Stufe {name:<10} n={stats['count']:<5} Mittel={stats['mean']} s  Summe={stats['total_seconds']:.2f} s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Durchsatz-Benchmark für PRisM-RAC-Hotfolder")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--files", type=int, help="Anzahl Dateien (überschreibt das Szenario)")
+    parser.add_argument("--engine", choices=["threads", "asyncio"], help="Engine des Monitors (pipeline.engine)")
+    parser.add_argument("--workers", type=int, help="Backend über Job-Server und N lokale Worker-Agenten")
+    parser.add_argument("--settings", help="JSON-Datei mit zusätzlichen Einstellungen (wie DEFAULT_BENCHMARK)")
+    parser.add_argument("--output", help="Ergebnis als JSON schreiben")
+    parser.add_argument("--compare", help="Früheres Ergebnis (JSON) zum Vergleich")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Erlaubte relative Verschlechterung")
+    parser.add_argument("--keep-files", action="store_true", help="Arbeitsverzeichnis nicht löschen")
+    parser.add_argument("--verbose", action="store_true", help="Debug-Ausgaben des Monitors anzeigen")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        _silence_debug_output()
+
+    settings = _merge({}, SCENARIOS[args.scenario])
+    if args.settings:
+        with open(args.settings, "r", encoding="utf-8") as f:
+            settings = _merge(settings, json.load(f))
+    if args.files:
+        settings = _merge(settings, {"workload": {"files": args.files}})
+    if args.engine:
+        settings = _merge(settings, {"pipeline": {"engine": args.engine}})
+    if args.workers:
+        settings["remote_workers"] = args.workers
+    settings["scenario"] = args.scenario
+
+    result = run_benchmark(settings, keep_files=args.keep_files)
+    _print_summary(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous.get("settings", {}).get("scenario") != args.scenario:
+            print(f"  Hinweis: Vergleichslauf verwendet ein anderes Szenario "
+                  f"({previous.get('settings', {}).get('scenario')}).")
+        regressions = compare_results(result, previous, args.tolerance)
+        for reg in regressions:
+            print(f"  VERSCHLECHTERUNG {reg['metric']}: {reg['previous']} -> {reg['current']} ({reg['change']:+.1%})")
+        if regressions:
+            return 1
+    return 0 if not result["timed_out"] and not result["mismatches"] else 1
+
+
+def _silence_debug_output():
+    import async_monitor  # noqa: F401 – lädt alle Module mit debug_print
+    for module in list(sys.modules.values()):
+        if module is not None and hasattr(module, "DEBUG_OUTPUT"):
+            module.DEBUG_OUTPUT = False
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Synthetische Hotfolder-Last für Benchmarks.
+
+- Schreibt PSD/TIFF/JPEG-Dateien (mit/ohne XMP-Pflichtfelder, PSD mit/ohne Pflicht-Ebenen),
+  deren Header von preflight.py und deren Inhalt vom SimulatedBackend ausgewertet werden können.
+- Ablauf: gleichmäßige Rate, optional Bursts (viele Dateien auf einmal) und langsame
+  Schreibvorgänge ("Kopie läuft noch"), die sich über slow_copy_seconds erstrecken.
+- Alles wird aus seed abgeleitet – gleicher seed, gleiche Last.
+"""
+
+__all__ = ["DEFAULT_WORKLOAD", "plan_workload", "WorkloadGenerator",
+           "build_xmp_packet", "jpeg_bytes", "tiff_bytes", "psd_bytes"]
+
+import os
+import time
+import struct
+import random
+import threading
+from xml.sax.saxutils import escape
+
+from dynamic_jsx_generator import FIELD_MAPPING, NS_DC, NS_PHOTOSHOP, NS_XMP_RIGHTS
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+DEFAULT_WORKLOAD = {
+    "files": 100,
+    "formats": {"psd": 0.4, "tiff": 0.3, "jpeg": 0.3},   # Anteile
+    "xmp_ratio": 0.8,             # Anteil mit allen Pflicht-Metadaten
+    "layers_ratio": 0.8,          # Anteil PSD mit allen Pflicht-Ebenen
+    "extra_layers": 3,            # zusätzliche Ebenen pro PSD
+    "size_kb": [200, 2000],       # Dateigröße (min, max)
+    "width": 512,
+    "ppi": 300,
+    "rate": 20.0,                 # Dateien pro Sekunde außerhalb von Bursts (0 = alle sofort)
+    "burst_every": 0,             # nach jeweils n Dateien kommt ein Burst (0 = keine Bursts)
+    "burst_size": 20,             # Dateien pro Burst, ohne Pause geschrieben
+    "slow_ratio": 0.1,            # Anteil langsam geschriebener Dateien
+    "slow_copy_seconds": 3.0,     # Dauer eines langsamen Schreibvorgangs
+    "chunk_kb": 64,
+    "seed": 1
+}
+
+_EXTENSIONS = {"psd": "psd", "tiff": "tif", "jpeg": "jpg"}
+
+_NAMESPACE_PREFIXES = {NS_DC: "dc", NS_PHOTOSHOP: "photoshop", NS_XMP_RIGHTS: "xmpRights"}
+
+
+def build_xmp_packet(fields: dict) -> bytes:
+    """Erzeugt ein XMP-Paket für {feld: wert} (Feldnamen wie in FIELD_MAPPING)."""
+    properties = []
+    for key, value in fields.items():
+        ns, prop, alt_text, is_array = FIELD_MAPPING[key]
+        tag = f"{_NAMESPACE_PREFIXES[ns]}:{prop}"
+        if alt_text:
+            properties.append(f'<{tag}><rdf:Alt><rdf:li xml:lang="x-default">{escape(value)}</rdf:li></rdf:Alt></{tag}>')
+        elif is_array:
+            properties.append(f"<{tag}><rdf:Seq><rdf:li>{escape(value)}</rdf:li></rdf:Seq></{tag}>")
+        else:
+            properties.append(f"<{tag}>{escape(value)}</{tag}>")
+    namespaces = " ".join(f'xmlns:{prefix}="{ns}"' for ns, prefix in _NAMESPACE_PREFIXES.items())
+    return (
+        '<?xpacket begin="﻿" id="W5M0MpCehiHzreSzNTczkc9d"?>'
+        '<x:xmpmeta xmlns:x="adobe:ns:meta/">'
+        '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+        f'<rdf:Description rdf:about="" {namespaces}>{"".join(properties)}</rdf:Description>'
+        '</rdf:RDF></x:xmpmeta><?xpacket end="w"?>'
+    ).encode("utf-8")
+
+
+def _filler(size: int, rng: random.Random) -> bytes:
+    # Ohne 0xFF, damit in JPEG-Daten keine Marker entstehen
+    return bytes(rng.getrandbits(8) & 0xFE for _ in range(min(size, 4096))) * (size // 4096 + 1)
+
+
+def jpeg_bytes(width: int, height: int, xmp: bytes = None, payload_size: int = 0, ppi: int = 300,
+               rng: random.Random = None) -> bytes:
+    rng = rng or random.Random(0)
+    out = [b"\xff\xd8"]
+    jfif = b"JFIF\0" + struct.pack(">BBBHHBB", 1, 1, 1, ppi, ppi, 0, 0)
+    out.append(b"\xff\xe0" + struct.pack(">H", len(jfif) + 2) + jfif)
+    if xmp:
+        app1 = b"http://ns.adobe.com/xap/1.0/\0" + xmp
+        out.append(b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1)
+    sof = struct.pack(">BHHB", 8, height, width, 3) + b"\x01\x11\x00\x02\x11\x01\x03\x11\x01"
+    out.append(b"\xff\xc0" + struct.pack(">H", len(sof) + 2) + sof)
+    sos = b"\x03\x01\x00\x02\x11\x03\x11\x00\x3f\x00"
+    out.append(b"\xff\xda" + struct.pack(">H", len(sos) + 2) + sos)
+    out.append(_filler(payload_size, rng)[:payload_size])
+    out.append(b"\xff\xd9")
+    return b"".join(out)
+
+
+def tiff_bytes(width: int, height: int, xmp: bytes = None, ppi: int = 300, rng: random.Random = None) -> bytes:
+    """Unkomprimiertes RGB-TIFF (Little Endian, 8 Bit)."""
+    rng = rng or random.Random(0)
+    pixel_size = width * height * 3
+    entries = [(256, 4, 1, width), (257, 4, 1, height), (258, 3, 3, None), (259, 3, 1, 1),
+               (262, 3, 1, 2), (273, 4, 1, None), (277, 3, 1, 3), (278, 4, 1, height),
+               (279, 4, 1, pixel_size), (282, 5, 1, None), (283, 5, 1, None), (296, 3, 1, 2)]
+    if xmp:
+        entries.append((700, 1, len(xmp), None))
+    ifd_offset = 8
+    data_offset = ifd_offset + 2 + 12 * len(entries) + 4
+    extra = b""
+    offsets = {}
+    for tag, payload in ((258, struct.pack("<HHH", 8, 8, 8)), (282, struct.pack("<II", ppi, 1)),
+                         (283, struct.pack("<II", ppi, 1)), (700, xmp or b"")):
+        offsets[tag] = data_offset + len(extra)
+        extra += payload + (b"\0" if len(payload) % 2 else b"")
+    offsets[273] = data_offset + len(extra)
+    ifd = struct.pack("<H", len(entries))
+    for tag, typ, count, value in entries:
+        if value is None:
+            value = offsets[tag]
+        if typ == 3 and count == 1:
+            ifd += struct.pack("<HHIHH", tag, typ, count, value, 0)
+        else:
+            ifd += struct.pack("<HHII", tag, typ, count, value)
+    ifd += struct.pack("<I", 0)
+    return b"II*\0" + struct.pack("<I", ifd_offset) + ifd + extra + _filler(pixel_size, rng)[:pixel_size]
+
+
+def _psd_layer_record(name: str) -> bytes:
+    encoded = name.encode("latin-1", "replace")[:255]
+    pascal = bytes([len(encoded)]) + encoded
+    pascal += b"\0" * (-len(pascal) % 4)
+    luni_data = struct.pack(">I", len(name)) + name.encode("utf-16-be")
+    luni_data += b"\0" * (-len(luni_data) % 4)
+    luni = b"8BIMluni" + struct.pack(">I", len(luni_data)) + luni_data
+    extra = struct.pack(">II", 0, 0) + pascal + luni
+    return (struct.pack(">iiii", 0, 0, 0, 0) + struct.pack(">H", 0)
+            + b"8BIMnorm" + struct.pack(">BBBB", 255, 0, 0, 0)
+            + struct.pack(">I", len(extra)) + extra)
+
+
+def psd_bytes(width: int, height: int, layers=(), xmp: bytes = None, ppi: int = 300,
+              rng: random.Random = None) -> bytes:
+    """RGB-PSD (8 Bit) mit leeren, benannten Ebenen und unkomprimiertem Composite."""
+    rng = rng or random.Random(0)
+    header = b"8BPS" + struct.pack(">H", 1) + b"\0" * 6 + struct.pack(">HIIHH", 3, height, width, 8, 3)
+    resources = b""
+    resolution = struct.pack(">IHHIHH", ppi << 16, 1, 1, ppi << 16, 1, 1)
+    for resource_id, data in ((1005, resolution), (1060, xmp)):
+        if not data:
+            continue
+        resources += b"8BIM" + struct.pack(">H", resource_id) + b"\0\0" + struct.pack(">I", len(data)) + data
+        resources += b"\0" * (len(data) % 2)
+    if layers:
+        layer_info = struct.pack(">h", len(layers)) + b"".join(_psd_layer_record(n) for n in layers)
+        layer_info += b"\0" * (len(layer_info) % 2)
+        layer_section = struct.pack(">I", len(layer_info)) + layer_info + struct.pack(">I", 0)
+    else:
+        layer_section = b""
+    pixel_size = width * height * 3
+    return (header + struct.pack(">I", 0) + struct.pack(">I", len(resources)) + resources
+            + struct.pack(">I", len(layer_section)) + layer_section
+            + struct.pack(">H", 0) + _filler(pixel_size, rng)[:pixel_size])
+
+
+def plan_workload(settings: dict = None, required_metadata=(), required_layers=()) -> list:
+    """
+    Plant die Dateien: [{"name", "format", "size", "xmp", "layers", "slow", "at", "expected"}].
+    "at" ist der Startzeitpunkt in Sekunden ab Beginn, "expected" das erwartete Ergebnis
+    (success/fault) bei den angegebenen Pflichtfeldern und -ebenen.
+    """
+    cfg = dict(DEFAULT_WORKLOAD)
+    cfg.update(settings or {})
+    rng = random.Random(cfg["seed"])
+    formats = list(cfg["formats"])
+    weights = [cfg["formats"][k] for k in formats]
+    interval = 1.0 / cfg["rate"] if cfg["rate"] else 0.0
+    plan = []
+    at = 0.0
+    in_burst = 0
+    for i in range(cfg["files"]):
+        if cfg["burst_every"] and i and i % cfg["burst_every"] == 0:
+            in_burst = cfg["burst_size"]
+        if in_burst:
+            in_burst -= 1
+        else:
+            at += interval
+        file_format = rng.choices(formats, weights)[0]
+        has_xmp = rng.random() < cfg["xmp_ratio"]
+        has_layers = file_format == "psd" and rng.random() < cfg["layers_ratio"]
+        expected = has_xmp and (not required_layers or has_layers)
+        plan.append({
+            "name": f"bench_{i:05d}.{_EXTENSIONS[file_format]}",
+            "format": file_format,
+            "size": rng.randint(cfg["size_kb"][0], cfg["size_kb"][1]) * 1024,
+            "xmp": has_xmp,
+            "layers": has_layers,
+            "slow": rng.random() < cfg["slow_ratio"],
+            "at": round(at, 4),
+            "expected": "success" if expected else "fault"
+        })
+    return plan
+
+
+class WorkloadGenerator:
+    """Schreibt einen geplanten Workload zeitgesteuert in monitor_dir (eigener Thread)."""
+
+    def __init__(self, monitor_dir: str, plan: list, settings: dict = None,
+                 required_metadata=(), required_layers=()):
+        self.monitor_dir = monitor_dir
+        self.plan = plan
+        self.settings = dict(DEFAULT_WORKLOAD)
+        self.settings.update(settings or {})
+        self.required_metadata = list(required_metadata)
+        self.required_layers = list(required_layers)
+        self.finished_at = {}        # Dateiname -> time.time() nach dem letzten Byte
+        self._threads = []
+        self._thread = None
+
+    def file_bytes(self, entry: dict) -> bytes:
+        rng = random.Random(entry["name"])
+        xmp = None
+        if entry["xmp"]:
+            xmp = build_xmp_packet({key: f"Bench {key}" for key in self.required_metadata})
+        width = self.settings["width"]
+        height = max(1, entry["size"] // (width * 3))
+        ppi = self.settings["ppi"]
+        if entry["format"] == "jpeg":
+            return jpeg_bytes(width, height, xmp, entry["size"], ppi, rng)
+        if entry["format"] == "tiff":
+            return tiff_bytes(width, height, xmp, ppi, rng)
+        layers = list(self.required_layers) if entry["layers"] else []
+        layers += [f"Ebene {n + 1}" for n in range(self.settings["extra_layers"])]
+        return psd_bytes(width, height, layers, xmp, ppi, rng)
+
+    def _write(self, entry: dict, data: bytes):
+        path = os.path.join(self.monitor_dir, entry["name"])
+        chunk = self.settings["chunk_kb"] * 1024
+        chunks = max(1, (len(data) + chunk - 1) // chunk)
+        pause = self.settings["slow_copy_seconds"] / chunks if entry["slow"] else 0.0
+        with open(path, "wb") as f:
+            for pos in range(0, len(data), chunk):
+                f.write(data[pos:pos + chunk])
+                if pause:
+                    f.flush()
+                    time.sleep(pause)
+        self.finished_at[entry["name"]] = time.time()
+
+    def _run(self):
+        start = time.monotonic()
+        for entry in self.plan:
+            data = self.file_bytes(entry)
+            delay = start + entry["at"] - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            if entry["slow"]:
+                # Langsame Kopien laufen parallel weiter, wie bei mehreren Kopiervorgängen im Finder
+                thread = threading.Thread(target=self._write, args=(entry, data), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            else:
+                self._write(entry, data)
+        for thread in self._threads:
+            thread.join()
+
+    def start(self):
+        os.makedirs(self.monitor_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="workload-generator", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float = None):
+        if self._thread:
+            self._thread.join(timeout)
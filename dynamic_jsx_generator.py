@@ -3,17 +3,94 @@
 
 import os
 import json
+import hashlib
 import tempfile
+import threading
+
+from profiling import profiled
+from record_cache import records_enabled
 
 DEBUG_OUTPUT = True
 def debug_print(msg):
     if DEBUG_OUTPUT:
         print("[DEBUG]", msg)
 
+NS_DC = "http://purl.org/dc/elements/1.1/"
+NS_PHOTOSHOP = "http://ns.adobe.com/photoshop/1.0/"
+NS_XMP_RIGHTS = "http://ns.adobe.com/xap/1.0/rights/"
+
+# Feld-Mapping wie im JSX-Template: key -> (Namespace, Property, altText, isArray)
+FIELD_MAPPING = {
+    "documentTitle":     (NS_DC, "title", True, False),
+    "author":            (NS_DC, "creator", False, True),
+    "authorPosition":    (NS_PHOTOSHOP, "AuthorsPosition", False, False),
+    "description":       (NS_DC, "description", True, False),
+    "descriptionWriter": (NS_PHOTOSHOP, "CaptionWriter", False, False),
+    "keywords":          (NS_DC, "subject", False, True),
+    "copyrightNotice":   (NS_DC, "rights", True, False),
+    "copyrightURL":      (NS_XMP_RIGHTS, "WebStatement", False, False),
+    "city":              (NS_PHOTOSHOP, "City", False, False),
+    "stateProvince":     (NS_PHOTOSHOP, "State", False, False),
+    "country":           (NS_PHOTOSHOP, "Country", False, False),
+    "creditLine":        (NS_PHOTOSHOP, "Credit", False, False),
+    "source":            (NS_PHOTOSHOP, "Source", False, False),
+    "headline":          (NS_PHOTOSHOP, "Headline", False, False),
+    "instructions":      (NS_PHOTOSHOP, "Instructions", False, False),
+    "transmissionRef":   (NS_PHOTOSHOP, "TransmissionReference", False, False)
+}
+
+# JSON-String-Literal wie json.dumps: Anführungszeichen, Backslash und alle Steuerzeichen escaped
+# (ExtendScript kennt kein JSON-Objekt, die Werte entstehen erst zur Laufzeit in Photoshop)
+_JSX_QUOTE = r'''    function q(s) {
+        return '"' + String(s).replace(/["\\\x00-\x1f]/g, function (c) {
+            var e = {'"': '\\"', '\\': '\\\\', '\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}[c];
+            return e ? e : '\\u' + ('000' + c.charCodeAt(0).toString(16)).slice(-4);
+        }) + '"';
+    }
+'''
+
+# Hilfsfunktionen des generierten Skripts – es werden nur die tatsächlich benötigten eingefügt
+_JSX_HELPERS = {
+    "simple": (
+        "    function simple(ns, prop) {\n"
+        "        try { var v = xmp.getProperty(ns, prop); return v ? String(v) : \"\"; } catch (e) { return \"\"; }\n"
+        "    }\n"
+    ),
+    "alt": (
+        "    function alt(ns, prop) {\n"
+        "        try { var v = xmp.getLocalizedText(ns, prop, \"\", \"x-default\"); if (v && v.value) { return String(v.value); } } catch (e) {}\n"
+        "        return simple(ns, prop);\n"
+        "    }\n"
+    ),
+    "item": (
+        "    function item(ns, prop) {\n"
+        "        try { var v = xmp.getArrayItem(ns, prop, 1); return (v && v.value) ? String(v.value) : \"\"; } catch (e) { return \"\"; }\n"
+        "    }\n"
+    )
+}
+
+
+def _write_temp_jsx(prefix: str, jsx_code: str) -> str:
+    """
+    Schreibt jsx_code nach <tempdir>/<prefix>_<hash>.jsx und gibt den Pfad zurück.
+    Der Dateiname enthält einen Hash des Skripts: Gleiche Skripte teilen sich eine Datei,
+    verschiedene (andere Hotfolder, Dokumente, Prozesse) überschreiben sich nie gegenseitig.
+    """
+    digest = hashlib.sha1(jsx_code.encode("utf-8")).hexdigest()[:12]
+    tmp_path = os.path.join(tempfile.gettempdir(), f"{prefix}_{digest}.jsx")
+    if not os.path.exists(tmp_path):
+        tmp_file = tmp_path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(jsx_code)
+        os.replace(tmp_file, tmp_path)
+    return tmp_path
+
+
 def generate_hybrid_jsx(hf_config: dict, template_path: str) -> str:
     """
     Liest das JSX-Template, ersetzt die Platzhalter mit den in hf_config definierten
     required_layers, required_metadata und logfiles_dir und gibt den Pfad zur temporären Datei zurück.
+    Interaktive Debug-Variante: zeigt die Werte per alert() an (blockiert Photoshop bis zur Bestätigung).
     """
     required_layers = hf_config.get("required_layers", [])
     required_metadata = hf_config.get("required_metadata", [])
@@ -39,14 +116,136 @@ def generate_hybrid_jsx(hf_config: dict, template_path: str) -> str:
     debug_print("Generierter JSX-Code:")
     debug_print(jsx_code)
 
-    tmp_dir = tempfile.gettempdir()
-    tmp_path = os.path.join(tmp_dir, "dynamic_contentcheck.jsx")
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        f.write(jsx_code)
+    tmp_path = _write_temp_jsx("prism_interactive", jsx_code)
     debug_print(f"Hybrid-JSX-Skript erzeugt: {tmp_path}")
     return tmp_path
 
+
+def contentcheck_fields(hf_config: dict) -> list:
+    """
+    Metadatenfelder, die der Contentcheck liest: nur required_metadata, bei aktiviertem
+    Record-Cache (record_cache.py) zusätzlich alle Felder aus FIELD_MAPPING.
+    """
+    required_metadata = hf_config.get("required_metadata", [])
+    if not records_enabled(hf_config):
+        return list(required_metadata)
+    return list(dict.fromkeys(list(required_metadata) + list(FIELD_MAPPING)))
+
+
+def build_contentcheck_jsx(hf_config: dict) -> str:
+    """
+    Erzeugt ein auf die Hotfolder-Konfiguration spezialisiertes, nicht-interaktives Contentcheck-JSX:
+    liest nur die Felder aus contentcheck_fields, prüft nur required_layers und schreibt
+    das Ergebnis als kompaktes JSON ins Logfile – ohne alert() oder sonstige UI.
+    Bei aktiviertem Record-Cache werden zusätzlich alle Ebenennamen gemeldet ("layer_names").
+    """
+    required_metadata = contentcheck_fields(hf_config)
+    required_layers = hf_config.get("required_layers", [])
+    full_record = records_enabled(hf_config)
+    logfiles_dir = hf_config.get("logfiles_dir", "").replace("\\", "/")
+
+    helpers = set()
+    reads = []
+    for key in required_metadata:
+        mapping = FIELD_MAPPING.get(key)
+        if not mapping:
+            # Unbekanntes Feld: wie im Template als "undefined" melden
+            reads.append(f"{json.dumps(json.dumps(key) + ':')} + q(\"undefined\")")
+            continue
+        ns, prop, alt_text, is_array = mapping
+        func = "item" if is_array else ("alt" if alt_text else "simple")
+        helpers.add(func)
+        if func == "alt":
+            helpers.add("simple")
+        reads.append(f"{json.dumps(json.dumps(key) + ':')} + q(strip({func}({json.dumps(ns)}, {json.dumps(prop)})))")
+
+    lines = [
+        "// PRisM-RAC Contentcheck – generiert aus der Hotfolder-Konfiguration, nicht bearbeiten",
+        "#target photoshop",
+    ]
+    if reads:
+        lines.append("if (ExternalObject.AdobeXMPScript == undefined) {"
+                     " ExternalObject.AdobeXMPScript = new ExternalObject(\"lib:AdobeXMPScript\"); }")
+    lines.append("(function () {")
+    lines.append("    if (app.documents.length === 0) { throw new Error(\"Kein Dokument geöffnet\"); }")
+    lines.append("    var doc = app.activeDocument;")
+    lines.append(_JSX_QUOTE.rstrip("\n"))
+    if reads:
+        lines.append("    var xmp = new XMPMeta(doc.xmpMetadata.rawData);")
+        lines.append("    function strip(s) {")
+        lines.append("        if (s.length >= 2 && s.charAt(0) === '\"' && s.charAt(s.length - 1) === '\"') { s = s.substring(1, s.length - 1); }")
+        lines.append("        return s ? s : \"undefined\";")
+        lines.append("    }")
+        for name in ("simple", "alt", "item"):
+            if name in helpers:
+                lines.append(_JSX_HELPERS[name].rstrip("\n"))
+    lines.append("    var out = '{\"metadata\":{' + " + (" + ',' + ".join(reads) if reads else "''") + " + '}';")
+
+    if required_layers or full_record:
+        wanted = ", ".join(f"{json.dumps(name)}: false" for name in required_layers)
+        lines.append(f"    var wanted = {{{wanted}}};")
+        lines.append(f"    var remaining = {len(set(required_layers))};")
+        # Ohne Record-Cache endet die Suche, sobald alle geforderten Ebenen gefunden sind
+        condition = "" if full_record else " && remaining > 0"
+        if full_record:
+            lines.append("    var names = [];")
+        lines.append("    function walk(layers) {")
+        lines.append(f"        for (var i = 0; i < layers.length{condition}; i++) {{")
+        lines.append("            var layer = layers[i];")
+        if full_record:
+            lines.append("            names.push(q(layer.name));")
+        lines.append("            if (wanted.hasOwnProperty(layer.name) && !wanted[layer.name]) { wanted[layer.name] = true; remaining--; }")
+        lines.append("            if (layer.typename === \"LayerSet\") { walk(layer.layers); }")
+        lines.append("        }")
+        lines.append("    }")
+        lines.append("    walk(doc.layers);")
+        if full_record:
+            lines.append("    out += ',\"layer_names\":[' + names.join(',') + ']';")
+    if required_layers:
+        lines.append("    var parts = [];")
+        lines.append("    for (var name in wanted) { if (wanted.hasOwnProperty(name)) { parts.push(q(name) + ':' + wanted[name]); } }")
+        lines.append("    out += ',\"layers\":{' + parts.join(',') + '}';")
+
+    lines.append("    out += '}';")
+    lines.append(f"    var logFile = new File({json.dumps(logfiles_dir)} + \"/\" + doc.name.replace(/\\.[^\\.]+$/, \"\") + \"_log_contentcheck.json\");")
+    lines.append("    logFile.encoding = \"UTF8\";")
+    lines.append("    logFile.open(\"w\");")
+    lines.append("    logFile.write(out);")
+    lines.append("    logFile.close();")
+    lines.append("})();")
+    return "\n".join(lines) + "\n"
+
+
+def generate_contentcheck_jsx(hf_config: dict) -> str:
+    """
+    Schreibt das spezialisierte Contentcheck-JSX in eine temporäre Datei und gibt deren Pfad zurück.
+    Solange sich die Konfiguration nicht ändert, wird die vorhandene Datei wiederverwendet.
+    """
+    jsx_code = build_contentcheck_jsx(hf_config)
+    tmp_path = _write_temp_jsx("prism_contentcheck", jsx_code)
+    debug_print(f"Contentcheck-JSX: {tmp_path}")
+    return tmp_path
+
+
+@profiled("generate_jsx_script")
 def generate_jsx_script(hf_config: dict, target_filename: str) -> str:
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    template_path = os.path.join(base_dir, "jsx_templates", "contentcheck_template.jsx")
-    return generate_hybrid_jsx(hf_config, template_path)
\ No newline at end of file
+    if hf_config.get("jsx_mode", "headless") == "interactive":
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        template_path = os.path.join(base_dir, "jsx_templates", "contentcheck_template.jsx")
+        return generate_hybrid_jsx(hf_config, template_path)
+    return generate_contentcheck_jsx(hf_config)
+
+def generate_additional_jsx(additional_jsx_path: str, document_name: str) -> str:
+    """
+    Erzeugt ein Wrapper-JSX, das zuerst das Dokument document_name aktiviert und dann
+    das zusätzliche JSX ausführt. Nötig, weil Photoshop bei der Pipeline-Verarbeitung
+    inzwischen schon die nächste Datei geöffnet haben kann.
+    """
+    jsx_path = additional_jsx_path.replace("\\", "/")
+    jsx_code = (
+        "try { app.activeDocument = app.documents.getByName(" + json.dumps(document_name) + "); } catch (e) {}\n"
+        "$.evalFile(new File(" + json.dumps(jsx_path) + "));\n"
+    )
+    tmp_path = _write_temp_jsx("prism_additional", jsx_code)
+    debug_print(f"Wrapper für zusätzliches JSX erzeugt: {tmp_path}")
+    return tmp_path
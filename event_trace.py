@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Event-Trace – zeichnet die Dateisystem-Ereignisse eines Hotfolders samt Dateigrößen und
+Ergebnissen auf, um reale Kopiermuster später nachzustellen (siehe benchmark/replay_trace.py).
+Der Watch-Service übergibt die rohen Ereignisse vor seinem Filter (WatchService.register(...,
+recorder=...)), Teil-Uploads und Umbenennungen bleiben also erhalten.
+
+Format: JSON Lines, bei Endung .gz gzip-komprimiert. Erste Zeile ist der Kopf, danach ein
+Ereignis pro Zeile mit kurzen Schlüsseln:
+    {"t": Sekunden seit Start, "e": created|modified|moved|deleted|outcome,
+     "p": Pfad relativ zum monitor_dir, "s": Größe in Bytes, "d": Ziel (moved),
+     "o": Ergebnis, "r": Fault-Grund (outcome)}
+"""
+
+__all__ = ["DEFAULT_TRACE", "TraceRecorder", "read_trace", "default_trace_path"]
+
+import os
+import gzip
+import json
+import time
+import threading
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+TRACE_VERSION = 1
+
+# Standardwerte (pro Hotfolder unter "trace" überschreibbar)
+DEFAULT_TRACE = {
+    "enabled": False,
+    "path": "",                   # leer = <logfiles_dir>/trace_<name>_<zeitstempel>.jsonl.gz
+    "flush_interval": 2.0         # Sekunden zwischen zwei Schreibvorgängen
+}
+
+
+def default_trace_path(hf_config: dict) -> str:
+    name = "".join(c if c.isalnum() or c in "-_" else "_" for c in hf_config.get("name", "hotfolder"))
+    directory = hf_config.get("logfiles_dir") or hf_config.get("monitor_dir", "")
+    return os.path.join(directory, f"trace_{name}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl.gz")
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TraceRecorder:
+    """
+    Sammelt Ereignisse im Speicher und schreibt sie gebündelt (alle flush_interval Sekunden),
+    damit der Observer-Thread des Watch-Service nicht auf das Dateisystem wartet.
+    """
+
+    def __init__(self, path: str, monitor_dir: str, flush_interval: float = 2.0, meta: dict = None):
+        self.path = path
+        self._abs_path = os.path.abspath(path)
+        self.monitor_dir = os.path.abspath(monitor_dir)
+        self.flush_interval = flush_interval
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._stop = threading.Event()
+        self._thread = None
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._file = _open(path, "w")
+        header = {"version": TRACE_VERSION, "monitor_dir": self.monitor_dir, "started": time.time()}
+        header.update(meta or {})
+        self._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def from_config(cls, hf_config: dict):
+        """Recorder gemäß hf_config["trace"] oder None, falls nicht aktiviert."""
+        cfg = dict(DEFAULT_TRACE)
+        cfg.update(hf_config.get("trace", {}))
+        if not cfg.get("enabled"):
+            return None
+        path = cfg.get("path") or default_trace_path(hf_config)
+        recorder = cls(path, hf_config.get("monitor_dir", ""), cfg["flush_interval"],
+                       meta={"hotfolder": hf_config.get("name", "")})
+        debug_print(f"Zeichne Hotfolder-Ereignisse auf: {path}")
+        return recorder
+
+    def _relative(self, path: str) -> str:
+        rel = os.path.relpath(os.path.abspath(path), self.monitor_dir)
+        return rel.replace(os.sep, "/")
+
+    def _append(self, event: dict):
+        event["t"] = round(time.monotonic() - self._start, 4)
+        with self._lock:
+            self._buffer.append(event)
+
+    def record(self, kind: str, path: str, dest_path: str = None):
+        if os.path.abspath(path) == self._abs_path:
+            return                # eigene Schreibvorgänge (Trace im monitor_dir)
+        event = {"e": kind, "p": self._relative(path)}
+        size_path = dest_path or path
+        if kind != "deleted":
+            try:
+                event["s"] = os.path.getsize(size_path)
+            except OSError:
+                pass
+        if dest_path:
+            event["d"] = self._relative(dest_path)
+        self._append(event)
+
+    def outcome(self, path: str, outcome: str, reason: str = None):
+        event = {"e": "outcome", "p": self._relative(path), "o": outcome}
+        if reason:
+            event["r"] = reason
+        self._append(event)
+
+    def flush(self):
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if events:
+            self._file.write("".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n"
+                                     for e in events))
+            self._file.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="trace-recorder", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+        self._file.close()
+
+
+def read_trace(path: str):
+    """Liest einen Trace. Rückgabe: (kopf, [ereignisse])."""
+    with _open(path, "r") as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"Leerer Trace: {path}")
+    header = json.loads(lines[0])
+    if header.get("version") != TRACE_VERSION:
+        raise ValueError(f"Unbekannte Trace-Version: {header.get('version')}")
+    return header, [json.loads(line) for line in lines[1:]]
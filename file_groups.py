@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dateigruppen – fasst zusammengehörige Dateien (gleicher Name, verschiedene Endungen) zu einem Job
+zusammen, z.B. Kamera-RAW mit XMP-Sidecar oder PSD mit JPEG-Proof.
+
+- Nur die Primärdatei wird im Backend geöffnet (ein Contentcheck pro Gruppe); die Partner werden
+  mit ihr zusammen nach Success bzw. Fault verschoben.
+- Ist "metadata_from" gesetzt (z.B. ".xmp"), werden die Metadaten direkt aus dieser Partnerdatei
+  gelesen und haben Vorrang vor denen im Dokument (siehe HotfolderMonitor._apply_sidecar).
+- Eine Gruppe wird verarbeitet, sobald Primärdatei und ein Partner da sind, spätestens aber
+  nach partner_timeout Sekunden. Fehlt der Partner dann, läuft die Primärdatei allein weiter
+  (bzw. in Fault mit "partner_missing", wenn die Regel "required" ist).
+- Partner ohne Primärdatei laufen nach dem Timeout als Einzeldatei weiter; Sidecars
+  ("metadata_from" irgendeiner Regel) gehen ohne Backend-Aufruf in Fault ("orphan_sidecar").
+- Partner, die die Regel der Primärdatei nicht vorsieht (z.B. .xmp neben einer .psd), werden
+  sofort auf dieselbe Weise freigegeben, statt bis zum Timeout zu warten.
+
+Achtung: Dateien mit einer Partner-Endung warten bis zu partner_timeout auf ihre Primärdatei,
+auch wenn sie eigentlich allein kommen (z.B. einzelne JPEGs bei der PSD+JPEG-Regel).
+
+Sidecars dürfen "bild.xmp" oder "bild.cr2.xmp" heißen.
+"""
+
+__all__ = ["DEFAULT_GROUPING", "FileGroup", "FileGrouper"]
+
+import os
+import time
+import threading
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+# Standardwerte (pro Hotfolder unter "grouping" überschreibbar)
+DEFAULT_GROUPING = {
+    "enabled": False,
+    "partner_timeout": 30,        # Sekunden, die auf den Partner gewartet wird
+    "rules": [
+        {"primary": [".cr2", ".cr3", ".nef", ".arw", ".dng", ".raf", ".orf", ".rw2"],
+         "partners": [".xmp"], "metadata_from": ".xmp", "required": False},
+        {"primary": [".psd", ".psb"],
+         "partners": [".jpg", ".jpeg"], "metadata_from": "", "required": False}
+    ]
+}
+
+
+def _normalize_rule(rule: dict) -> dict:
+    return {
+        "primary": [ext.lower() for ext in rule.get("primary", [])],
+        "partners": [ext.lower() for ext in rule.get("partners", [])],
+        "metadata_from": rule.get("metadata_from", "").lower(),
+        "required": bool(rule.get("required", False))
+    }
+
+
+class FileGroup:
+    """Dateien mit gleichem Verzeichnis und Namen (ohne Endung)."""
+
+    def __init__(self, key: tuple, deadline: float):
+        self.key = key
+        self.deadline = deadline
+        self.primary = None           # Pfad der Primärdatei
+        self.rule = None              # Regel der Primärdatei
+        self.partners = {}            # Endung -> Pfad
+
+    @property
+    def complete(self) -> bool:
+        return self.primary is not None and any(ext in self.partners for ext in self.rule["partners"])
+
+    def __repr__(self):
+        return f"FileGroup({self.primary!r}, partners={list(self.partners.values())!r})"
+
+
+class FileGrouper:
+    """
+    Sammelt eingehende Dateien zu Gruppen und übergibt fertige Gruppen an on_ready(group)
+    – sofort beim Eintreffen des letzten Partners oder aus dem Timer-Thread beim Timeout.
+    """
+
+    def __init__(self, settings: dict, on_ready, thread_name: str = "file-grouping"):
+        cfg = dict(DEFAULT_GROUPING)
+        cfg.update(settings or {})
+        self.partner_timeout = float(cfg["partner_timeout"])
+        self.rules = [_normalize_rule(rule) for rule in cfg["rules"]]
+        self.on_ready = on_ready
+        self.thread_name = thread_name
+        self._primary_rules = {}
+        for rule in self.rules:
+            for ext in rule["primary"]:
+                self._primary_rules.setdefault(ext, rule)
+        self._partner_exts = {ext for rule in self.rules for ext in rule["partners"]}
+        self.sidecar_exts = {rule["metadata_from"] for rule in self.rules if rule["metadata_from"]}
+        self._pending = {}            # Schlüssel -> FileGroup (in Reihenfolge der Deadlines)
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    @classmethod
+    def for_config(cls, hf_config: dict, on_ready, thread_name: str = "file-grouping"):
+        """Grouper gemäß hf_config["grouping"] oder None, falls nicht aktiviert."""
+        settings = hf_config.get("grouping", {})
+        if not settings.get("enabled", DEFAULT_GROUPING["enabled"]):
+            return None
+        return cls(settings, on_ready, thread_name)
+
+    def _key(self, file_path: str):
+        directory, name = os.path.split(file_path)
+        stem, ext = os.path.splitext(name)
+        ext = ext.lower()
+        if ext in self._partner_exts:
+            # "bild.cr2.xmp" gehört zu "bild.cr2"
+            inner_stem, inner_ext = os.path.splitext(stem)
+            if inner_ext.lower() in self._primary_rules:
+                stem = inner_stem
+        return (directory, stem.lower()), ext
+
+    # --- Lebenszyklus ----------------------------------------------------------------
+
+    def start(self):
+        with self._cond:
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    @property
+    def thread_ident(self):
+        thread = self._thread
+        return thread.ident if thread is not None else None
+
+    def stop(self) -> list:
+        """Beendet den Timer-Thread; liefert die Pfade der noch wartenden Dateien."""
+        with self._cond:
+            self._running = False
+            pending, self._pending = list(self._pending.values()), {}
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        paths = []
+        for group in pending:
+            if group.primary:
+                paths.append(group.primary)
+            paths.extend(group.partners.values())
+        return paths
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    # --- Gruppierung ----------------------------------------------------------------------
+
+    def add(self, file_path: str) -> bool:
+        """Nimmt eine Datei auf. False = gehört zu keiner Regel, als Einzeldatei verarbeiten."""
+        key, ext = self._key(file_path)
+        is_primary = ext in self._primary_rules
+        if not is_primary and ext not in self._partner_exts:
+            return False
+        released = FileGroup(key, 0.0)    # Partner, die nicht zur Regel der Primärdatei passen
+        with self._cond:
+            group = self._pending.get(key)
+            if group is None:
+                group = FileGroup(key, time.monotonic() + self.partner_timeout)
+                self._pending[key] = group
+                self._cond.notify()
+            if is_primary:
+                if group.primary is not None:
+                    return False      # zweite Primärdatei gleichen Namens (z.B. .cr2 und .dng)
+                group.primary = file_path
+                group.rule = self._primary_rules[ext]
+                for partner_ext in list(group.partners):
+                    if partner_ext not in group.rule["partners"]:
+                        released.partners[partner_ext] = group.partners.pop(partner_ext)
+            elif group.primary is not None and ext not in group.rule["partners"]:
+                released.partners[ext] = file_path
+            else:
+                if ext in group.partners:
+                    return False
+                group.partners[ext] = file_path
+            ready = group.complete
+            if ready:
+                del self._pending[key]
+        if released.partners:
+            self.on_ready(released)
+        if ready:
+            self.on_ready(group)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                expired = [key for key, group in self._pending.items() if group.deadline <= now]
+                expired = [self._pending.pop(key) for key in expired]
+                if not expired:
+                    next_deadline = min((group.deadline for group in self._pending.values()), default=None)
+                    self._cond.wait(None if next_deadline is None else next_deadline - now)
+                    continue
+            for group in expired:
+                debug_print(f"Partner-Timeout: {group}")
+                try:
+                    self.on_ready(group)
+                except Exception as e:
+                    debug_print(f"Fehler beim Übergeben der Gruppe {group}: {e}")
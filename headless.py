@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Headless-Betrieb – startet alle Hotfolder aus der Konfiguration ohne GUI
+(z.B. als Dienst auf einem Render-Rechner). Beenden mit SIGINT/SIGTERM.
+
+Steuerung zur Laufzeit:
+- GET  /profile                              Profil-Status aller Hotfolder
+- POST /profile?hotfolder=<name>&seconds=60  Profil starten (ohne hotfolder: alle laufenden)
+- SIGUSR1                                    Profil aller laufenden Hotfolder starten
+(/profile über den Metrics-Endpunkt, siehe metrics.py)
+"""
+
+__all__ = ["run_headless"]
+
+import signal
+import threading
+
+from config.config_manager import load_config
+from async_monitor import create_monitor
+from metrics import start_metrics, stop_metrics, register_control, unregister_control
+from job_server import stop_job_servers
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+
+def _start_profiling(monitors, hotfolder: str = None, seconds: float = None) -> dict:
+    selected = [m for m in monitors if hotfolder in (None, m.name)]
+    if hotfolder is not None and not selected:
+        raise ValueError(f"Unbekannter Hotfolder: {hotfolder}")
+    started = {}
+    for monitor in selected:
+        try:
+            started[monitor.name] = monitor.start_profiling(seconds).output_dir
+        except RuntimeError as e:
+            if hotfolder is not None:
+                raise ValueError(str(e))
+            debug_print(str(e))
+    return {"started": started}
+
+
+def _profile_control(monitors):
+    def control(method: str, params: dict) -> dict:
+        if method == "GET":
+            return {monitor.name: monitor.profiling_status() for monitor in monitors}
+        seconds = float(params["seconds"]) if "seconds" in params else None
+        return _start_profiling(monitors, params.get("hotfolder"), seconds)
+    return control
+
+
+def run_headless(config_data: dict = None, metrics_settings: dict = None):
+    config_data = config_data if config_data is not None else load_config()
+    settings = dict(config_data.get("metrics", {}))
+    settings.update(metrics_settings or {})
+    start_metrics(settings)
+
+    stop_event = threading.Event()
+
+    def on_signal(signum, _frame):
+        debug_print(f"Signal {signum} empfangen – beende Hotfolder.")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    monitors = []
+    for hf in config_data.get("hotfolders", []):
+        name = hf.get("name", "?")
+        try:
+            monitor = create_monitor(
+                hf_config=hf,
+                on_status_update=lambda text, active, name=name: debug_print(f"[{name}] {text}"),
+                on_file_processing=lambda file_name, name=name: file_name and debug_print(f"[{name}] verarbeite {file_name}")
+            )
+        except ValueError as e:
+            debug_print(f"[{name}] wird nicht gestartet: {e}")
+            continue
+        monitor.start()
+        monitors.append(monitor)
+    if not monitors:
+        debug_print("Keine Hotfolder konfiguriert.")
+
+    register_control("/profile", _profile_control(monitors))
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda _signum, _frame: threading.Thread(
+            target=_start_profiling, args=(monitors,), daemon=True).start())
+
+    try:
+        while not stop_event.wait(1):
+            pass
+    finally:
+        unregister_control("/profile")
+        for monitor in monitors:
+            monitor.stop()
+        stop_job_servers()
+        stop_metrics()
@@ -3,56 +3,81 @@
 
 """
 Hotfolder Monitor – Überwacht einen definierten Ordner und führt bei Dateiänderungen folgende Schritte aus:
-1. Überprüft, ob die Datei vollständig (stabile Dateigröße) kopiert wurde.
-2. Öffnet die Datei in Adobe Photoshop.
+1. Überprüft, ob die Datei vollständig (stabile Dateigröße) kopiert wurde.          [ready]
+   Optional: Preflight der Header (Abmessungen, Farbmodus, Bittiefe, ICC-Profil).   [preflight]
+2. Öffnet die Datei in Adobe Photoshop (bzw. im konfigurierten Backend).          [backend]
 3. Führt das dynamisch generierte Contentcheck-JSX aus (und ggf. ein zusätzliches JSX).
-4. Wertet das Ergebnis (Logfile) aus.
-5. Verschiebt die Datei in Success oder Fault und erstellt ggf. ein Fail-Log.
+   Danach wird das Dokument ohne Speichern geschlossen (siehe backend/backend_session.py).
+4. Wertet das Ergebnis (Logfile) aus.                                               [evaluate]
+5. Verschiebt die Datei in Success oder Fault und erstellt ggf. ein Fail-Log.       [move]
+
+Die Schritte laufen als Pipeline mit begrenzten Warteschlangen (siehe job_pipeline.py):
+Während Photoshop eine Datei bearbeitet, werden nachfolgende Dateien bereits geprüft
+und fertige Dateien ausgewertet und verschoben.
+
+Mit "distributed": {"enabled": true, "token": ...} übernimmt der Job-Server (job_server.py) die Backend-Stufe:
+Contentcheck und zusätzliches JSX laufen auf Worker-Agenten (worker_agent.py), das Log wird
+lokal abgelegt und wie gewohnt ausgewertet.
+
+start_profiling() zeichnet zur Laufzeit ein Profil der Pipeline-Threads auf (siehe profiling.py;
+nur mit der Threads-Engine).
+
+Mit "records": {"enabled": true} wird der vollständige Contentcheck jeder verschobenen Datei im
+Record-Cache abgelegt (record_cache.py); reevaluate_faults() bewertet damit die Dateien in
+fault_dir nach einer Konfigurationsänderung neu.
+
+Mit "grouping": {"enabled": true} werden zusammengehörige Dateien (RAW + XMP-Sidecar, PSD + JPEG)
+als ein Job verarbeitet und gemeinsam verschoben (siehe file_groups.py).
 """
 
-__all__ = ["HotfolderMonitor", "debug_print"]
+__all__ = ["HotfolderMonitor", "reevaluate_faults", "debug_print"]
 
 import os
 import time
 import shutil
 import json
-import subprocess
 import threading
 
-from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-from dynamic_jsx_generator import generate_jsx_script, debug_print
+from dynamic_jsx_generator import debug_print, contentcheck_fields
+from preflight import run_preflight
+from backend.photoshop_backend import BackendUnavailable
+from backend.backend_session import get_backend_session
+from event_trace import TraceRecorder
+from job_server import DEFAULT_DISTRIBUTED, get_job_server, release_job_server
+from profiling import ProfilingSession, profiled
+from record_cache import RecordCache, evaluate_contentcheck
+from file_groups import FileGrouper
+from xmp_reader import find_xmp_packet, read_xmp_fields
+from watch_service import PathFilter, get_watch_service
+from job_pipeline import HotfolderJob, PipelineStage, JobPipeline
+from metrics import (REGISTRY, STEP_DURATION, STAGE_DURATION, JOB_DURATION, FILES_TOTAL, FAULTS_TOTAL,
+                     RETRIES_TOTAL, QUEUE_DEPTH)
 
 DEBUG_OUTPUT = True
 def debug_print(message):
     if DEBUG_OUTPUT:
         print("[DEBUG]", message)
 
-def open_in_photoshop(file_path: str) -> bool:
-    cmd_open = ["open", "-b", "com.adobe.Photoshop", file_path]
-    debug_print("Opening file in Photoshop: " + str(cmd_open))
-    try:
-        subprocess.run(cmd_open, check=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        debug_print("Error opening file in Photoshop: " + str(e))
-        return False
-
-def run_jsx_in_photoshop(jsx_script_path: str) -> bool:
-    try:
-        cmd_jsx = f'tell application id "com.adobe.Photoshop" to do javascript file "{jsx_script_path}"'
-        result = subprocess.run(["osascript", "-e", cmd_jsx], capture_output=True, text=True)
-        debug_print(f"JSX execution result: RC={result.returncode}")
-        if result.stdout:
-            debug_print(f"JSX stdout: {result.stdout}")
-        if result.stderr:
-            debug_print(f"JSX stderr: {result.stderr}")
-        return (result.returncode == 0)
-    except Exception as e:
-        debug_print(f"Error executing JSX: {e}")
-        return False
-
+STAGE_NAMES = ("ready", "preflight", "backend", "evaluate", "move")
+
+# Standardwerte der Pipeline (pro Hotfolder unter "pipeline" überschreibbar)
+DEFAULT_PIPELINE = {
+    "engine": "threads",         # "threads" (JobPipeline) oder "asyncio" (siehe async_monitor.py)
+    "fs_workers": 8,             # asyncio: Threads für blockierende Dateisystemzugriffe (pro Prozess)
+    "queue_size": 32,
+    "ready_workers": 4,
+    "preflight_workers": 2,
+    "evaluate_workers": 2,
+    "move_workers": 2,
+    "log_timeout": 30,
+    "log_poll_interval": 0.1,
+    "stable_interval": 1.0,      # Sekunden zwischen zwei Größenprüfungen
+    "stable_checks": 3           # so oft muss die Größe unverändert sein
+}
+
+@profiled("is_file_stable")
 def is_file_stable(file_path: str, interval=1.0, retries=3) -> bool:
     if not os.path.exists(file_path):
         return False
@@ -71,23 +96,54 @@ def is_file_stable(file_path: str, interval=1.0, retries=3) -> bool:
         debug_print(f"Checking file stability for {file_path}: size={current_size}, stable_count={stable_count}")
     return True
 
+@profiled("move_file")
 def move_file(src_path, dest_dir):
+    """Verschiebt die Datei nach dest_dir; Rückgabe: Zielpfad oder None bei Fehler."""
     try:
         if not os.path.exists(src_path):
             debug_print(f"Datei {src_path} existiert nicht mehr. Überspringe Verschiebung.")
-            return
+            return None
         if not os.path.exists(dest_dir):
             os.makedirs(dest_dir)
         dest_path = os.path.join(dest_dir, os.path.basename(src_path))
         shutil.move(src_path, dest_path)
         debug_print(f"Datei verschoben nach: {dest_path}")
+        return dest_path
     except Exception as e:
         debug_print(f"Fehler beim Verschieben der Datei: {e}")
+        return None
+
+def relative_name(monitor_dir: str, file_path: str) -> str:
+    """Pfad relativ zum monitor_dir mit "/" (Schlüssel im Record-Cache); außerhalb nur der Dateiname."""
+    rel = os.path.relpath(os.path.abspath(file_path), os.path.abspath(monitor_dir))
+    if rel.startswith(os.pardir):
+        return os.path.basename(file_path)
+    return rel.replace(os.sep, "/")
+
+def sub_dir(base_dir: str, rel_name: str) -> str:
+    """Unterordner von rel_name unterhalb von base_dir (success/fault/logfiles spiegeln monitor_dir)."""
+    return os.path.join(base_dir, *rel_name.split("/")[:-1])
+
+def fail_log_path(logfiles_dir: str, file_name: str) -> str:
+    base_name = file_name.rsplit("/", 1)[-1]
+    return os.path.join(sub_dir(logfiles_dir, file_name), base_name.rsplit(".", 1)[0] + "_01_log_fail.json")
+
+def write_fail_log(logfiles_dir: str, file_name: str, data: dict):
+    fail_log_file = fail_log_path(logfiles_dir, file_name)
+    try:
+        directory = os.path.dirname(fail_log_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(fail_log_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+    except Exception as e:
+        debug_print(f"Fehler beim Schreiben des Fail-Logs: {e}")
 
 def is_hidden(file_path: str) -> bool:
     return os.path.basename(file_path).startswith('.')
 
 class HotfolderEventHandler(FileSystemEventHandler):
+    # Aufzeichnung (Trace) erfolgt im Watch-Service vor dem Filter, nicht hier
     def __init__(self, monitor_instance):
         super().__init__()
         self.monitor = monitor_instance
@@ -96,154 +152,567 @@ class HotfolderEventHandler(FileSystemEventHandler):
         if event.is_directory or is_hidden(event.src_path):
             return
         debug_print(f"File created: {event.src_path}")
-        threading.Thread(target=self.monitor.process_file, args=(event.src_path,)).start()
+        self.monitor.enqueue_file(event.src_path)
 
     def on_modified(self, event):
         if event.is_directory or is_hidden(event.src_path):
             return
         debug_print(f"File modified: {event.src_path}")
-        threading.Thread(target=self.monitor.process_file, args=(event.src_path,)).start()
+        self.monitor.enqueue_file(event.src_path)
+
+    def on_moved(self, event):
+        if event.is_directory:
+            return
+        # Umbenennung innerhalb des Hotfolders (z.B. nach dem Upload) -> Zieldatei verarbeiten
+        debug_print(f"File moved: {event.src_path} -> {event.dest_path}")
+        self.monitor.enqueue_file(event.dest_path)
+
+    def on_overflow(self):
+        # Ereignisse gingen verloren (Warteschlange im Watch-Service voll) -> Ordner neu einlesen
+        for file_path in self.monitor.path_filter.scan():
+            self.monitor.enqueue_file(file_path)
 
 class HotfolderMonitor:
     def __init__(self, hf_config: dict, on_status_update=None, on_file_processing=None):
         self.hf_config = hf_config
+        self.name = hf_config.get("name", "hotfolder")
         self.monitor_dir = hf_config.get("monitor_dir", "")
-        self.observer = None
+        self.watch_token = None
+        self.path_filter = PathFilter.from_config(hf_config)
         self.active = False
         self.processed_files = set()  # Verarbeitete Dateien
+        self._processed_lock = threading.Lock()
 
         self.on_status_update = on_status_update
         self.on_file_processing = on_file_processing
 
+        self.pipeline_config = dict(DEFAULT_PIPELINE)
+        self.pipeline_config.update(hf_config.get("pipeline", {}))
+        self.pipeline = None
+        self.recorder = None
+        self.profiling = None
+        self.thread_prefix = f"hf-{self.name}-"
+        self.backend_session = get_backend_session(hf_config)
+        self.distributed = dict(DEFAULT_DISTRIBUTED)
+        self.distributed.update(hf_config.get("distributed", {}))
+        self.job_server = None            # wird in start() geholt (bindet den Socket)
+        self.records = RecordCache.for_config(hf_config)
+        self.grouper = None
+
+    def _build_pipeline(self) -> JobPipeline:
+        cfg = self.pipeline_config
+        size = cfg["queue_size"]
+        # Lokal gibt es nur ein Photoshop; verteilt laufen mehrere Jobs gleichzeitig auf den Workern
+        backend_workers = self.distributed["backend_workers"] if self.job_server else 1
+        stages = [
+            PipelineStage("ready", self._timed_stage("ready", self._stage_ready), cfg["ready_workers"], size),
+            PipelineStage("preflight", self._timed_stage("preflight", self._stage_preflight),
+                          cfg["preflight_workers"], size),
+            PipelineStage("backend", self._timed_stage("backend", self._stage_backend), backend_workers, size),
+            PipelineStage("evaluate", self._timed_stage("evaluate", self._stage_evaluate),
+                          cfg["evaluate_workers"], size),
+            PipelineStage("move", self._timed_stage("move", self._stage_move), cfg["move_workers"], size),
+        ]
+        return JobPipeline(stages, on_job_done=self._on_job_done, on_idle=self._on_pipeline_idle,
+                           thread_prefix=self.thread_prefix)
+
+    def _timed_stage(self, stage: str, handler):
+        def timed(job):
+            with STAGE_DURATION.time(hotfolder=self.name, stage=stage):
+                return handler(job)
+        return timed
+
+    def _step(self, step: str):
+        """Kontextmanager für die Latenz eines einzelnen Verarbeitungsschritts."""
+        return STEP_DURATION.time(hotfolder=self.name, step=step)
+
+    def _collect_metrics(self):
+        for stage, depth in self.get_queue_depths().items():
+            QUEUE_DEPTH.set(depth["queued"], hotfolder=self.name, stage=stage, state="queued")
+            QUEUE_DEPTH.set(depth["active"], hotfolder=self.name, stage=stage, state="active")
+
     def start(self):
         if not self.monitor_dir or not os.path.exists(self.monitor_dir):
             debug_print(f"Hotfolder existiert nicht: {self.monitor_dir}")
             return
 
         debug_print(f"Starte HotfolderMonitor für: {self.monitor_dir}")
-        self.observer = Observer()
+        if self.distributed["enabled"]:
+            try:
+                self.job_server = get_job_server(self.distributed)
+            except (OSError, ValueError) as e:
+                debug_print(f"Job-Server konnte nicht gestartet werden: {e}")
+                if self.on_status_update:
+                    self.on_status_update(f"Job-Server nicht verfügbar: {e}", False)
+                return
+            self.job_server.open_owner(id(self))
+        self._start_engine()
+        self.grouper = FileGrouper.for_config(self.hf_config, self._on_group_ready, f"{self.thread_prefix}grouping-0")
+        if self.grouper:
+            self.grouper.start()
+        self.recorder = TraceRecorder.from_config(self.hf_config)
+        if self.recorder:
+            self.recorder.start()
         event_handler = HotfolderEventHandler(self)
-        self.observer.schedule(event_handler, self.monitor_dir, recursive=True)
-        self.observer.start()
+        self.watch_token = get_watch_service().register(self.monitor_dir, event_handler, self.path_filter,
+                                                        recorder=self.recorder)
         self.active = True
+        REGISTRY.register_collector(("hotfolder", id(self)), self._collect_metrics)
 
         if self.on_status_update:
             self.on_status_update("Aktiv", True)
 
-        for root, dirs, files in os.walk(self.monitor_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                debug_print(f"Processing existing file: {file_path}")
-                self.process_file(file_path)
+        for file_path in self.path_filter.scan():
+            debug_print(f"Processing existing file: {file_path}")
+            self.enqueue_file(file_path)
 
     def stop(self):
-        if self.observer and self.active:
+        if self.watch_token is not None and self.active:
             debug_print(f"Stoppe HotfolderMonitor für: {self.monitor_dir}")
-            self.observer.stop()
-            self.observer.join()
+            get_watch_service().unregister(self.watch_token)
+            self.watch_token = None
             self.active = False
+            if self.job_server:
+                # Auf Worker wartende Jobs freigeben, damit die Backend-Stufe beendet werden kann
+                self.job_server.cancel_owner(id(self))
+            pending = self._stop_engine()
+            if self.job_server:
+                # Referenz bleibt für status() erhalten; der letzte Hotfolder stoppt den Server
+                release_job_server(self.job_server)
+            # Auf Partner wartende Dateien beim nächsten Start erneut aufnehmen
+            waiting = self.grouper.stop() if self.grouper else []
+            REGISTRY.unregister_collector(("hotfolder", id(self)))
+            for stage in STAGE_NAMES:
+                for state in ("queued", "active"):
+                    QUEUE_DEPTH.remove(hotfolder=self.name, stage=stage, state=state)
+            # Nicht bearbeitete Dateien beim nächsten Start erneut aufnehmen
+            with self._processed_lock:
+                for job in pending:
+                    self.processed_files.difference_update(job.paths)
+                self.processed_files.difference_update(waiting)
+            for job in pending:
+                job.outcome = "stopped"
+                self._on_job_done(job)
+            if self.recorder:
+                self.recorder.close()
+                self.recorder = None
+            if self.profiling and self.profiling.running:
+                self.profiling.stop()
             if self.on_status_update:
                 self.on_status_update("Inaktiv", False)
 
-    def process_file(self, file_path: str):
+    def start_profiling(self, duration: float = None, on_finished=None) -> ProfilingSession:
+        """
+        Startet ein Profil-Fenster (Standard: profiling.duration Sekunden) für die Pipeline-Threads.
+        on_finished(session) wird aus dem Profiler-Thread aufgerufen, wenn die Dateien geschrieben sind.
+        """
+        if not self.active:
+            raise RuntimeError(f"Hotfolder {self.name} läuft nicht")
+        if self.profiling and self.profiling.running:
+            raise RuntimeError(f"Für {self.name} läuft bereits ein Profil")
+        self.profiling = ProfilingSession.for_config(self.hf_config, self.profiling_threads, duration, on_finished,
+                                                     key=id(self))
+        self.profiling.start()
+        return self.profiling
+
+    def profiling_threads(self) -> dict:
+        """Threads dieses Hotfolders: {Thread-Ident: Stufe}."""
+        pipeline = self.pipeline
+        threads = pipeline.thread_stages() if pipeline else {}
+        grouper = self.grouper
+        if grouper and grouper.thread_ident is not None:
+            threads[grouper.thread_ident] = "grouping"
+        return threads
+
+    def profiling_status(self) -> dict:
+        if not self.profiling:
+            return {"running": False, "output_dir": None}
+        return self.profiling.status()
+
+    # --- Engine (Thread-Pipeline; async_monitor.py ersetzt diese Methoden) -----------
+
+    def _start_engine(self):
+        self.pipeline = self._build_pipeline()
+        self.pipeline.start()
+
+    def _stop_engine(self) -> list:
+        """Stoppt die Verarbeitung; liefert die nicht begonnenen Jobs."""
+        return self.pipeline.stop() if self.pipeline else []
+
+    def _engine_running(self) -> bool:
+        return bool(self.pipeline and self.pipeline.running)
+
+    def _submit(self, job: HotfolderJob) -> bool:
+        return self.pipeline.submit(job)
+
+    def get_queue_depths(self) -> dict:
+        """Aktuelle Tiefe jeder Stufe: {stufe: {"queued": n, "active": m}}."""
+        if not self.pipeline:
+            return {}
+        return self.pipeline.queue_depths()
+
+    def enqueue_file(self, file_path: str) -> bool:
         # Falls Datei bereits verarbeitet, überspringen
-        if file_path in self.processed_files:
-            debug_print(f"Datei {file_path} wurde bereits verarbeitet. Überspringe.")
+        with self._processed_lock:
+            if file_path in self.processed_files:
+                debug_print(f"Datei {file_path} wurde bereits verarbeitet. Überspringe.")
+                return False
+            self.processed_files.add(file_path)
+        if not self._engine_running():
+            with self._processed_lock:
+                self.processed_files.discard(file_path)
+            return False
+        if self.grouper and self.grouper.add(file_path):
+            return True
+        return self._submit(HotfolderJob(file_path))
+
+    def _forget(self, job: HotfolderJob):
+        """Dateien des Jobs beim nächsten Start bzw. Ereignis erneut aufnehmen."""
+        with self._processed_lock:
+            self.processed_files.difference_update(job.paths)
+
+    def _submit_job(self, job: HotfolderJob):
+        if not self._engine_running() or not self._submit(job):
+            self._forget(job)
+
+    def _submit_unmatched(self, group, ext: str, path: str):
+        # Partner ohne passende Primärdatei: einzeln verarbeiten, Sidecars nie im Backend öffnen
+        job = HotfolderJob(path)
+        if ext in self.grouper.sidecar_exts:
+            job.group_fault = {"reason": "orphan_sidecar", "expected": group.key[1] + ".*"}
+        self._submit_job(job)
+
+    def _on_group_ready(self, group):
+        """Fertige Dateigruppe (file_groups.py) als Job einreihen."""
+        if group.primary is None:
+            for ext, path in group.partners.items():
+                self._submit_unmatched(group, ext, path)
             return
-        self.processed_files.add(file_path)
+        job = HotfolderJob(group.primary)
+        rule = group.rule
+        for ext, path in group.partners.items():
+            if ext not in rule["partners"]:
+                self._submit_unmatched(group, ext, path)
+                continue
+            job.partners.append(path)
+            if ext == rule["metadata_from"]:
+                job.sidecar = path
+        if not job.partners and rule["required"]:
+            job.group_fault = {"reason": "partner_missing", "expected": rule["partners"]}
+        debug_print(f"Dateigruppe: {job.file_name} + {[os.path.basename(p) for p in job.partners]}")
+        self._submit_job(job)
 
+    def process_file(self, file_path: str):
+        """Verarbeitet eine Datei synchron durch alle Stufen (ohne Pipeline-Threads)."""
+        with self._processed_lock:
+            if file_path in self.processed_files:
+                debug_print(f"Datei {file_path} wurde bereits verarbeitet. Überspringe.")
+                return
+            self.processed_files.add(file_path)
+        handlers = {
+            "ready": self._stage_ready,
+            "preflight": self._stage_preflight,
+            "backend": self._stage_backend,
+            "evaluate": self._stage_evaluate,
+            "move": self._stage_move,
+        }
+        job = HotfolderJob(file_path)
+        next_stage = "ready"
+        while next_stage:
+            next_stage = handlers[next_stage](job)
+        self._on_job_done(job)
+        self._on_pipeline_idle()
+
+    def _on_job_done(self, job: HotfolderJob):
+        # Dokument schließen, sobald der Job fertig ist
+        if job.document_open:
+            self.backend_session.release(job.file_name)
+            job.document_open = False
+        FILES_TOTAL.inc(hotfolder=self.name, outcome=job.outcome)
+        if job.outcome == "fault":
+            FAULTS_TOTAL.inc(hotfolder=self.name, reason=job.fault_reason)
+        if job.outcome in ("success", "fault"):
+            JOB_DURATION.observe(time.time() - job.created, hotfolder=self.name)
+        recorder = self.recorder
+        if recorder:
+            recorder.outcome(job.file_path, job.outcome, job.fault_reason)
+
+    def _fault(self, job: HotfolderJob, reason: str, fail_log: dict = None):
+        job.outcome = "fault"
+        job.fault_reason = reason
+        job.target_dir = self.hf_config.get("fault_dir", "")
+        if fail_log is not None:
+            job.fail_log = fail_log
+
+    def _on_pipeline_idle(self):
         if self.on_file_processing:
-            self.on_file_processing(os.path.basename(file_path))
-
-        debug_print(f"Verarbeite Datei: {file_path}")
-
-        if not is_file_stable(file_path):
-            debug_print(f"Datei ist nicht stabil (noch im Kopiervorgang?): {file_path}")
-            if self.on_file_processing:
-                self.on_file_processing(None)
-            return
-
-        if not open_in_photoshop(file_path):
-            debug_print("Fehler beim Öffnen der Datei in Photoshop.")
-            if self.on_file_processing:
-                self.on_file_processing(None)
-            return
-
-        file_name = os.path.basename(file_path)
-        jsx_script_path = generate_jsx_script(self.hf_config, file_name)
-        success = run_jsx_in_photoshop(jsx_script_path)
+            self.on_file_processing(None)
+
+    # --- Stufen ---------------------------------------------------------
+
+    def _stage_ready(self, job: HotfolderJob):
+        debug_print(f"Verarbeite Datei: {job.file_path}")
+        with self._step("stability"):
+            stable = all(is_file_stable(path, self.pipeline_config["stable_interval"],
+                                        self.pipeline_config["stable_checks"]) for path in job.paths)
+        if not stable:
+            debug_print(f"Datei ist nicht stabil (noch im Kopiervorgang?): {job.file_path}")
+            job.outcome = "unstable"
+            return None
+        return self._next_after_ready(job)
+
+    def _next_after_ready(self, job: HotfolderJob):
+        # Ungültige Dateigruppe (verwaister Sidecar, fehlender Partner) ohne Backend in Fault
+        if job.group_fault is not None:
+            debug_print(f"Dateigruppe ungültig ({job.group_fault['reason']}): {job.file_name}")
+            self._fault(job, job.group_fault["reason"], {"group": job.group_fault})
+            return "move"
+        return "preflight"
+
+    def _stage_preflight(self, job: HotfolderJob):
+        with self._step("preflight"):
+            job.preflight_info, preflight_reasons = run_preflight(job.file_path, self.hf_config)
+        if preflight_reasons:
+            debug_print("Preflight fehlgeschlagen: " + "; ".join(preflight_reasons))
+            self._fault(job, "preflight", {"preflight": {"reasons": preflight_reasons, "info": job.preflight_info}})
+            return "move"
+        return "backend"
+
+    def _stage_backend(self, job: HotfolderJob):
+        if self.on_file_processing:
+            self.on_file_processing(job.file_name)
+        try:
+            if self.job_server:
+                return self._run_remote(job)
+            if job.phase == "additional":
+                return self._run_additional_jsx(job)
+            return self._run_contentcheck(job)
+        except BackendUnavailable as e:
+            # Job erneut einreihen (Rücksprung in die Backend-Stufe wird bevorzugt behandelt)
+            job.document_open = False
+            job.backend_retries += 1
+            max_retries = self.backend_session.settings.get("max_retries", 0)
+            if job.backend_retries <= max_retries:
+                debug_print(f"{e} – {job.file_name} wird erneut eingereiht ({job.backend_retries}/{max_retries}).")
+                RETRIES_TOTAL.inc(hotfolder=self.name)
+                return "backend"
+            debug_print(f"{e} – {job.file_name} nach {max_retries} Versuchen in Fault.")
+            self._fault(job, "backend", {"backend": str(e)})
+            return "move"
+
+    def _needs_additional_jsx(self) -> bool:
+        additional_jsx = self.hf_config.get("additional_jsx", "").strip()
+        return bool(additional_jsx) and os.path.exists(additional_jsx)
+
+    def _run_contentcheck(self, job: HotfolderJob):
+        session = self.backend_session
+        with session.lock:
+            with self._step("open"):
+                opened = session.open(job.file_path, job.file_name)
+            if not opened:
+                debug_print("Fehler beim Öffnen der Datei in Photoshop.")
+                job.outcome = "open_failed"
+                return None
+            job.document_open = True
+            with self._step("contentcheck"):
+                success = session.contentcheck(self.hf_config, job.file_path)
+            # Dokument nur offen lassen, wenn danach noch das zusätzliche JSX laufen soll
+            if not success or not self._needs_additional_jsx():
+                session.release(job.file_name)
+                job.document_open = False
         if not success:
             debug_print("Fehler beim Ausführen des Contentcheck-JSX.")
-            fault_dir = self.hf_config.get("fault_dir", "")
-            move_file(file_path, fault_dir)
-            if self.on_file_processing:
-                self.on_file_processing(None)
-            return
-
+            self._fault(job, "jsx")
+            return "move"
+        return "evaluate"
+
+    def _run_additional_jsx(self, job: HotfolderJob):
+        additional_jsx = self.hf_config.get("additional_jsx", "").strip()
+        with self._step("additional_jsx"):
+            add_success = self.backend_session.additional(additional_jsx, job.file_path, job.file_name)
+        job.document_open = True
+        if not add_success:
+            debug_print("Zusätzliches JSX-Skript schlug fehl (wird aber ignoriert).")
+        return "move"
+
+    def _run_remote(self, job: HotfolderJob):
+        """Backend-Stufe über den Job-Server; wartet auf das Ergebnis eines Worker-Agenten."""
+        payload = {
+            "kind": job.phase,
+            "file_path": job.file_path,
+            "document_name": job.file_name,
+            "log_timeout": self.pipeline_config["log_timeout"],
+            "hf_config": {key: self.hf_config.get(key) for key in
+                          ("name", "jsx_mode", "required_metadata", "required_layers", "records")
+                          if key in self.hf_config},
+        }
+        if job.phase == "additional":
+            payload["additional_jsx"] = self.hf_config.get("additional_jsx", "").strip()
+        with self._step("additional_jsx" if job.phase == "additional" else "contentcheck"):
+            result = self.job_server.run(payload, owner=id(self))
+        if result.get("cancelled"):
+            self._forget(job)
+            job.outcome = "stopped"
+            return None
+        if job.phase == "additional":
+            if not result.get("ok"):
+                debug_print("Zusätzliches JSX-Skript schlug fehl (wird aber ignoriert).")
+            return "move"
+        if not result.get("ok"):
+            if result.get("error") == "open":
+                debug_print("Fehler beim Öffnen der Datei auf dem Worker.")
+                job.outcome = "open_failed"
+                return None
+            debug_print("Fehler beim Ausführen des Contentcheck-JSX auf dem Worker.")
+            self._fault(job, "jsx")
+            return "move"
+        if result.get("log") is None:
+            debug_print(f"Worker lieferte kein Contentcheck-Log ({result.get('error')}).")
+            self._fault(job, "log_missing")
+            return "move"
+        # Log dort ablegen, wo es auch das lokale JSX schreibt -> Auswertung bleibt unverändert
         logfiles_dir = self.hf_config.get("logfiles_dir", "")
-        log_file = os.path.join(logfiles_dir, file_name.rsplit(".", 1)[0] + "_log_contentcheck.json")
-        debug_print("Erwarte Logfile: " + log_file)
-
-        timeout = 30
-        elapsed = 0
-        while elapsed < timeout:
-            if os.path.exists(log_file):
-                break
-            time.sleep(1)
-            elapsed += 1
-
-        if not os.path.exists(log_file):
+        log_file = os.path.join(logfiles_dir, job.file_name.rsplit(".", 1)[0] + "_log_contentcheck.json")
+        if logfiles_dir and not os.path.exists(logfiles_dir):
+            os.makedirs(logfiles_dir, exist_ok=True)
+        with open(log_file, "w", encoding="utf-8") as f:
+            json.dump(result["log"], f, ensure_ascii=False, indent=4)
+        return "evaluate"
+
+    def _stage_evaluate(self, job: HotfolderJob):
+        logfiles_dir = self.hf_config.get("logfiles_dir", "")
+        job.log_file = os.path.join(logfiles_dir, job.file_name.rsplit(".", 1)[0] + "_log_contentcheck.json")
+        debug_print("Erwarte Logfile: " + job.log_file)
+
+        timeout = self.pipeline_config["log_timeout"]
+        poll_interval = self.pipeline_config["log_poll_interval"]
+        deadline = time.monotonic() + timeout
+        with self._step("log_wait"):
+            while not os.path.exists(job.log_file) and time.monotonic() < deadline:
+                time.sleep(poll_interval)
+
+        if not os.path.exists(job.log_file):
             debug_print("Contentcheck-Logfile wurde nicht erzeugt, verschiebe Datei in Fault.")
-            fault_dir = self.hf_config.get("fault_dir", "")
-            move_file(file_path, fault_dir)
-            if self.on_file_processing:
-                self.on_file_processing(None)
-            return
+            self._fault(job, "log_missing")
+            return "move"
+
+        with self._step("evaluate"):
+            return self._evaluate_log(job)
 
+    def _evaluate_log(self, job: HotfolderJob):
         try:
-            with open(log_file, "r", encoding="utf-8") as f:
+            with open(job.log_file, "r", encoding="utf-8") as f:
                 contentcheck = json.load(f)
         except Exception as e:
             debug_print("Fehler beim Lesen des Logfiles: " + str(e))
-            fault_dir = self.hf_config.get("fault_dir", "")
-            move_file(file_path, fault_dir)
-            if self.on_file_processing:
-                self.on_file_processing(None)
-            return
+            self._fault(job, "log_invalid")
+            return "move"
+        if job.sidecar:
+            self._apply_sidecar(job, contentcheck)
+        job.contentcheck = contentcheck
 
-        # Vergleiche die ausgewählten Metadaten-Felder (required_metadata) mit den Werten im Log
-        var_required = self.hf_config.get("required_metadata", [])
-        var_missing = {}
-        for field in var_required:
-            if "metadata" in contentcheck and field in contentcheck["metadata"]:
-                val = contentcheck["metadata"][field]
-            else:
-                val = "undefined"
-            if val.strip().lower() == "undefined" or val.strip() == "":
-                var_missing[field] = val
-
-        if len(var_missing) == 0:
+        # Vergleiche required_metadata und required_layers mit den Werten im Log
+        var_missing, var_missing_layers, _unknown = evaluate_contentcheck(contentcheck, self.hf_config)
+
+        if len(var_missing) == 0 and len(var_missing_layers) == 0:
             criteria_met = True
         else:
             criteria_met = False
 
         if criteria_met:
             debug_print("Contentcheck erfolgreich. Führe zusätzliches JSX aus und verschiebe Datei in Success.")
-            additional_jsx = self.hf_config.get("additional_jsx", "").strip()
-            if additional_jsx and os.path.exists(additional_jsx):
-                add_success = run_jsx_in_photoshop(additional_jsx)
-                if not add_success:
-                    debug_print("Zusätzliches JSX-Skript schlug fehl (wird aber ignoriert).")
-            success_dir = self.hf_config.get("success_dir", "")
-            move_file(file_path, success_dir)
+            job.outcome = "success"
+            job.target_dir = self.hf_config.get("success_dir", "")
+            if self._needs_additional_jsx():
+                job.phase = "additional"
+                return "backend"
         else:
-            debug_print("Contentcheck fehlgeschlagen. Fehlende Felder: " + json.dumps(var_missing))
+            debug_print("Contentcheck fehlgeschlagen. Fehlende Felder: " + json.dumps(var_missing)
+                        + ", fehlende Ebenen: " + json.dumps(var_missing_layers))
             debug_print("Erzeuge Fail-Log und verschiebe Datei in Fault.")
-            fail_log_file = os.path.join(logfiles_dir, file_name.rsplit(".", 1)[0] + "_01_log_fail.json")
-            with open(fail_log_file, "w", encoding="utf-8") as f:
-                json.dump({"missing": var_missing}, f, indent=4, ensure_ascii=False)
-            fault_dir = self.hf_config.get("fault_dir", "")
-            move_file(file_path, fault_dir)
-
-        if self.on_file_processing:
-            self.on_file_processing(None)
\ No newline at end of file
+            fail_log = {"missing": var_missing}
+            if var_missing_layers:
+                fail_log["missing_layers"] = var_missing_layers
+            self._fault(job, "contentcheck", fail_log)
+        return "move"
+
+    def _apply_sidecar(self, job: HotfolderJob, contentcheck: dict):
+        """Metadaten direkt aus dem Sidecar lesen; sie haben Vorrang vor denen im Dokument."""
+        try:
+            fields = read_xmp_fields(find_xmp_packet(job.sidecar), contentcheck_fields(self.hf_config))
+        except OSError as e:
+            debug_print(f"Sidecar {job.sidecar} nicht lesbar: {e}")
+            return
+        metadata = contentcheck.setdefault("metadata", {})
+        for field, value in fields.items():
+            if value != "undefined" or field not in metadata:
+                metadata[field] = value
+        contentcheck["sidecar"] = os.path.basename(job.sidecar)
+
+    def _stage_move(self, job: HotfolderJob):
+        with self._step("move"):
+            # Unterordner bleiben erhalten, gleichnamige Dateien aus verschiedenen Ordnern kollidieren nicht
+            rel_name = relative_name(self.monitor_dir, job.file_path)
+            if job.fail_log is not None:
+                write_fail_log(self.hf_config.get("logfiles_dir", ""), rel_name, job.fail_log)
+            if job.target_dir is not None:
+                target_dir = sub_dir(job.target_dir, rel_name)
+                dest_path = move_file(job.file_path, target_dir)
+                for partner in job.partners:
+                    move_file(partner, target_dir)
+                if dest_path and self.records is not None and job.contentcheck is not None:
+                    self.records.add(rel_name, job.outcome, job.contentcheck,
+                                     [os.path.basename(partner) for partner in job.partners])
+        return None
+
+
+def reevaluate_faults(hf_config: dict) -> dict:
+    """
+    Bewertet die Dateien in fault_dir anhand des Record-Caches gegen die aktuelle Konfiguration neu,
+    ohne das Backend zu starten. Bestandene Dateien werden nach success_dir verschoben (Fail-Log
+    wird gelöscht), bei weiterhin fehlerhaften wird das Fail-Log mit den neuen Gründen überschrieben.
+    Nicht verschoben werden Dateien, deren Datensatz ein neu gefordertes Feld nicht enthält ("unknown"),
+    und – bei konfiguriertem zusätzlichem JSX – alle bestandenen, da dieses nur in Photoshop läuft.
+    """
+    summary = {"checked": 0, "moved": 0, "still_failing": 0, "unknown": 0, "needs_backend": 0, "missing_file": 0}
+    records = RecordCache.for_config(hf_config)
+    if records is None:
+        return summary
+    fault_dir = hf_config.get("fault_dir", "")
+    success_dir = hf_config.get("success_dir", "")
+    logfiles_dir = hf_config.get("logfiles_dir", "")
+    additional_jsx = hf_config.get("additional_jsx", "").strip()
+    needs_backend = bool(additional_jsx) and os.path.exists(additional_jsx)
+
+    entries = records.load()
+    for rel_name, entry in entries.items():
+        if entry.get("dir") != "fault":
+            continue
+        file_path = os.path.join(fault_dir, *rel_name.split("/"))
+        if not os.path.exists(file_path):
+            summary["missing_file"] += 1
+            continue
+        summary["checked"] += 1
+        var_missing, var_missing_layers, unknown = evaluate_contentcheck(entry["record"], hf_config)
+        if unknown:
+            summary["unknown"] += 1
+        elif var_missing or var_missing_layers:
+            fail_log = {"missing": var_missing}
+            if var_missing_layers:
+                fail_log["missing_layers"] = var_missing_layers
+            write_fail_log(logfiles_dir, rel_name, fail_log)
+            summary["still_failing"] += 1
+        elif needs_backend:
+            summary["needs_backend"] += 1
+        elif move_file(file_path, sub_dir(success_dir, rel_name)):
+            for partner in entry.get("partners", []):
+                move_file(os.path.join(sub_dir(fault_dir, rel_name), partner), sub_dir(success_dir, rel_name))
+            try:
+                os.remove(fail_log_path(logfiles_dir, rel_name))
+            except OSError:
+                pass
+            entry["dir"] = "success"
+            summary["moved"] += 1
+    records.save(entries)
+    debug_print(f"Neubewertung {hf_config.get('name', 'hotfolder')}: {summary}")
+    return summary
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Job-Pipeline – verbindet die Verarbeitungsschritte eines Hotfolders über
+begrenzte Warteschlangen, damit Photoshop (Backend-Stufe) nie auf Python-seitige
+Arbeit warten muss:
+
+    ready → preflight → backend → evaluate → move
+
+Jede Stufe hat eigene Worker-Threads. Der Handler einer Stufe gibt den Namen der
+nächsten Stufe zurück (oder None, wenn der Job abgeschlossen ist). Rücksprünge in
+eine frühere Stufe (z.B. zusätzliches JSX nach dem Contentcheck) werden bevorzugt
+und ohne Limit eingereiht.
+"""
+
+__all__ = ["HotfolderJob", "PipelineStage", "JobPipeline"]
+
+import os
+import time
+import threading
+import collections
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+_STOP = object()
+
+
+class HotfolderJob:
+    """
+    Eine Datei auf dem Weg durch die Pipeline.
+    """
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.file_name = os.path.basename(file_path)
+        self.created = time.time()
+        self.phase = "contentcheck"      # "contentcheck" oder "additional" (zusätzliches JSX)
+        self.preflight_info = None
+        self.log_file = None
+        self.contentcheck = None
+        self.target_dir = None           # success_dir oder fault_dir, None = nicht verschieben
+        self.fail_log = None             # Inhalt des Fail-Logs, falls eines geschrieben werden soll
+        self.document_open = False       # Dokument ist im Backend noch geöffnet
+        self.outcome = "unfinished"      # success, fault, unstable, open_failed, stopped
+        self.fault_reason = None
+        self.backend_retries = 0
+        self.partners = []               # Partnerdateien der Gruppe (siehe file_groups.py)
+        self.sidecar = None              # Partner, aus dem die Metadaten gelesen werden
+        self.group_fault = None          # {"reason": ...}: Gruppe ungültig, ohne Backend in Fault
+
+    @property
+    def paths(self) -> list:
+        """Primärdatei und Partner – alles, was zusammen verschoben wird."""
+        return [self.file_path] + self.partners
+
+    def __repr__(self):
+        return f"HotfolderJob({self.file_name!r}, phase={self.phase!r})"
+
+
+class PipelineStage:
+    """
+    Eine Stufe mit begrenzter Warteschlange und festen Worker-Threads.
+    put() blockiert, wenn die Warteschlange voll ist (Backpressure);
+    put_urgent() reiht ohne Limit vorne ein (für Rückläufer aus späteren Stufen).
+    """
+    def __init__(self, name: str, handler, workers: int = 1, maxsize: int = 0):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.maxsize = int(maxsize)
+        self.pipeline = None
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._busy = 0
+        self._closed = False
+
+    def start(self, thread_prefix: str = ""):
+        self._closed = False
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{thread_prefix}{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def put(self, job) -> bool:
+        with self._cond:
+            while not self._closed and self.maxsize > 0 and len(self._items) >= self.maxsize:
+                self._cond.wait(0.5)
+            if self._closed:
+                return False
+            self._items.append(job)
+            self._cond.notify_all()
+            return True
+
+    def put_urgent(self, job) -> bool:
+        with self._cond:
+            if self._closed:
+                return False
+            self._items.appendleft(job)
+            self._cond.notify_all()
+            return True
+
+    def depth(self) -> dict:
+        with self._cond:
+            return {"queued": len(self._items), "active": self._busy}
+
+    def close(self) -> list:
+        """Nimmt keine Jobs mehr an und gibt die nicht bearbeiteten Jobs zurück."""
+        with self._cond:
+            self._closed = True
+            pending = list(self._items)
+            self._items.clear()
+            for _ in self._threads:
+                self._items.append(_STOP)
+            self._cond.notify_all()
+        return pending
+
+    def join(self):
+        """Wartet, bis alle Worker ihren aktuellen Job beendet haben."""
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join()
+        self._threads = []
+        with self._cond:
+            self._items.clear()
+
+    def _get(self):
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            job = self._items.popleft()
+            if job is not _STOP:
+                self._busy += 1
+            self._cond.notify_all()
+            return job
+
+    def _run(self):
+        while True:
+            job = self._get()
+            if job is _STOP:
+                return
+            try:
+                next_stage = self.handler(job)
+            except Exception as e:
+                debug_print(f"Fehler in Stufe '{self.name}' für {job}: {e}")
+                next_stage = None
+            with self._cond:
+                self._busy -= 1
+            self.pipeline._advance(self, job, next_stage)
+
+
+class JobPipeline:
+    """
+    Reihe von PipelineStages. on_job_done(job) wird aufgerufen, sobald ein Job
+    keine weitere Stufe mehr hat; on_idle() sobald keine Jobs mehr unterwegs sind.
+    """
+    def __init__(self, stages, on_job_done=None, on_idle=None, thread_prefix: str = ""):
+        self.stages = collections.OrderedDict((stage.name, stage) for stage in stages)
+        for stage in self.stages.values():
+            stage.pipeline = self
+        self.on_job_done = on_job_done
+        self.on_idle = on_idle
+        self.thread_prefix = thread_prefix
+        self._in_flight = 0
+        self._interrupted = []           # Jobs, deren nächste Stufe nach stop() nicht mehr lief
+        self._lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        self._interrupted = []
+        self.running = True
+        for stage in self.stages.values():
+            stage.start(self.thread_prefix)
+
+    def thread_stages(self) -> dict:
+        """Laufende Worker-Threads: {Thread-Ident: Stufenname} (für profiling.py)."""
+        return {t.ident: stage.name for stage in self.stages.values() for t in list(stage._threads)
+                if t.ident is not None}
+
+    def stop(self) -> list:
+        """
+        Stoppt alle Stufen und wartet auf die laufenden Jobs. Rückgabe: nicht fertig bearbeitete
+        Jobs (wartende und solche, die nach ihrer aktuellen Stufe nicht weitergereicht wurden).
+        """
+        self.running = False
+        pending = []
+        for stage in self.stages.values():
+            pending.extend(stage.close())
+        for stage in self.stages.values():
+            stage.join()
+        with self._lock:
+            pending.extend(self._interrupted)
+            self._interrupted = []
+            self._in_flight = 0
+        return pending
+
+    def submit(self, job, stage_name: str = None) -> bool:
+        stage = self.stages[stage_name] if stage_name else next(iter(self.stages.values()))
+        with self._lock:
+            self._in_flight += 1
+        if not stage.put(job):
+            self._finish(job, notify=False)
+            return False
+        return True
+
+    def queue_depths(self) -> dict:
+        return {name: stage.depth() for name, stage in self.stages.items()}
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def _advance(self, current, job, next_stage):
+        if not next_stage:
+            self._finish(job)
+            return
+        if self.running:
+            target = self.stages[next_stage]
+            names = list(self.stages)
+            # Rücksprung in eine frühere Stufe ohne Limit einreihen, sonst droht ein Deadlock
+            backwards = names.index(next_stage) <= names.index(current.name)
+            if (target.put_urgent(job) if backwards else target.put(job)):
+                return
+        # Gestoppt: stop() gibt den Job mit den wartenden zurück (Abschluss durch den Aufrufer)
+        with self._lock:
+            self._interrupted.append(job)
+        self._finish(job, notify=False)
+
+    def _finish(self, job, notify=True):
+        if notify and self.on_job_done:
+            try:
+                self.on_job_done(job)
+            except Exception as e:
+                debug_print(f"Fehler im Job-Abschluss-Callback: {e}")
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            idle = self._in_flight == 0
+        if idle and self.on_idle:
+            self.on_idle()
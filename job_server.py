@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Job-Server – verteilt Backend-Jobs (Contentcheck, zusätzliches JSX) an Worker-Agenten
+auf anderen Rechnern (siehe worker_agent.py), statt sie im lokalen Photoshop auszuführen.
+
+Protokoll: JSON-Zeilen über TCP ("tcp://host:port") oder Unix-Socket ("unix:///pfad").
+Jede Anfrage des Workers erhält genau eine Antwort:
+
+    hello      {"worker", "backend", "token"}      -> welcome {"heartbeat_interval", "lease_timeout"} | error
+    pull       {}                                  -> job {"job", "attempt", "kind", ...} | no_job
+    heartbeat  {"jobs": [id, ...]}                 -> heartbeat_ack {"jobs": [noch gültige ids]}
+    result     {"job", "attempt", "ok", "log", "error", "unavailable"} -> ack {"job"}
+
+- pull wartet bis zu heartbeat_interval auf einen Job (Long Polling).
+- Ein ausgelieferter Job ist für lease_timeout Sekunden an den Worker vergeben; Heartbeats
+  verlängern die Lease. Läuft sie ab oder bricht die Verbindung ab, wird der Job erneut
+  eingereiht (bis max_attempts). Ergebnisse werden immer bestätigt (ack), aber nur für die
+  aktuelle Vergabe (attempt) übernommen – doppelte oder verspätete Ergebnisse werden verworfen.
+- Dateien liegen auf gemeinsamem Speicher; Worker können Pfade per path_map umschreiben.
+
+Standardmäßig lauscht der Server nur auf 127.0.0.1. Ohne gemeinsames Token ("token" bzw.
+Umgebungsvariable PRISM_JOB_TOKEN) startet er nicht; Verbindungen, deren hello nicht das
+richtige Token enthält, werden geschlossen, bevor sie Jobs erhalten oder Ergebnisse melden.
+Für andere Rechner "listen" z.B. auf "tcp://0.0.0.0:7878" setzen.
+"""
+
+__all__ = ["DEFAULT_DISTRIBUTED", "TOKEN_ENV", "JobServer", "get_job_server", "release_job_server",
+           "stop_job_servers", "parse_address", "send_message", "read_message"]
+
+import os
+import hmac
+import json
+import time
+import socket
+import itertools
+import threading
+from collections import deque
+
+from backend.photoshop_backend import BackendUnavailable
+from metrics import REGISTRY, BACKEND_GAUGE
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+# Standardwerte (pro Hotfolder unter "distributed" überschreibbar)
+DEFAULT_DISTRIBUTED = {
+    "enabled": False,
+    "listen": "tcp://127.0.0.1:7878",
+    "token": "",                  # gemeinsames Geheimnis für Worker; leer = aus PRISM_JOB_TOKEN
+    "heartbeat_interval": 5.0,    # Sekunden
+    "lease_timeout": 30.0,        # ohne Heartbeat wird der Job danach neu vergeben
+    "job_timeout": 900.0,         # so lange wartet der Monitor höchstens auf ein Ergebnis
+    "max_attempts": 3,
+    "backend_workers": 8          # parallele Jobs dieses Hotfolders (Threads der Backend-Stufe)
+}
+
+TOKEN_ENV = "PRISM_JOB_TOKEN"
+
+
+def parse_address(address: str):
+    """Liefert (Socket-Familie, Adresse) für "tcp://host:port", "host:port" oder "unix:///pfad"."""
+    if address.startswith("unix://"):
+        return socket.AF_UNIX, address[len("unix://"):]
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def send_message(wfile, message: dict):
+    wfile.write(json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+    wfile.flush()
+
+
+def read_message(rfile):
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line.decode("utf-8"))
+
+
+class _RemoteJob:
+    __slots__ = ("id", "owner", "payload", "attempt", "worker", "expires", "result", "done")
+
+    def __init__(self, job_id: int, owner, payload: dict):
+        self.id = job_id
+        self.owner = owner
+        self.payload = payload
+        self.attempt = 0
+        self.worker = None
+        self.expires = 0.0
+        self.result = None
+        self.done = threading.Event()
+
+
+class JobServer:
+    def __init__(self, settings: dict = None):
+        self.settings = dict(DEFAULT_DISTRIBUTED)
+        self.settings.update(settings or {})
+        self.address = self.settings["listen"]
+        self.token = self.settings["token"] or os.environ.get(TOKEN_ENV, "")
+        self._cond = threading.Condition()
+        self._queue = deque()                 # wartende Jobs
+        self._leased = {}                     # job id -> _RemoteJob
+        self._workers = {}                    # worker id -> Anzahl Verbindungen
+        self._closed_owners = set()
+        self._ids = itertools.count(1)
+        self._socket = None
+        self._running = False
+        self._stopped = threading.Event()
+        self._threads = []
+        self.stats = {"dispatched": 0, "completed": 0, "expired": 0, "failed": 0}
+
+    # --- Lebenszyklus --------------------------------------------------------------
+
+    def start(self):
+        if not self.token:
+            raise ValueError(f"Job-Server {self.address}: kein Token gesetzt (distributed.token oder {TOKEN_ENV})")
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.remove(address)
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            if family == socket.AF_INET:
+                self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind(address)
+            if family == socket.AF_UNIX:
+                os.chmod(address, 0o600)
+            self._socket.listen(64)
+            # Falls shutdown() in stop() ein blockiertes accept() nicht weckt: regelmäßig _running prüfen
+            self._socket.settimeout(0.5)
+        except OSError:
+            self._socket.close()
+            raise
+        self._running = True
+        self._stopped.clear()
+        for target, name in ((self._accept_loop, "job-server-accept"), (self._reap_loop, "job-server-leases")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        REGISTRY.register_collector(("job_server", self.address), self._collect_metrics)
+        debug_print(f"Job-Server lauscht auf {self.address}")
+
+    def stop(self):
+        self._running = False
+        self._stopped.set()
+        REGISTRY.unregister_collector(("job_server", self.address))
+        for close in (lambda: self._socket.shutdown(socket.SHUT_RDWR), self._socket.close):
+            try:
+                close()
+            except OSError:
+                pass
+        with self._cond:
+            pending = list(self._queue) + list(self._leased.values())
+            self._queue.clear()
+            self._leased.clear()
+            self._cond.notify_all()
+        for job in pending:
+            self._complete(job, {"ok": False, "cancelled": True})
+        for thread in self._threads:
+            thread.join(timeout=2)
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.remove(address)
+
+    # --- Schnittstelle für den Monitor -----------------------------------------------
+
+    def open_owner(self, owner):
+        with self._cond:
+            self._closed_owners.discard(owner)
+
+    def cancel_owner(self, owner):
+        """Bricht alle Jobs eines (stoppenden) Hotfolders ab; neue Jobs werden sofort abgewiesen."""
+        with self._cond:
+            self._closed_owners.add(owner)
+            cancelled = [job for job in self._queue if job.owner == owner]
+            cancelled += [job for job in self._leased.values() if job.owner == owner]
+            self._queue = deque(job for job in self._queue if job.owner != owner)
+            for job in cancelled:
+                self._leased.pop(job.id, None)
+        for job in cancelled:
+            self._complete(job, {"ok": False, "cancelled": True})
+
+    def run(self, payload: dict, owner=None, timeout: float = None) -> dict:
+        """
+        Reiht einen Job ein und wartet auf das Ergebnis eines Workers.
+        Rückgabe: {"ok", "log", "error", ...} bzw. {"cancelled": True} beim Stoppen.
+        Wirft BackendUnavailable, wenn kein Worker das Ergebnis rechtzeitig liefert.
+        """
+        timeout = self.settings["job_timeout"] if timeout is None else timeout
+        with self._cond:
+            if owner in self._closed_owners or not self._running:
+                return {"ok": False, "cancelled": True}
+            job = _RemoteJob(next(self._ids), owner, payload)
+            self._queue.append(job)
+            self._cond.notify_all()
+        if not job.done.wait(timeout):
+            with self._cond:
+                if job in self._queue:
+                    self._queue.remove(job)
+                self._leased.pop(job.id, None)
+            if not job.done.is_set():
+                raise BackendUnavailable(f"Kein Worker hat Job {job.id} innerhalb von {timeout:.0f} s erledigt")
+        if job.result.get("unavailable"):
+            raise BackendUnavailable(job.result.get("error") or "Backend des Workers nicht verfügbar")
+        return job.result
+
+    def status(self) -> dict:
+        with self._cond:
+            return {"workers": len(self._workers), "queued": len(self._queue),
+                    "leased": len(self._leased), **self.stats}
+
+    def _collect_metrics(self):
+        label = f"remote:{self.address}"
+        for field, value in self.status().items():
+            BACKEND_GAUGE.set(value, backend=label, field=field)
+
+    def _complete(self, job: _RemoteJob, result: dict):
+        if job.done.is_set():
+            return False
+        job.result = result
+        job.done.set()
+        return True
+
+    # --- Leases -----------------------------------------------------------------------
+
+    def _requeue_locked(self, job: _RemoteJob, reason: str, given_up: list):
+        """
+        Reiht den Job erneut ein. Nach max_attempts wird er aufgegeben und mit seinem Ergebnis
+        an given_up angehängt; der Aufrufer ruft dafür _complete() nach Freigabe des Locks auf.
+        """
+        job.worker = None
+        if job.attempt >= self.settings["max_attempts"]:
+            self.stats["failed"] += 1
+            given_up.append((job, {"ok": False, "unavailable": True,
+                                   "error": f"Job nach {job.attempt} Vergaben aufgegeben ({reason})"}))
+            return
+        debug_print(f"Job {job.id} wird neu vergeben ({reason}).")
+        self._queue.appendleft(job)
+        self._cond.notify_all()
+
+    def _reap_loop(self):
+        while not self._stopped.wait(min(1.0, self.settings["heartbeat_interval"])):
+            now = time.monotonic()
+            given_up = []
+            with self._cond:
+                for job in [j for j in self._leased.values() if j.expires < now]:
+                    del self._leased[job.id]
+                    self.stats["expired"] += 1
+                    self._requeue_locked(job, f"Lease von {job.worker} abgelaufen", given_up)
+            for job, result in given_up:
+                self._complete(job, result)
+
+    def _take_job(self, worker: str, wait: float):
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while not self._queue and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if not self._queue:
+                return None
+            job = self._queue.popleft()
+            job.attempt += 1
+            job.worker = worker
+            job.expires = time.monotonic() + self.settings["lease_timeout"]
+            self._leased[job.id] = job
+            self.stats["dispatched"] += 1
+            return job
+
+    # --- Verbindungen -------------------------------------------------------------------
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _addr = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            threading.Thread(target=self._serve, args=(conn,), name="job-server-conn", daemon=True).start()
+
+    def _serve(self, conn):
+        worker = None
+        rfile = conn.makefile("rb")
+        wfile = conn.makefile("wb")
+        try:
+            while self._running:
+                message = read_message(rfile)
+                if message is None:
+                    break
+                kind = message.get("type")
+                if kind == "hello":
+                    if worker is not None:
+                        send_message(wfile, {"type": "error", "error": "hello bereits erfolgt"})
+                        continue
+                    if not hmac.compare_digest(str(message.get("token", "")).encode("utf-8"),
+                                               self.token.encode("utf-8")):
+                        debug_print(f"Worker {message.get('worker', '?')} abgewiesen: falsches Token")
+                        send_message(wfile, {"type": "error", "error": "Token ungültig"})
+                        break
+                    worker = str(message.get("worker", "worker"))
+                    with self._cond:
+                        self._workers[worker] = self._workers.get(worker, 0) + 1
+                    debug_print(f"Worker verbunden: {worker} ({message.get('backend', '?')})")
+                    send_message(wfile, {"type": "welcome",
+                                         "heartbeat_interval": self.settings["heartbeat_interval"],
+                                         "lease_timeout": self.settings["lease_timeout"]})
+                elif worker is None:
+                    send_message(wfile, {"type": "error", "error": "hello erwartet"})
+                elif kind == "pull":
+                    job = self._take_job(worker, self.settings["heartbeat_interval"])
+                    if job is None:
+                        send_message(wfile, {"type": "no_job"})
+                    else:
+                        send_message(wfile, dict(job.payload, type="job", job=job.id, attempt=job.attempt))
+                elif kind == "heartbeat":
+                    valid = []
+                    with self._cond:
+                        expires = time.monotonic() + self.settings["lease_timeout"]
+                        for job_id in message.get("jobs", []):
+                            job = self._leased.get(job_id)
+                            if job is not None and job.worker == worker:
+                                job.expires = expires
+                                valid.append(job_id)
+                    send_message(wfile, {"type": "heartbeat_ack", "jobs": valid})
+                elif kind == "result":
+                    self._accept_result(worker, message)
+                    send_message(wfile, {"type": "ack", "job": message.get("job")})
+                else:
+                    send_message(wfile, {"type": "error", "error": f"unbekannte Nachricht: {kind}"})
+        except (OSError, ValueError) as e:
+            debug_print(f"Verbindung zu Worker {worker} unterbrochen: {e}")
+        finally:
+            for stream in (rfile, wfile, conn):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+            if worker is not None:
+                self._worker_gone(worker)
+
+    def _accept_result(self, worker: str, message: dict):
+        finished = []
+        with self._cond:
+            job = self._leased.get(message.get("job"))
+            if job is None:
+                # Nach Verbindungsabbruch neu eingereiht, aber noch nicht wieder vergeben
+                job = next((j for j in self._queue if j.id == message.get("job")), None)
+            if job is None or job.worker not in (None, worker) or job.attempt != message.get("attempt"):
+                debug_print(f"Verspätetes/doppeltes Ergebnis für Job {message.get('job')} von {worker} verworfen.")
+                return
+            if self._leased.pop(job.id, None) is None:
+                self._queue.remove(job)
+            if message.get("unavailable") and job.attempt < self.settings["max_attempts"]:
+                # Backend des Workers ist ausgefallen -> anderem Worker geben
+                self._requeue_locked(job, f"Backend von {worker} nicht verfügbar", finished)
+            else:
+                self.stats["completed"] += 1
+                finished.append((job, {key: message.get(key) for key in ("ok", "log", "error", "unavailable")}))
+        for job, result in finished:
+            self._complete(job, result)
+
+    def _worker_gone(self, worker: str):
+        given_up = []
+        with self._cond:
+            count = self._workers.get(worker, 1) - 1
+            if count > 0:
+                self._workers[worker] = count
+                return
+            self._workers.pop(worker, None)
+            for job in [j for j in self._leased.values() if j.worker == worker]:
+                del self._leased[job.id]
+                self._requeue_locked(job, f"Worker {worker} getrennt", given_up)
+        for job, result in given_up:
+            self._complete(job, result)
+
+
+_servers = {}                     # Adresse -> [JobServer, Anzahl Hotfolder]
+_servers_lock = threading.Lock()
+
+
+def get_job_server(settings: dict) -> JobServer:
+    """
+    Ein Job-Server pro Adresse; alle Hotfolder mit gleicher Adresse teilen ihn.
+    Jeder Aufruf muss mit release_job_server() freigegeben werden.
+    Wirft OSError (Adresse belegt o.ä.) bzw. ValueError (kein Token).
+    """
+    cfg = dict(DEFAULT_DISTRIBUTED)
+    cfg.update(settings or {})
+    with _servers_lock:
+        entry = _servers.get(cfg["listen"])
+        if entry is None:
+            server = JobServer(cfg)
+            server.start()
+            entry = _servers[cfg["listen"]] = [server, 0]
+        entry[1] += 1
+        return entry[0]
+
+
+def release_job_server(server: JobServer):
+    """Gibt den Server für einen Hotfolder frei; der letzte stoppt ihn und gibt die Adresse frei."""
+    with _servers_lock:
+        entry = _servers.get(server.address)
+        if entry is None or entry[0] is not server:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _servers[server.address]
+    server.stop()
+
+
+def stop_job_servers():
+    with _servers_lock:
+        servers = [server for server, _count in _servers.values()]
+        _servers.clear()
+    for server in servers:
+        server.stop()
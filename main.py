@@ -1,7 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from ui.main_window import main
+import argparse
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PRisM-RAC Hotfolder-Monitor")
+    parser.add_argument("--headless", action="store_true", help="Hotfolder ohne GUI starten")
+    parser.add_argument("--metrics-port", type=int, help="Port des /metrics-Endpunkts (überschreibt Konfiguration)")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    metrics_settings = {"port": args.metrics_port} if args.metrics_port else {}
+    if args.headless:
+        from headless import run_headless
+        run_headless(metrics_settings=metrics_settings)
+    else:
+        from ui.main_window import main
+        main(metrics_settings)
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Metrics – Laufzeit-Kennzahlen der Hotfolder (Latenz pro Schritt, Durchsatz, Warteschlangen,
+Wiederholungen/Fehler, Backend-Fehlerquoten).
+
+- Zähler und Histogramme werden im Hot Path nur mit einem kurzen Lock aktualisiert.
+- Momentanwerte (z.B. Warteschlangentiefen) werden erst beim Abruf über registrierte
+  Collector-Funktionen eingesammelt.
+- Ausgabe: HTTP-Endpunkt /metrics (Prometheus-Textformat), /metrics.json sowie ein
+  periodischer JSON-Snapshot. Konfiguration unter dem Schlüssel "metrics" der Konfigurationsdatei.
+- Über register_control() können weitere Pfade als Steuerschnittstelle eingehängt werden
+  (z.B. /profile im Headless-Betrieb).
+"""
+
+__all__ = ["REGISTRY", "Counter", "Gauge", "Histogram", "MetricsServer", "SnapshotWriter",
+           "start_metrics", "stop_metrics", "register_control", "unregister_control", "DEFAULT_METRICS"]
+
+import os
+import json
+import time
+import bisect
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+DEFAULT_METRICS = {
+    "enabled": True,
+    "host": "127.0.0.1",
+    "port": 9464,
+    "snapshot_path": "",          # leer = kein Snapshot
+    "snapshot_interval": 60
+}
+
+# Sekunden – von Header-Preflight (ms) bis Photoshop-Open großer PSBs (Minuten)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _label_str(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, key, value) for key, value in items]
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": dict(zip(self.labels, k)), "value": v} for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels):
+        """Kontextmanager: misst die Dauer des Blocks."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+        result = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                result.append((self.name + "_bucket", key + (_format_value(float(bound)),), cumulative))
+            result.append((self.name + "_sum", key, total))
+            result.append((self.name + "_count", key, count))
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+        result = []
+        for key, counts, total, count in items:
+            result.append({
+                "labels": dict(zip(self.labels, key)),
+                "count": count,
+                "sum": round(total, 6),
+                "p50": self._quantile(counts, count, 0.50),
+                "p95": self._quantile(counts, count, 0.95),
+                "p99": self._quantile(counts, count, 0.99)
+            })
+        return result
+
+    def _quantile(self, counts, count, q):
+        """Obergrenze des Buckets, in dem das Quantil liegt (wie histogram_quantile, ohne Interpolation)."""
+        if not count:
+            return None
+        target = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound if bound != float("inf") else None
+        return None
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _get_or_create(self, cls, name, help_text, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, labels, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._get_or_create(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labels, buckets=buckets)
+
+    def register_collector(self, key, func):
+        """func() wird bei jedem Abruf aufgerufen und aktualisiert Gauges (z.B. Warteschlangen)."""
+        with self._lock:
+            self._collectors[key] = func
+
+    def unregister_collector(self, key):
+        with self._lock:
+            self._collectors.pop(key, None)
+
+    def collect(self):
+        with self._lock:
+            collectors = list(self._collectors.values())
+            metrics = list(self._metrics.values())
+        for func in collectors:
+            try:
+                func()
+            except Exception as e:
+                debug_print(f"Fehler im Metrics-Collector: {e}")
+        return metrics
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self.collect():
+            lines.extend(metric.header())
+            label_names = metric.labels + (("le",) if metric.kind == "histogram" else ())
+            for name, key, value in metric.samples():
+                names = label_names if name.endswith("_bucket") else metric.labels
+                lines.append(f"{name}{_label_str(names, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        data = {"timestamp": time.time(), "uptime_seconds": round(time.time() - self.started, 3), "metrics": {}}
+        for metric in self.collect():
+            data["metrics"][metric.name] = {"type": metric.kind, "values": metric.snapshot()}
+        return data
+
+
+REGISTRY = MetricsRegistry()
+
+
+_controls = {}                    # Pfad -> func(method, params) -> dict
+
+
+def register_control(path: str, func):
+    """Hängt eine Steuerfunktion ein; ValueError wird als 400 beantwortet."""
+    _controls[path] = func
+
+
+def unregister_control(path: str):
+    _controls.pop(path, None)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        if path in _controls:
+            self._control(path, "POST", query)
+        else:
+            self._send(404, "not found\n", "text/plain")
+
+    def _control(self, path: str, method: str, query: str):
+        params = {key: values[-1] for key, values in parse_qs(query).items()}
+        try:
+            self._send(200, json.dumps(_controls[path](method, params), ensure_ascii=False), "application/json")
+        except ValueError as e:
+            self._send(400, json.dumps({"error": str(e)}, ensure_ascii=False), "application/json")
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path in _controls:
+            self._control(path, "GET", query)
+        elif path == "/metrics":
+            self._send(200, self.registry.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/metrics.json":
+            self._send(200, json.dumps(self.registry.snapshot()), "application/json")
+        else:
+            self._send(404, "not found\n", "text/plain")
+
+    def _send(self, status: int, body: str, content_type: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """Lokaler HTTP-Server für /metrics in einem Daemon-Thread."""
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, handler=_MetricsHandler):
+        self.host = host
+        self.port = port
+        self.handler = handler
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        self.httpd = ThreadingHTTPServer((self.host, self.port), self.handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+        self.thread.start()
+        debug_print(f"Metrics-Endpunkt: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+class SnapshotWriter:
+    """Schreibt in festem Intervall einen JSON-Snapshot aller Kennzahlen."""
+    def __init__(self, path: str, interval: float = 60, registry=REGISTRY):
+        self.path = path
+        self.interval = max(1.0, float(interval))
+        self.registry = registry
+        self._stop = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread:
+            self.thread.join()
+        self.write()
+
+    def write(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.registry.snapshot(), f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            debug_print(f"Fehler beim Schreiben des Metrics-Snapshots: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+
+_running = []
+
+
+def start_metrics(settings: dict = None):
+    """Startet HTTP-Endpunkt und Snapshot-Writer gemäß Konfiguration (Schlüssel "metrics")."""
+    cfg = dict(DEFAULT_METRICS)
+    cfg.update(settings or {})
+    if not cfg.get("enabled") or _running:
+        return None
+    server = MetricsServer(cfg["host"], int(cfg["port"]))
+    try:
+        server.start()
+        _running.append(server)
+    except OSError as e:
+        debug_print(f"Metrics-Endpunkt konnte nicht gestartet werden: {e}")
+        server = None
+    if cfg.get("snapshot_path"):
+        writer = SnapshotWriter(cfg["snapshot_path"], cfg["snapshot_interval"])
+        writer.start()
+        _running.append(writer)
+    return server
+
+
+def stop_metrics():
+    while _running:
+        _running.pop().stop()
+
+
+# --- Gemeinsame Kennzahlen ----------------------------------------------------
+
+STEP_DURATION = REGISTRY.histogram(
+    "prism_step_duration_seconds",
+    "Dauer der Verarbeitungsschritte (stability, preflight, open, contentcheck, additional_jsx, log_wait, evaluate, move)",
+    ("hotfolder", "step"))
+STAGE_DURATION = REGISTRY.histogram(
+    "prism_stage_duration_seconds", "Bearbeitungsdauer pro Pipeline-Stufe", ("hotfolder", "stage"))
+JOB_DURATION = REGISTRY.histogram(
+    "prism_job_duration_seconds", "Durchlaufzeit einer Datei vom Eintreffen bis zum Abschluss", ("hotfolder",))
+FILES_TOTAL = REGISTRY.counter(
+    "prism_files_total", "Abgeschlossene Dateien nach Ergebnis", ("hotfolder", "outcome"))
+FAULTS_TOTAL = REGISTRY.counter(
+    "prism_faults_total", "Dateien in Fault nach Grund", ("hotfolder", "reason"))
+RETRIES_TOTAL = REGISTRY.counter(
+    "prism_backend_retries_total", "Erneut eingereihte Jobs nach Backend-Absturz", ("hotfolder",))
+QUEUE_DEPTH = REGISTRY.gauge(
+    "prism_queue_depth", "Jobs pro Pipeline-Stufe (state=queued|active)", ("hotfolder", "stage", "state"))
+BACKEND_OPERATIONS = REGISTRY.counter(
+    "prism_backend_operations_total", "Backend-Aufrufe", ("backend", "operation"))
+BACKEND_ERRORS = REGISTRY.counter(
+    "prism_backend_errors_total", "Fehlgeschlagene Backend-Aufrufe", ("backend", "operation"))
+BACKEND_GAUGE = REGISTRY.gauge(
+    "prism_backend_state", "Zustand der Backend-Session (open_documents, memory_mb, generation)", ("backend", "field"))
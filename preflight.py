@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Preflight – technische Vorprüfung einer Datei, bevor sie in Photoshop geöffnet wird.
+
+Es werden ausschließlich Header und Resource-Blöcke gelesen (PSD/PSB, TIFF, JPEG, PNG):
+Abmessungen, Auflösung, Farbmodus, Bittiefe, Name des eingebetteten ICC-Profils
+und (sofern ohne Aufwand ermittelbar) die Anzahl der Ebenen.
+Die Regeln werden pro Hotfolder unter dem Schlüssel "preflight" konfiguriert.
+"""
+
+__all__ = ["read_header_info", "read_psd_layer_names", "check_preflight", "run_preflight", "DEFAULT_PREFLIGHT", "COLOR_MODES"]
+
+import os
+import struct
+import zlib
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+# Standardwerte der Preflight-Regeln (leere Listen / 0 = keine Einschränkung)
+DEFAULT_PREFLIGHT = {
+    "enabled": False,
+    "color_modes": [],
+    "bit_depths": [],
+    "min_width": 0,
+    "min_height": 0,
+    "min_resolution": 0,
+    "icc_profiles": [],
+    "require_icc_profile": False,
+    "min_layers": 0,
+    "reject_unknown_formats": False
+}
+
+COLOR_MODES = ["Bitmap", "Grayscale", "Indexed", "RGB", "CMYK", "Multichannel", "Duotone", "Lab"]
+
+_PSD_COLOR_MODES = {0: "Bitmap", 1: "Grayscale", 2: "Indexed", 3: "RGB", 4: "CMYK",
+                    7: "Multichannel", 8: "Duotone", 9: "Lab"}
+_TIFF_PHOTOMETRIC = {0: "Grayscale", 1: "Grayscale", 2: "RGB", 3: "Indexed", 5: "CMYK",
+                     6: "RGB", 8: "Lab", 9: "Lab", 10: "Lab"}
+_PNG_COLOR_TYPES = {0: "Grayscale", 2: "RGB", 3: "Indexed", 4: "Grayscale", 6: "RGB"}
+
+# Obergrenze für Blöcke, die tatsächlich eingelesen werden (ICC-Profile, Layer-Header)
+_MAX_BLOCK = 4 * 1024 * 1024
+
+
+class PreflightError(Exception):
+    """Header ist beschädigt oder abgeschnitten."""
+
+
+def _read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise PreflightError("Datei ist abgeschnitten (Header unvollständig)")
+    return data
+
+
+def _empty_info(file_format: str) -> dict:
+    return {
+        "format": file_format,
+        "width": None,
+        "height": None,
+        "resolution": None,
+        "color_mode": None,
+        "bit_depth": None,
+        "icc_profile": None,
+        "layer_count": None
+    }
+
+
+def icc_profile_name(profile: bytes):
+    """
+    Liefert die Beschreibung ('desc'-Tag) eines ICC-Profils (v2 'desc' und v4 'mluc').
+    """
+    if not profile or len(profile) < 132:
+        return None
+    try:
+        tag_count = struct.unpack(">I", profile[128:132])[0]
+        for i in range(min(tag_count, 256)):
+            entry = 132 + i * 12
+            sig, offset, size = struct.unpack(">4sII", profile[entry:entry + 12])
+            if sig != b"desc":
+                continue
+            data = profile[offset:offset + size]
+            if data[:4] == b"desc":
+                length = struct.unpack(">I", data[8:12])[0]
+                return data[12:12 + length].split(b"\0", 1)[0].decode("latin-1").strip() or None
+            if data[:4] == b"mluc":
+                records = struct.unpack(">I", data[8:12])[0]
+                if records:
+                    rec_len, rec_off = struct.unpack(">II", data[20:28])
+                    return data[rec_off:rec_off + rec_len].decode("utf-16-be", "ignore").strip("\0 ") or None
+            return None
+    except (struct.error, IndexError):
+        return None
+    return None
+
+
+def _fixed_to_float(value: int) -> float:
+    return value / 65536.0
+
+
+def _parse_psd_resources(f, length: int, info: dict):
+    """Durchläuft die Image Resources und liest nur Auflösung (1005) und ICC-Profil (1039)."""
+    end = f.tell() + length
+    while f.tell() + 12 <= end:
+        signature = _read_exact(f, 4)
+        if signature not in (b"8BIM", b"MeSa", b"AgHg", b"PHUT", b"DCSR"):
+            break
+        resource_id = struct.unpack(">H", _read_exact(f, 2))[0]
+        name_len = _read_exact(f, 1)[0]
+        f.seek(name_len + ((name_len + 1) % 2), os.SEEK_CUR)
+        size = struct.unpack(">I", _read_exact(f, 4))[0]
+        padded = size + (size % 2)
+        if resource_id == 1005 and size >= 16:
+            h_res, h_unit, _w_unit, v_res = struct.unpack(">IHHI", _read_exact(f, 12))
+            res = _fixed_to_float(h_res)
+            # ResolutionInfo: 1 = Pixel pro Inch, 2 = Pixel pro cm
+            info["resolution"] = round(res * 2.54, 2) if h_unit == 2 else round(res, 2)
+            f.seek(padded - 12, os.SEEK_CUR)
+        elif resource_id == 1039 and 0 < size <= _MAX_BLOCK:
+            info["icc_profile"] = icc_profile_name(_read_exact(f, size))
+            f.seek(padded - size, os.SEEK_CUR)
+        else:
+            f.seek(padded, os.SEEK_CUR)
+    f.seek(end)
+
+
+def _read_psd(f) -> dict:
+    header = _read_exact(f, 26)
+    version = struct.unpack(">H", header[4:6])[0]
+    info = _empty_info("PSB" if version == 2 else "PSD")
+    _channels, height, width, depth, mode = struct.unpack(">HIIHH", header[12:26])
+    info["width"] = width
+    info["height"] = height
+    info["bit_depth"] = depth
+    info["color_mode"] = _PSD_COLOR_MODES.get(mode, f"Unbekannt ({mode})")
+
+    color_data_len = struct.unpack(">I", _read_exact(f, 4))[0]
+    f.seek(color_data_len, os.SEEK_CUR)
+    resources_len = struct.unpack(">I", _read_exact(f, 4))[0]
+    _parse_psd_resources(f, resources_len, info)
+
+    # Layer and Mask Information: Länge (4 bzw. 8 Bytes bei PSB), dann Layer Info
+    size_fmt = ">Q" if version == 2 else ">I"
+    size_len = 8 if version == 2 else 4
+    try:
+        section_len = struct.unpack(size_fmt, _read_exact(f, size_len))[0]
+        if section_len == 0:
+            info["layer_count"] = 0
+        else:
+            layer_info_len = struct.unpack(size_fmt, _read_exact(f, size_len))[0]
+            if layer_info_len == 0:
+                info["layer_count"] = 0
+            else:
+                # Negative Anzahl: erster Alpha-Kanal enthält Transparenz
+                info["layer_count"] = abs(struct.unpack(">h", _read_exact(f, 2))[0])
+    except PreflightError:
+        info["layer_count"] = None
+    return info
+
+
+def read_psd_layer_names(file_path: str) -> list:
+    """
+    Liest die Namen aller Ebenen (inkl. Gruppen) aus einer PSD/PSB-Datei.
+    Bevorzugt den Unicode-Namen ('luni'), sonst den Pascal-Namen des Layer Records.
+    Wirft PreflightError bei beschädigten/abgeschnittenen Dateien.
+    """
+    with open(file_path, "rb") as f:
+        try:
+            return _read_psd_layer_names(f)
+        except (struct.error, IndexError):
+            raise PreflightError("Ebenen-Informationen konnten nicht gelesen werden")
+
+
+def _read_psd_layer_names(f) -> list:
+    names = []
+    header = _read_exact(f, 26)
+    if header[:4] != b"8BPS":
+        return names
+    psb = struct.unpack(">H", header[4:6])[0] == 2
+    size_fmt, size_len = (">Q", 8) if psb else (">I", 4)
+    f.seek(struct.unpack(">I", _read_exact(f, 4))[0], os.SEEK_CUR)
+    f.seek(struct.unpack(">I", _read_exact(f, 4))[0], os.SEEK_CUR)
+    if struct.unpack(size_fmt, _read_exact(f, size_len))[0] == 0:
+        return names
+    if struct.unpack(size_fmt, _read_exact(f, size_len))[0] == 0:
+        return names
+    count = abs(struct.unpack(">h", _read_exact(f, 2))[0])
+    for _ in range(count):
+        _read_exact(f, 16)
+        channels = struct.unpack(">H", _read_exact(f, 2))[0]
+        f.seek(channels * (2 + size_len), os.SEEK_CUR)
+        _read_exact(f, 12)
+        extra_len = struct.unpack(">I", _read_exact(f, 4))[0]
+        extra = _read_exact(f, extra_len)
+        pos = 0
+        for _block in range(2):  # Layer Mask Data, Blending Ranges
+            pos += 4 + struct.unpack(">I", extra[pos:pos + 4])[0]
+        name_len = extra[pos]
+        name = extra[pos + 1:pos + 1 + name_len].decode("latin-1")
+        pos += ((name_len + 1 + 3) // 4) * 4
+        while pos + 12 <= len(extra) and extra[pos:pos + 4] in (b"8BIM", b"8B64"):
+            key = extra[pos + 4:pos + 8]
+            length = struct.unpack(">I", extra[pos + 8:pos + 12])[0]
+            if key == b"luni" and length >= 4:
+                chars = struct.unpack(">I", extra[pos + 12:pos + 16])[0]
+                name = extra[pos + 16:pos + 16 + 2 * chars].decode("utf-16-be", "ignore").rstrip("\0")
+                break
+            pos += 12 + length
+        names.append(name)
+    return names
+
+
+def _tiff_layer_count(f, offset: int, size: int):
+    """Ebenenanzahl aus dem Photoshop-Block 'ImageSourceData' (Tag 37724)."""
+    signature = b"Adobe Photoshop Document Data Block\0"
+    f.seek(offset)
+    head = f.read(min(size, len(signature) + 16))
+    if not head.startswith(signature):
+        return None
+    block = head[len(signature):]
+    if len(block) < 14 or block[:4] not in (b"8BIM", b"8B64"):
+        return None
+    if block[4:8] not in (b"Layr", b"Lr16", b"Lr32"):
+        return None
+    return abs(struct.unpack(">h", block[12:14])[0])
+
+
+def _read_tiff(f) -> dict:
+    info = _empty_info("TIFF")
+    order = _read_exact(f, 2)
+    endian = "<" if order == b"II" else ">"
+    magic = struct.unpack(endian + "H", _read_exact(f, 2))[0]
+    big = magic == 43
+    if big:
+        _read_exact(f, 4)
+        ifd_offset = struct.unpack(endian + "Q", _read_exact(f, 8))[0]
+    else:
+        ifd_offset = struct.unpack(endian + "I", _read_exact(f, 4))[0]
+
+    f.seek(ifd_offset)
+    if big:
+        count = struct.unpack(endian + "Q", _read_exact(f, 8))[0]
+        entry_fmt, entry_len, inline_len = endian + "HHQ8s", 20, 8
+    else:
+        count = struct.unpack(endian + "H", _read_exact(f, 2))[0]
+        entry_fmt, entry_len, inline_len = endian + "HHI4s", 12, 4
+    type_sizes = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 16: 8}
+    type_codes = {1: "B", 2: "B", 3: "H", 4: "I", 5: "I", 7: "B", 16: "Q"}
+    entries = {}
+    for _ in range(min(count, 1024)):
+        tag, typ, n, raw = struct.unpack(entry_fmt, _read_exact(f, entry_len))
+        entries[tag] = (typ, n, raw)
+
+    def values(tag, limit=16):
+        if tag not in entries:
+            return []
+        typ, n, raw = entries[tag]
+        if typ not in type_sizes:
+            return []
+        size = type_sizes[typ] * n
+        if size <= inline_len:
+            data = raw[:size]
+        else:
+            pos = f.tell()
+            f.seek(struct.unpack(endian + ("Q" if big else "I"), raw)[0])
+            data = f.read(min(size, type_sizes[typ] * limit))
+            f.seek(pos)
+        n = min(n, limit, len(data) // type_sizes[typ])
+        if typ == 5:
+            nums = struct.unpack(endian + "I" * (2 * n), data[:8 * n])
+            return [nums[i] / nums[i + 1] if nums[i + 1] else 0 for i in range(0, len(nums), 2)]
+        return list(struct.unpack(endian + type_codes[typ] * n, data[:type_sizes[typ] * n]))
+
+    def offset_of(tag):
+        typ, n, raw = entries[tag]
+        return struct.unpack(endian + ("Q" if big else "I"), raw)[0], n
+
+    width = values(256)
+    height = values(257)
+    bits = values(258)
+    photometric = values(262)
+    info["width"] = width[0] if width else None
+    info["height"] = height[0] if height else None
+    info["bit_depth"] = bits[0] if bits else 1
+    if photometric:
+        info["color_mode"] = _TIFF_PHOTOMETRIC.get(photometric[0], f"Unbekannt ({photometric[0]})")
+        if photometric[0] in (0, 1) and info["bit_depth"] == 1:
+            info["color_mode"] = "Bitmap"
+    x_res = values(282)
+    if x_res:
+        unit = values(296)
+        # ResolutionUnit: 2 = Inch (Standard), 3 = Zentimeter
+        info["resolution"] = round(x_res[0] * 2.54, 2) if unit and unit[0] == 3 else round(x_res[0], 2)
+    if 34675 in entries:
+        offset, size = offset_of(34675)
+        if 0 < size <= _MAX_BLOCK:
+            f.seek(offset)
+            info["icc_profile"] = icc_profile_name(f.read(size))
+    if 37724 in entries:
+        offset, size = offset_of(37724)
+        info["layer_count"] = _tiff_layer_count(f, offset, size)
+    else:
+        info["layer_count"] = 1
+    return info
+
+
+def _read_jpeg(f) -> dict:
+    info = _empty_info("JPEG")
+    _read_exact(f, 2)
+    icc_chunks = {}
+    while True:
+        byte = f.read(1)
+        if not byte:
+            break
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            break
+        code = marker[0]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        if code == 0xD9 or code == 0xDA:
+            break
+        length = struct.unpack(">H", _read_exact(f, 2))[0]
+        payload_len = length - 2
+        if code in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+            precision, height, width, components = struct.unpack(">BHHB", _read_exact(f, 6))
+            info["width"] = width
+            info["height"] = height
+            info["bit_depth"] = precision
+            info["color_mode"] = {1: "Grayscale", 3: "RGB", 4: "CMYK"}.get(components, f"Unbekannt ({components})")
+            f.seek(payload_len - 6, os.SEEK_CUR)
+            break
+        if code == 0xE0 and payload_len >= 12:
+            data = _read_exact(f, payload_len)
+            if data[:5] == b"JFIF\0" and info["resolution"] is None:
+                units, x_density = struct.unpack(">BH", data[7:10])
+                if units == 1:
+                    info["resolution"] = float(x_density)
+                elif units == 2:
+                    info["resolution"] = round(x_density * 2.54, 2)
+        elif code == 0xE2 and payload_len > 14:
+            data = _read_exact(f, payload_len)
+            if data[:12] == b"ICC_PROFILE\0":
+                icc_chunks[data[12]] = data[14:]
+        elif code == 0xED and payload_len > 14:
+            data = _read_exact(f, payload_len)
+            if data.startswith(b"Photoshop 3.0\0"):
+                _parse_jpeg_photoshop_resources(data[14:], info)
+        else:
+            f.seek(payload_len, os.SEEK_CUR)
+    if icc_chunks:
+        profile = b"".join(icc_chunks[k] for k in sorted(icc_chunks))
+        info["icc_profile"] = icc_profile_name(profile)
+    if info["width"] is None:
+        raise PreflightError("Kein SOF-Marker gefunden (JPEG beschädigt?)")
+    info["layer_count"] = 1
+    return info
+
+
+def _parse_jpeg_photoshop_resources(data: bytes, info: dict):
+    pos = 0
+    while pos + 12 <= len(data) and data[pos:pos + 4] == b"8BIM":
+        resource_id = struct.unpack(">H", data[pos + 4:pos + 6])[0]
+        name_len = data[pos + 6]
+        pos += 7 + name_len + ((name_len + 1) % 2)
+        size = struct.unpack(">I", data[pos:pos + 4])[0]
+        pos += 4
+        if resource_id == 1005 and size >= 16:
+            h_res, h_unit = struct.unpack(">IH", data[pos:pos + 6])
+            res = _fixed_to_float(h_res)
+            info["resolution"] = round(res * 2.54, 2) if h_unit == 2 else round(res, 2)
+        pos += size + (size % 2)
+
+
+def _read_png(f) -> dict:
+    info = _empty_info("PNG")
+    _read_exact(f, 8)
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            break
+        length, chunk_type = struct.unpack(">I4s", head)
+        if chunk_type == b"IHDR":
+            width, height, depth, color_type = struct.unpack(">IIBB", _read_exact(f, 10))
+            info["width"] = width
+            info["height"] = height
+            info["bit_depth"] = depth
+            info["color_mode"] = _PNG_COLOR_TYPES.get(color_type, f"Unbekannt ({color_type})")
+            f.seek(length - 10 + 4, os.SEEK_CUR)
+        elif chunk_type == b"pHYs":
+            ppu_x, _ppu_y, unit = struct.unpack(">IIB", _read_exact(f, 9))
+            if unit == 1:
+                info["resolution"] = round(ppu_x * 0.0254, 2)
+            f.seek(length - 9 + 4, os.SEEK_CUR)
+        elif chunk_type == b"iCCP" and length <= _MAX_BLOCK:
+            data = _read_exact(f, length)
+            name, _, compressed = data.partition(b"\0")
+            try:
+                profile = zlib.decompress(compressed[1:])
+            except zlib.error:
+                profile = b""
+            info["icc_profile"] = icc_profile_name(profile) or name.decode("latin-1") or None
+            f.seek(4, os.SEEK_CUR)
+        elif chunk_type == b"sRGB":
+            info["icc_profile"] = info["icc_profile"] or "sRGB IEC61966-2.1"
+            f.seek(length + 4, os.SEEK_CUR)
+        elif chunk_type in (b"IDAT", b"IEND"):
+            break
+        else:
+            f.seek(length + 4, os.SEEK_CUR)
+    if info["width"] is None:
+        raise PreflightError("IHDR-Chunk fehlt (PNG beschädigt?)")
+    info["layer_count"] = 1
+    return info
+
+
+def read_header_info(file_path: str):
+    """
+    Liest die technischen Eckdaten einer Bilddatei aus den Headern.
+    Gibt None zurück, wenn das Format nicht unterstützt wird.
+    Wirft PreflightError bei beschädigten/abgeschnittenen Headern.
+    """
+    with open(file_path, "rb") as f:
+        magic = f.read(8)
+        f.seek(0)
+        try:
+            if magic[:4] == b"8BPS":
+                return _read_psd(f)
+            if magic[:4] in (b"II*\0", b"MM\0*", b"II+\0", b"MM\0+"):
+                return _read_tiff(f)
+            if magic[:3] == b"\xff\xd8\xff":
+                return _read_jpeg(f)
+            if magic == b"\x89PNG\r\n\x1a\n":
+                return _read_png(f)
+        except (struct.error, IndexError):
+            raise PreflightError("Header konnte nicht gelesen werden")
+    return None
+
+
+def check_preflight(info: dict, rules: dict) -> list:
+    """
+    Vergleicht die Header-Informationen mit den Preflight-Regeln des Hotfolders
+    und gibt die Liste der Ablehnungsgründe zurück (leer = bestanden).
+    """
+    reasons = []
+
+    color_modes = rules.get("color_modes", [])
+    if color_modes and info.get("color_mode") not in color_modes:
+        reasons.append(f"Farbmodus {info.get('color_mode')} nicht erlaubt (erlaubt: {', '.join(color_modes)})")
+
+    bit_depths = [int(b) for b in rules.get("bit_depths", [])]
+    if bit_depths and info.get("bit_depth") not in bit_depths:
+        reasons.append(f"Bittiefe {info.get('bit_depth')} Bit nicht erlaubt "
+                       f"(erlaubt: {', '.join(str(b) for b in bit_depths)} Bit)")
+
+    min_width = rules.get("min_width", 0)
+    if min_width and (info.get("width") or 0) < min_width:
+        reasons.append(f"Breite {info.get('width')} px unter Minimum {min_width} px")
+
+    min_height = rules.get("min_height", 0)
+    if min_height and (info.get("height") or 0) < min_height:
+        reasons.append(f"Höhe {info.get('height')} px unter Minimum {min_height} px")
+
+    min_resolution = rules.get("min_resolution", 0)
+    if min_resolution and (info.get("resolution") or 0) < min_resolution:
+        reasons.append(f"Auflösung {info.get('resolution')} ppi unter Minimum {min_resolution} ppi")
+
+    profile = info.get("icc_profile")
+    icc_profiles = rules.get("icc_profiles", [])
+    if not profile and (rules.get("require_icc_profile") or icc_profiles):
+        reasons.append("Kein eingebettetes ICC-Profil")
+    elif profile and icc_profiles:
+        # Teilstring-Vergleich, damit z.B. "Adobe RGB" auch "Adobe RGB (1998)" trifft
+        if not any(p.strip().lower() in profile.lower() for p in icc_profiles if p.strip()):
+            reasons.append(f"ICC-Profil '{profile}' nicht erlaubt (erlaubt: {', '.join(icc_profiles)})")
+
+    min_layers = rules.get("min_layers", 0)
+    layer_count = info.get("layer_count")
+    if min_layers and layer_count is not None and layer_count < min_layers:
+        reasons.append(f"Nur {layer_count} Ebene(n), mindestens {min_layers} erforderlich")
+
+    return reasons
+
+
+def run_preflight(file_path: str, hf_config: dict):
+    """
+    Führt den Preflight gemäß hf_config["preflight"] aus.
+    Rückgabe: (info, reasons) – info ist None bei unbekanntem Format oder Lesefehler.
+    """
+    rules = dict(DEFAULT_PREFLIGHT)
+    rules.update(hf_config.get("preflight", {}))
+    if not rules.get("enabled"):
+        return None, []
+
+    try:
+        info = read_header_info(file_path)
+    except (OSError, PreflightError) as e:
+        debug_print(f"Preflight: Header von {file_path} nicht lesbar: {e}")
+        return None, [f"Header nicht lesbar: {e}"]
+
+    if info is None:
+        if rules.get("reject_unknown_formats"):
+            return None, ["Dateiformat wird nicht unterstützt"]
+        debug_print(f"Preflight: Unbekanntes Format, überspringe: {file_path}")
+        return None, []
+
+    reasons = check_preflight(info, rules)
+    debug_print(f"Preflight {os.path.basename(file_path)}: {info} -> {reasons or 'OK'}")
+    return info, reasons
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Profiling zur Laufzeit – zeichnet für ein festes Zeitfenster auf, was ein Hotfolder tut,
+ohne den Prozess unter einem Profiler neu zu starten (GUI-Statusleiste bzw. Headless-Steuerung).
+
+- CPU: Sampling der Threads des Hotfolders (sys._current_frames, Wall-Clock, also
+  inklusive Wartezeiten), geschrieben als pstats-Datei (cpu.pstats, z.B. für snakeviz) und als
+  gefaltete Stacks (cpu.folded, für flamegraph.pl oder speedscope). Welche Threads dazugehören,
+  meldet der Monitor selbst ({Thread-Ident: Stufe}); Thread-Namen werden nicht ausgewertet,
+  da Hotfolder-Namen beliebige Zeichen enthalten können.
+- Speicher: tracemalloc-Snapshots zu Beginn und Ende (memory_*.tracemalloc) und die größten
+  Zuwächse als Text (memory_top.txt). tracemalloc gilt für den ganzen Prozess.
+- Aufrufe: Dauer jedes Aufrufs von is_file_stable, generate_jsx_script, move_file und der
+  Backend-Operationen (calls.json). Die Messpunkte kosten ohne laufendes Profil nur eine Abfrage.
+
+Ausgabe: <logfiles_dir>/profile_<name>_<zeitstempel>/
+"""
+
+__all__ = ["DEFAULT_PROFILING", "ProfilingSession", "profiled", "call_timer"]
+
+import os
+import sys
+import json
+import time
+import marshal
+import functools
+import threading
+import contextlib
+import tracemalloc
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+# Standardwerte (pro Hotfolder unter "profiling" überschreibbar)
+DEFAULT_PROFILING = {
+    "duration": 60,               # Sekunden
+    "sample_interval": 0.01,      # Abstand der CPU-Samples
+    "memory_frames": 10,          # Stacktiefe von tracemalloc
+    "top_allocations": 30         # Einträge in memory_top.txt
+}
+
+_active = {}                      # Schlüssel (z.B. Monitor) -> laufende ProfilingSession
+_active_lock = threading.Lock()
+_tracemalloc_users = 0
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def _session_for_current_thread():
+    ident = threading.get_ident()
+    for session in list(_active.values()):
+        if ident in session.thread_stages:
+            return session
+    return None
+
+
+class _CallTimer:
+    __slots__ = ("label", "session", "start")
+
+    def __init__(self, label: str, session):
+        self.label = label
+        self.session = session
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.session.record_call(self.label, time.perf_counter() - self.start)
+        return False
+
+
+def call_timer(label: str):
+    """Kontextmanager, der die Dauer misst, falls für den aktuellen Thread ein Profil läuft."""
+    if not _active:
+        return _NULL_TIMER
+    session = _session_for_current_thread()
+    if session is None:
+        return _NULL_TIMER
+    return _CallTimer(label, session)
+
+
+def profiled(label: str):
+    """Dekorator für Funktionen, deren Aufrufe im Profil einzeln gemessen werden."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with call_timer(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _func_key(code) -> tuple:
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def _func_label(key: tuple) -> str:
+    filename, line, name = key
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class ProfilingSession:
+    """
+    Ein Profil-Fenster für die Threads, die threads() liefert ({Thread-Ident: Stufe}; wird bei
+    jedem Sample neu abgefragt). key: höchstens ein laufendes Profil pro Schlüssel.
+    """
+
+    def __init__(self, name: str, threads, output_dir: str, settings: dict = None, on_finished=None,
+                 key=None):
+        self.settings = dict(DEFAULT_PROFILING)
+        self.settings.update(settings or {})
+        self.name = name
+        self.threads = threads
+        self.thread_stages = {}       # zuletzt gemeldete Threads (Ident -> Stufe)
+        self.key = key if key is not None else id(self)
+        self.output_dir = output_dir
+        self.on_finished = on_finished
+        self.started = None
+        self.finished = None
+        self.samples = 0
+        self._stats = {}              # Funktion -> [Samples gesamt, Samples als Blatt, {Aufrufer: Samples}]
+        self._folded = {}             # "a;b;c" -> Samples
+        self._calls = {}              # Messpunkt -> [Dauern]
+        self._calls_lock = threading.Lock()
+        self._memory_start = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def for_config(cls, hf_config: dict, threads, duration: float = None, on_finished=None, key=None):
+        settings = dict(hf_config.get("profiling", {}))
+        if duration:
+            settings["duration"] = duration
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in hf_config.get("name", "hotfolder"))
+        directory = hf_config.get("logfiles_dir") or hf_config.get("monitor_dir", "")
+        output_dir = os.path.join(directory, f"profile_{safe_name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        return cls(hf_config.get("name", "hotfolder"), threads, output_dir, settings, on_finished, key)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self.finished is None
+
+    def status(self) -> dict:
+        remaining = None
+        if self.running:
+            remaining = max(0.0, self.started + self.settings["duration"] - time.monotonic())
+        return {"running": self.running, "output_dir": self.output_dir, "samples": self.samples,
+                "remaining_seconds": remaining}
+
+    # --- Lebenszyklus ----------------------------------------------------------------
+
+    def start(self):
+        global _tracemalloc_users
+        with _active_lock:
+            if self.key in _active:
+                raise RuntimeError(f"Für {self.name} läuft bereits ein Profil")
+            self.thread_stages = dict(self.threads())
+            _active[self.key] = self
+            if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(self.settings["memory_frames"])
+            _tracemalloc_users += 1
+        self._memory_start = tracemalloc.take_snapshot()
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.name}", daemon=True)
+        self._thread.start()
+        debug_print(f"Profil für {self.name} gestartet ({self.settings['duration']} s) -> {self.output_dir}")
+
+    def stop(self):
+        """Beendet das Fenster vorzeitig; die Dateien werden trotzdem geschrieben."""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        deadline = self.started + self.settings["duration"]
+        interval = self.settings["sample_interval"]
+        try:
+            while not self._stop.is_set() and time.monotonic() < deadline:
+                self._sample()
+                self._stop.wait(interval)
+        finally:
+            self._finish()
+
+    # --- Messung --------------------------------------------------------------------------
+
+    def _sample(self):
+        self.thread_stages = stages = dict(self.threads())
+        for ident, frame in sys._current_frames().items():
+            stage = stages.get(ident)
+            if stage is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_func_key(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            if not stack:
+                continue
+            self.samples += 1
+            # Wurzel des Flamegraphs: Stufe (z.B. "backend")
+            folded = ";".join([stage] + [_func_label(key) for key in stack])
+            self._folded[folded] = self._folded.get(folded, 0) + 1
+            seen = set()
+            for depth, key in enumerate(stack):
+                entry = self._stats.setdefault(key, [0, 0, {}])
+                if key not in seen:
+                    entry[0] += 1
+                    seen.add(key)
+                if depth:
+                    caller = stack[depth - 1]
+                    entry[2][caller] = entry[2].get(caller, 0) + 1
+            self._stats[stack[-1]][1] += 1
+
+    def record_call(self, label: str, seconds: float):
+        with self._calls_lock:
+            self._calls.setdefault(label, []).append(seconds)
+
+    # --- Ausgabe ----------------------------------------------------------------------------
+
+    def _finish(self):
+        global _tracemalloc_users
+        with _active_lock:
+            _active.pop(self.key, None)
+        memory_end = tracemalloc.take_snapshot()
+        with _active_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0:
+                tracemalloc.stop()
+        self.finished = time.monotonic()
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._write_cpu()
+            self._write_memory(memory_end)
+            self._write_calls()
+            debug_print(f"Profil für {self.name} geschrieben: {self.output_dir}")
+        except OSError as e:
+            debug_print(f"Fehler beim Schreiben des Profils: {e}")
+        if self.on_finished:
+            self.on_finished(self)
+
+    def _write_cpu(self):
+        # Format von pstats.Stats.dump_stats: {func: (cc, nc, tt, ct, {caller: (cc, nc, tt, ct)})}
+        dt = self.settings["sample_interval"]
+        stats = {}
+        for key, (total, leaf, callers) in self._stats.items():
+            stats[key] = (total, total, leaf * dt, total * dt,
+                          {caller: (count, count, 0.0, count * dt) for caller, count in callers.items()})
+        with open(os.path.join(self.output_dir, "cpu.pstats"), "wb") as f:
+            marshal.dump(stats, f)
+        with open(os.path.join(self.output_dir, "cpu.folded"), "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._folded.items()):
+                f.write(f"{stack} {count}\n")
+
+    def _write_memory(self, memory_end):
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        start = self._memory_start.filter_traces(filters)
+        end = memory_end.filter_traces(filters)
+        start.dump(os.path.join(self.output_dir, "memory_start.tracemalloc"))
+        end.dump(os.path.join(self.output_dir, "memory_end.tracemalloc"))
+        with open(os.path.join(self.output_dir, "memory_top.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Größte Speicherzuwächse ({self.name}, gesamter Prozess)\n")
+            for stat in end.compare_to(start, "lineno")[:self.settings["top_allocations"]]:
+                f.write(f"{stat}\n")
+
+    def _write_calls(self):
+        summary = {}
+        with self._calls_lock:
+            calls = {label: sorted(durations) for label, durations in self._calls.items()}
+        for label, durations in sorted(calls.items()):
+            count = len(durations)
+            summary[label] = {
+                "count": count,
+                "total": round(sum(durations), 6),
+                "mean": round(sum(durations) / count, 6),
+                "p50": round(durations[int(0.50 * (count - 1))], 6),
+                "p95": round(durations[int(0.95 * (count - 1))], 6),
+                "max": round(durations[-1], 6)
+            }
+        result = {
+            "hotfolder": self.name,
+            "duration_seconds": round(self.finished - self.started, 3),
+            "sample_interval": self.settings["sample_interval"],
+            "cpu_samples": self.samples,
+            "calls": summary
+        }
+        with open(os.path.join(self.output_dir, "calls.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Record-Cache – speichert pro verarbeiteter Datei das vollständige Contentcheck-Ergebnis
+(alle bekannten Metadatenfelder und alle Ebenennamen, nicht nur die geforderten).
+Optional pro Hotfolder ("records": {"enabled": true}), da das Contentcheck-JSX dafür alle
+Felder liest und alle Ebenen durchläuft.
+
+Ändern sich required_metadata oder required_layers, können die Dateien in fault_dir anhand
+dieser Datensätze neu bewertet werden, ohne sie erneut in Photoshop zu öffnen
+(siehe reevaluate_faults in hotfolder_monitor.py).
+
+Format: JSON Lines unter <logfiles_dir>/records_<name>.jsonl, eine Zeile pro Verschiebung
+    {"file": Pfad relativ zum monitor_dir ("/"-getrennt), "dir": "success"|"fault",
+     "time": Zeitstempel, "record": Contentcheck-Log, "partners": [Partnerdateien der Gruppe, optional]}
+Der letzte Eintrag pro Pfad gilt; beim Neubewerten wird die Datei verdichtet. Unterordner werden
+in success_dir/fault_dir gespiegelt, gleichnamige Dateien aus verschiedenen Ordnern bleiben getrennt.
+Einträge von Dateien direkt im monitor_dir (nur Dateiname) bleiben damit gültig.
+"""
+
+__all__ = ["DEFAULT_RECORDS", "RecordCache", "records_enabled", "evaluate_contentcheck"]
+
+import os
+import json
+import time
+import threading
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+# Standardwerte (pro Hotfolder unter "records" überschreibbar)
+DEFAULT_RECORDS = {
+    "enabled": False,             # vollständigen Datensatz erfassen und speichern (liest alle Felder/Ebenen)
+    "path": ""                    # leer = <logfiles_dir>/records_<name>.jsonl
+}
+
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+
+
+def records_enabled(hf_config: dict) -> bool:
+    return bool(hf_config.get("records", {}).get("enabled", DEFAULT_RECORDS["enabled"]))
+
+
+def evaluate_contentcheck(contentcheck: dict, hf_config: dict):
+    """
+    Vergleicht ein Contentcheck-Ergebnis mit required_metadata/required_layers.
+    Rückgabe: (fehlende Felder {feld: wert}, fehlende Ebenen [...], unbekannt [...]).
+    "unbekannt" sind geforderte Felder/Ebenen, die das Ergebnis gar nicht enthält – bei der
+    Live-Auswertung zählen Felder davon als fehlend, beim Neubewerten ist keine Aussage möglich.
+    """
+    metadata = contentcheck.get("metadata", {})
+    var_missing = {}
+    unknown = []
+    for field in hf_config.get("required_metadata", []):
+        if field in metadata:
+            val = metadata[field]
+        else:
+            val = "undefined"
+            unknown.append(field)
+        if val.strip().lower() == "undefined" or val.strip() == "":
+            var_missing[field] = val
+
+    # Ebenen werden nur geprüft, wenn das JSX sie gemeldet hat (nicht im interaktiven Template)
+    var_missing_layers = []
+    layer_names = contentcheck.get("layer_names")
+    layers = contentcheck.get("layers")
+    for layer in hf_config.get("required_layers", []):
+        if layer_names is not None:
+            found = layer in layer_names
+        elif layers is not None:
+            if layer not in layers:
+                unknown.append(layer)
+            found = bool(layers.get(layer))
+        else:
+            unknown.append(layer)
+            continue
+        if not found:
+            var_missing_layers.append(layer)
+    return var_missing, var_missing_layers, unknown
+
+
+class RecordCache:
+    def __init__(self, path: str):
+        self.path = path
+        with _path_locks_lock:
+            # Monitor und Neubewertung können gleichzeitig auf dieselbe Datei zugreifen
+            self._lock = _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    @classmethod
+    def for_config(cls, hf_config: dict):
+        """Cache gemäß hf_config["records"] oder None, falls nicht aktiviert."""
+        if not records_enabled(hf_config):
+            return None
+        path = hf_config.get("records", {}).get("path", "")
+        if not path:
+            name = "".join(c if c.isalnum() or c in "-_" else "_" for c in hf_config.get("name", "hotfolder"))
+            directory = hf_config.get("logfiles_dir") or hf_config.get("monitor_dir", "")
+            path = os.path.join(directory, f"records_{name}.jsonl")
+        return cls(path)
+
+    def add(self, rel_path: str, location: str, record: dict, partners=None):
+        entry = {"file": rel_path, "dir": location, "time": round(time.time(), 3), "record": record}
+        if partners:
+            entry["partners"] = partners          # mitverschobene Dateien der Gruppe (file_groups.py)
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory and not os.path.exists(directory):
+                    os.makedirs(directory)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                debug_print(f"Fehler beim Speichern des Datensatzes: {e}")
+
+    def load(self) -> dict:
+        """Letzter Eintrag pro Datei: {relativer pfad: {"file", "dir", "time", "record"}}."""
+        with self._lock:
+            return self._read()
+
+    def _read(self) -> dict:
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue          # abgebrochene letzte Zeile
+                entries[entry["file"]] = entry
+        return entries
+
+    def save(self, entries: dict):
+        """
+        Schreibt die Einträge verdichtet (ein Eintrag pro Datei) zurück. Einträge, die seit load()
+        hinzugekommen sind (laufender Monitor), haben Vorrang und gehen nicht verloren.
+        """
+        with self._lock:
+            merged = dict(entries)
+            for file_name, entry in self._read().items():
+                if entry["time"] > merged.get(file_name, {}).get("time", 0):
+                    merged[file_name] = entry
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in merged.values():
+                    f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Gemeinsame Fixtures der Tests (Aufruf aus dem Projektverzeichnis: python -m pytest -q)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def hotfolder(tmp_path):
+    """Minimale Hotfolder-Konfiguration mit eigenen Ordnern unter tmp_path."""
+    dirs = {key: tmp_path / key for key in ("monitor", "success", "fault", "logfiles")}
+    for path in dirs.values():
+        path.mkdir()
+    return {
+        "name": "test",
+        "monitor_dir": str(dirs["monitor"]),
+        "success_dir": str(dirs["success"]),
+        "fault_dir": str(dirs["fault"]),
+        "logfiles_dir": str(dirs["logfiles"]),
+        "required_metadata": [],
+        "required_layers": []
+    }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dokument-Lebenszyklus und Recycling der Backend-Session (backend/backend_session.py)
+gegen das simulierte Backend, inklusive Absturz -> erneutes Einreihen -> Fault.
+"""
+
+import os
+import json
+
+import pytest
+
+from backend.backend_session import BackendSession
+from backend.photoshop_backend import BackendUnavailable, PhotoshopBackend
+from backend.simulated_backend import SimulatedBackend
+from benchmark.workload import build_xmp_packet, psd_bytes
+from hotfolder_monitor import HotfolderMonitor, fail_log_path
+
+# Einfaches Speichermodell: 100 MB Grundbedarf + 10 MB pro offenem Dokument + Leck pro Dokument
+MEMORY_MODEL = {"open_latency": 0, "jsx_latency": 0, "close_latency": 0, "purge_latency": 0,
+                "restart_latency": 0, "base_memory_mb": 100, "document_memory_mb": 10,
+                "size_factor": 0, "cache_growth_mb": 0, "leak_mb": 10, "seed": 1}
+
+
+def _session(simulated: dict = None, **settings) -> BackendSession:
+    backend = SimulatedBackend(dict(MEMORY_MODEL, **(simulated or {})))
+    return BackendSession(backend, dict({"purge_every": 0, "recycle_after_documents": 0}, **settings))
+
+
+def _write(tmp_path, name: str, data: bytes = None) -> str:
+    path = tmp_path / name
+    path.write_bytes(data if data is not None else psd_bytes(10, 10, layers=["Freisteller"]))
+    return str(path)
+
+
+def _process(session: BackendSession, hf_config: dict, path: str, name: str):
+    assert session.open(path, name)
+    assert session.contentcheck(hf_config, path)
+    session.release(name)
+
+
+def test_documents_are_closed_without_saving(tmp_path, hotfolder):
+    session = _session()
+    paths = [_write(tmp_path, f"{index}.psd") for index in range(3)]
+    original = [open(path, "rb").read() for path in paths]
+    for index, path in enumerate(paths):
+        _process(session, hotfolder, path, f"{index}.psd")
+        assert session.backend.documents == {}
+    assert session.open_documents == set()
+    assert session.stats["opened"] == session.stats["closed"] == 3
+    assert session.backend.stats["closed"] == 3
+    assert [open(path, "rb").read() for path in paths] == original
+    # Photoshop schließt mit DONOTSAVECHANGES
+    assert "SaveOptions.DONOTSAVECHANGES" in PhotoshopBackend._close_code("0.psd")
+
+
+def test_close_documents_can_be_disabled(tmp_path, hotfolder):
+    session = _session(close_documents=False)
+    _process(session, hotfolder, _write(tmp_path, "a.psd"), "a.psd")
+    assert session.stats["closed"] == 0
+    assert list(session.backend.documents) == ["a.psd"]
+
+
+def test_purge_every(tmp_path, hotfolder):
+    session = _session({"cache_growth_mb": 20}, purge_every=2)
+    path = _write(tmp_path, "a.psd")
+    for _ in range(5):
+        _process(session, hotfolder, path, "a.psd")
+    assert session.stats["purges"] == 2
+    assert session.backend.stats["purges"] == 2
+    # Nach dem letzten Purge nur ein Dokument mit Open + Contentcheck im Cache
+    assert session.backend.cache_mb == 40
+    assert session.generation == 0
+
+
+def test_recycle_after_documents(tmp_path, hotfolder):
+    session = _session(recycle_after_documents=3)
+    path = _write(tmp_path, "a.psd")
+    for _ in range(7):
+        _process(session, hotfolder, path, "a.psd")
+    assert session.stats["recycles"] == 2
+    assert session.generation == 2
+    assert session.backend.stats["restarts"] == 2
+    assert session.documents_since_restart == 1
+    # Das Leck wird nur durch den Neustart freigegeben
+    assert session.backend.memory_usage_mb() == 110
+
+
+def test_recycle_memory_mb(tmp_path, hotfolder):
+    session = _session(recycle_memory_mb=130)
+    path = _write(tmp_path, "a.psd")
+    memory = []
+    for _ in range(4):
+        _process(session, hotfolder, path, "a.psd")
+        memory.append(session.backend.memory_usage_mb())
+    # Leck 110 -> 120 -> 130 (Recycling) -> 110
+    assert memory == [110, 120, 100, 110]
+    assert session.stats["recycles"] == 1
+    assert session.generation == 1
+
+
+def test_lost_document_is_reopened_for_additional_jsx(tmp_path, hotfolder):
+    session = _session(recycle_after_documents=1)
+    path = _write(tmp_path, "a.psd")
+    assert session.open(path, "a.psd")
+    session._restart()
+    assert not session.is_open("a.psd")
+    assert session.additional("zusatz.jsx", path, "a.psd")
+    assert session.stats["opened"] == 2
+
+
+def test_crash_restarts_backend_and_raises(tmp_path, hotfolder):
+    session = _session({"crash_memory_mb": 125})
+    path = _write(tmp_path, "a.psd")
+    _process(session, hotfolder, path, "a.psd")       # 110 MB
+    _process(session, hotfolder, path, "a.psd")       # 120 MB
+    with pytest.raises(BackendUnavailable):
+        session.open(path, "a.psd")                   # 130 MB -> Absturz
+    assert session.stats["crashes"] == 1
+    assert session.backend.stats["crashes"] == 1
+    assert session.generation == 1
+    assert session.backend.is_alive()
+    assert session.open_documents == set()
+    _process(session, hotfolder, path, "a.psd")       # nach dem Neustart wieder 110 MB
+
+
+def test_jsx_failure_is_not_a_crash(tmp_path, hotfolder):
+    session = _session({"jsx_failure_rate": 1.0})
+    path = _write(tmp_path, "a.psd")
+    assert session.open(path, "a.psd")
+    assert not session.contentcheck(hotfolder, path)
+    assert session.stats["crashes"] == 0
+
+
+def _monitor(hotfolder, request, simulated: dict, max_retries: int) -> HotfolderMonitor:
+    hotfolder["backend"] = {"type": "simulated", "session": request.node.name, "max_retries": max_retries,
+                            "purge_every": 0, "recycle_after_documents": 0,
+                            "simulated": dict(MEMORY_MODEL, **simulated)}
+    hotfolder["pipeline"] = {"stable_interval": 0, "stable_checks": 1, "log_timeout": 1}
+    return HotfolderMonitor(hotfolder)
+
+
+def _write_monitor(hotfolder, name: str) -> str:
+    path = os.path.join(hotfolder["monitor_dir"], name)
+    with open(path, "wb") as f:
+        f.write(psd_bytes(10, 10, layers=["Freisteller"]))
+    return path
+
+
+def test_crash_requeues_job(hotfolder, request):
+    monitor = _monitor(hotfolder, request, {"crash_memory_mb": 125}, max_retries=2)
+    paths = [_write_monitor(hotfolder, f"{index}.psd") for index in range(3)]
+    for path in paths:
+        monitor.process_file(path)
+    # Der dritte Job lässt das Backend abstürzen und läuft nach dem Neustart erneut durch
+    session = monitor.backend_session
+    assert session.stats["crashes"] == 1
+    assert session.generation == 1
+    assert sorted(os.listdir(hotfolder["success_dir"])) == ["0.psd", "1.psd", "2.psd"]
+    assert session.open_documents == set()
+
+
+def test_crash_after_max_retries_moves_to_fault(hotfolder, request):
+    # Jedes Öffnen überschreitet das Limit -> jeder Versuch stürzt ab
+    monitor = _monitor(hotfolder, request, {"crash_memory_mb": 105}, max_retries=2)
+    monitor.process_file(_write_monitor(hotfolder, "a.psd"))
+    session = monitor.backend_session
+    assert session.stats["crashes"] == 3
+    assert session.generation == 3
+    assert os.listdir(hotfolder["fault_dir"]) == ["a.psd"]
+    assert os.listdir(hotfolder["success_dir"]) == []
+    with open(fail_log_path(hotfolder["logfiles_dir"], "a.psd"), encoding="utf-8") as f:
+        assert "abgestürzt" in json.load(f)["backend"]
+
+
+def test_simulated_contentcheck(tmp_path, hotfolder):
+    xmp = build_xmp_packet({"documentTitle": "Titel", "author": "Autorin"})
+    path = _write(tmp_path, "a.psd", psd_bytes(10, 10, layers=["Freisteller"], xmp=xmp))
+    hotfolder["required_metadata"] = ["documentTitle", "author", "copyrightNotice"]
+    hotfolder["required_layers"] = ["Freisteller", "Schatten"]
+    result = SimulatedBackend.read_contentcheck(path, hotfolder)
+    assert result["metadata"]["documentTitle"] == "Titel"
+    assert result["metadata"]["author"] == "Autorin"
+    assert result["layers"] == {"Freisteller": True, "Schatten": False}
+
+
+def test_simulated_contentcheck_with_corrupt_layers(tmp_path, hotfolder):
+    data = bytearray(psd_bytes(10, 10, layers=["Freisteller"]))
+    name_len = data.index(b"Freisteller") - 1
+    data[name_len] = 200          # Pascal-Name länger als der Extra-Block
+    path = _write(tmp_path, "bad.psd", bytes(data))
+    hotfolder["required_layers"] = ["Freisteller"]
+    result = SimulatedBackend.read_contentcheck(path, hotfolder)
+    assert result["layers"] == {"Freisteller": False}
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Dateigruppen (file_groups.py): sofortige Übergabe, Partner-Timeout und freigegebene Partner."""
+
+import os
+import queue
+
+import pytest
+
+from file_groups import FileGrouper
+
+
+@pytest.fixture
+def grouper(tmp_path):
+    ready = queue.Queue()
+    grouper = FileGrouper({"enabled": True, "partner_timeout": 0.3}, ready.put)
+    grouper.start()
+    grouper.ready = ready
+    grouper.dir = str(tmp_path)
+    yield grouper
+    grouper.stop()
+
+
+def _path(grouper, name: str) -> str:
+    return os.path.join(grouper.dir, name)
+
+
+def test_pair_is_ready_immediately(grouper):
+    assert grouper.add(_path(grouper, "bild.psd"))
+    assert grouper.add(_path(grouper, "bild.JPG"))
+    group = grouper.ready.get(timeout=0.1)
+    assert group.primary == _path(grouper, "bild.psd")
+    assert group.partners == {".jpg": _path(grouper, "bild.JPG")}
+    assert grouper.pending_count() == 0
+
+
+def test_sidecar_with_double_extension(grouper):
+    grouper.add(_path(grouper, "foto.cr2.xmp"))
+    grouper.add(_path(grouper, "foto.cr2"))
+    group = grouper.ready.get(timeout=0.1)
+    assert group.primary == _path(grouper, "foto.cr2")
+    assert list(group.partners) == [".xmp"]
+
+
+def test_primary_alone_after_timeout(grouper):
+    grouper.add(_path(grouper, "bild.psd"))
+    with pytest.raises(queue.Empty):
+        grouper.ready.get(timeout=0.1)
+    group = grouper.ready.get(timeout=2)
+    assert group.primary == _path(grouper, "bild.psd")
+    assert group.partners == {}
+
+
+def test_partner_alone_after_timeout(grouper):
+    grouper.add(_path(grouper, "proof.jpg"))
+    group = grouper.ready.get(timeout=2)
+    assert group.primary is None
+    assert group.partners == {".jpg": _path(grouper, "proof.jpg")}
+
+
+@pytest.mark.parametrize("order", [("bild.xmp", "bild.psd"), ("bild.psd", "bild.xmp")])
+def test_partner_outside_rule_is_released_immediately(grouper, order):
+    for name in order:
+        grouper.add(_path(grouper, name))
+    released = grouper.ready.get(timeout=0.1)
+    assert released.primary is None
+    assert released.partners == {".xmp": _path(grouper, "bild.xmp")}
+    assert ".xmp" in grouper.sidecar_exts
+    # Die PSD wartet weiter auf ihr JPEG
+    assert grouper.pending_count() == 1
+
+
+def test_unrelated_files_are_not_grouped(grouper):
+    assert not grouper.add(_path(grouper, "notiz.txt"))
+    assert grouper.add(_path(grouper, "a.psd"))
+    assert not grouper.add(_path(grouper, "a.psb"))      # zweite Primärdatei gleichen Namens
+
+
+def test_stop_returns_waiting_files(tmp_path):
+    grouper = FileGrouper({"enabled": True, "partner_timeout": 60}, lambda group: None)
+    grouper.start()
+    grouper.add(str(tmp_path / "a.psd"))
+    grouper.add(str(tmp_path / "b.jpg"))
+    assert sorted(grouper.stop()) == [str(tmp_path / "a.psd"), str(tmp_path / "b.jpg")]
+
+
+def test_disabled_by_default():
+    assert FileGrouper.for_config({}, lambda group: None) is None
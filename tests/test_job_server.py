@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Protokoll zwischen Job-Server (job_server.py) und Worker-Agenten (worker_agent.py)."""
+
+import os
+import sys
+import json
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+import threading
+import concurrent.futures
+
+import pytest
+
+from backend.photoshop_backend import BackendUnavailable
+from benchmark.workload import build_xmp_packet, psd_bytes
+from job_server import TOKEN_ENV, JobServer, get_job_server, parse_address, read_message, release_job_server, send_message
+from worker_agent import WorkerAgent
+
+TOKEN = "test-token"
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _RawClient:
+    """Worker ohne Backend: sendet Protokollnachrichten von Hand."""
+
+    def __init__(self, address: str):
+        family, target = parse_address(address)
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.settimeout(5)
+        self.socket.connect(target)
+        self.rfile = self.socket.makefile("rb")
+        self.wfile = self.socket.makefile("wb")
+
+    def request(self, message: dict) -> dict:
+        send_message(self.wfile, message)
+        return read_message(self.rfile)
+
+    def hello(self, worker: str, token: str = TOKEN) -> dict:
+        return self.request({"type": "hello", "worker": worker, "backend": "test", "token": token})
+
+    def close(self):
+        for stream in (self.rfile, self.wfile, self.socket):
+            stream.close()
+
+
+@pytest.fixture
+def address():
+    # Eigener kurzer Ordner: Unix-Socket-Pfade sind auf ~100 Zeichen begrenzt
+    directory = tempfile.mkdtemp(prefix="prism_js_")
+    yield "unix://" + os.path.join(directory, "jobs.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def server(address):
+    server = JobServer({"listen": address, "token": TOKEN, "heartbeat_interval": 0.1,
+                        "lease_timeout": 5.0, "max_attempts": 3})
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def runner():
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def _wait_until(condition, timeout: float = 5.0, what: str = "Bedingung"):
+    """Fragt condition() alle 10 ms ab; schlägt nach timeout Sekunden fehl statt zu hängen."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            pytest.fail(f"{what} nicht innerhalb von {timeout} s erfüllt")
+        time.sleep(0.01)
+
+
+def _pull_job(client: _RawClient, timeout: float = 5.0) -> dict:
+    """Holt einen Job, sobald der Server einen vergeben kann (z.B. nach einem Abbruch)."""
+    job = {}
+    def pulled():
+        job.update(client.request({"type": "pull"}))
+        return job["type"] != "no_job"
+    _wait_until(pulled, timeout, "Job-Vergabe")
+    return job
+
+
+def _contentcheck_payload(file_path: str) -> dict:
+    return {"kind": "contentcheck", "file_path": file_path, "document_name": os.path.basename(file_path),
+            "log_timeout": 5, "hf_config": {"name": "test", "required_metadata": ["author"],
+                                            "required_layers": ["Freisteller"]}}
+
+
+def _start_agent(address: str, worker_id: str, token: str = TOKEN):
+    agent = WorkerAgent(address, {"type": "simulated", "simulated": {
+        "open_latency": 0, "jsx_latency": 0, "close_latency": 0}}, worker_id, token=token)
+    thread = threading.Thread(target=agent.run, daemon=True)
+    thread.start()
+    return agent, thread
+
+
+@pytest.fixture
+def psd_file(tmp_path):
+    path = tmp_path / "bild.psd"
+    path.write_bytes(psd_bytes(10, 10, layers=["Freisteller"], xmp=build_xmp_packet({"author": "Autorin"})))
+    return str(path)
+
+
+def test_server_requires_token(address):
+    with pytest.raises(ValueError):
+        JobServer({"listen": address, "token": ""}).start()
+
+
+def test_worker_runs_contentcheck(server, runner, psd_file):
+    agent, thread = _start_agent(server.address, "w1")
+    try:
+        result = runner.submit(server.run, _contentcheck_payload(psd_file), "hf", 10).result(10)
+    finally:
+        agent.stop()
+        thread.join(5)
+    assert result["ok"]
+    assert result["log"]["metadata"]["author"] == "Autorin"
+    assert result["log"]["layers"] == {"Freisteller": True}
+    assert server.stats["completed"] == 1
+    assert agent.stats["ok"] == 1
+
+
+def test_wrong_token_is_rejected(server):
+    agent, thread = _start_agent(server.address, "intruder", token="falsch")
+    thread.join(5)
+    assert not thread.is_alive()          # Agent beendet sich statt erneut zu verbinden
+    assert server.status()["workers"] == 0
+
+    client = _RawClient(server.address)
+    try:
+        assert client.request({"type": "pull"})["type"] == "error"
+        assert client.hello("intruder", token="falsch")["type"] == "error"
+        assert read_message(client.rfile) is None     # Server hat die Verbindung geschlossen
+    finally:
+        client.close()
+
+
+def test_job_is_requeued_after_worker_disconnect(server, runner, psd_file):
+    future = runner.submit(server.run, _contentcheck_payload(psd_file), "hf", 10)
+    lost = _RawClient(server.address)
+    assert lost.hello("lost")["type"] == "welcome"
+    job = lost.request({"type": "pull"})
+    assert job["type"] == "job" and job["attempt"] == 1
+    lost.close()
+
+    agent, thread = _start_agent(server.address, "w2")
+    try:
+        result = future.result(10)
+    finally:
+        agent.stop()
+        thread.join(5)
+    assert result["ok"]
+    assert server.stats["dispatched"] == 2
+    assert agent.stats["jobs"] == 1
+
+
+def test_late_result_of_previous_attempt_is_discarded(server, runner, psd_file):
+    future = runner.submit(server.run, _contentcheck_payload(psd_file), "hf", 10)
+    first = _RawClient(server.address)
+    first.hello("first")
+    job = first.request({"type": "pull"})
+    first.close()
+
+    second = _RawClient(server.address)
+    second.hello("second")
+    retry = _pull_job(second)             # sobald der Server den Abbruch bemerkt hat
+    assert (retry["job"], retry["attempt"]) == (job["job"], 2)
+
+    # Der erste Worker meldet sich zurück und schickt sein veraltetes Ergebnis
+    late = _RawClient(server.address)
+    late.hello("first")
+    ack = late.request({"type": "result", "job": job["job"], "attempt": 1, "ok": False, "error": "alt"})
+    assert ack == {"type": "ack", "job": job["job"]}
+    assert not future.done()
+
+    second.request({"type": "result", "job": job["job"], "attempt": 2, "ok": True, "log": {"metadata": {}}})
+    result = future.result(5)
+    assert result["ok"] and result["error"] is None
+    for client in (late, second):
+        client.close()
+
+
+def test_expired_lease_is_requeued(address, runner, psd_file):
+    server = JobServer({"listen": address, "token": TOKEN, "heartbeat_interval": 0.1, "lease_timeout": 0.3})
+    server.start()
+    try:
+        future = runner.submit(server.run, _contentcheck_payload(psd_file), "hf", 10)
+        silent = _RawClient(server.address)
+        silent.hello("silent")
+        assert silent.request({"type": "pull"})["attempt"] == 1
+        # Keine Heartbeats -> Lease läuft ab, ein anderer Worker übernimmt
+        other = _RawClient(server.address)
+        other.hello("other")
+        retry = _pull_job(other)
+        assert retry["attempt"] == 2
+        other.request({"type": "result", "job": retry["job"], "attempt": 2, "ok": True, "log": {}})
+        assert future.result(5)["ok"]
+        assert server.stats["expired"] == 1
+        silent.close()
+        other.close()
+    finally:
+        server.stop()
+
+
+def test_job_is_given_up_after_max_attempts(server, runner, psd_file):
+    future = runner.submit(server.run, _contentcheck_payload(psd_file), "hf", 10)
+    for attempt in range(1, 4):
+        client = _RawClient(server.address)
+        client.hello(f"crash-{attempt}")
+        job = _pull_job(client)
+        assert job["attempt"] == attempt
+        client.close()
+    with pytest.raises(BackendUnavailable):
+        future.result(5)
+    assert server.stats["failed"] == 1
+
+
+def test_closed_agent_connection_is_seen_by_server(server):
+    from worker_agent import _Connection
+    conn = _Connection(server.address, timeout=5)
+    assert conn.request({"type": "hello", "worker": "w", "token": TOKEN})["type"] == "welcome"
+    assert server.status()["workers"] == 1
+    conn.close()
+    _wait_until(lambda: server.status()["workers"] == 0, what="Worker abgemeldet")
+
+
+def test_heartbeat_reports_only_own_leases(server, runner, psd_file):
+    runner.submit(server.run, _contentcheck_payload(psd_file), "hf", 10)
+    owner = _RawClient(server.address)
+    owner.hello("owner")
+    job = owner.request({"type": "pull"})
+    other = _RawClient(server.address)
+    other.hello("other")
+    assert owner.request({"type": "heartbeat", "jobs": [job["job"]]})["jobs"] == [job["job"]]
+    assert other.request({"type": "heartbeat", "jobs": [job["job"]]})["jobs"] == []
+    server.cancel_owner("hf")
+    owner.close()
+    other.close()
+
+
+def test_cancel_owner(server, runner, psd_file):
+    future = runner.submit(server.run, _contentcheck_payload(psd_file), "hf", 10)
+    _wait_until(lambda: server.status()["queued"] > 0, what="Job eingereiht")
+    server.cancel_owner("hf")
+    assert future.result(5) == {"ok": False, "cancelled": True}
+    assert server.run(_contentcheck_payload(psd_file), "hf", 1) == {"ok": False, "cancelled": True}
+
+
+def test_shared_server_is_released_by_last_owner(address):
+    settings = {"listen": address, "token": TOKEN}
+    first = get_job_server(settings)
+    second = get_job_server(settings)
+    assert first is second
+    release_job_server(first)
+    assert os.path.exists(parse_address(address)[1])
+    release_job_server(second)
+    assert not os.path.exists(parse_address(address)[1])
+
+
+def _start_agent_process(address: str, worker_id: str) -> subprocess.Popen:
+    """Echter Worker-Prozess (python worker_agent.py) mit langsamem Öffnen im simulierten Backend."""
+    settings = {"simulated": {"open_latency": 1.0, "jsx_latency": 0, "close_latency": 0}}
+    return subprocess.Popen(
+        [sys.executable, "worker_agent.py", "--server", address, "--backend", "simulated",
+         "--backend-settings", json.dumps(settings), "--id", worker_id, "--quiet"],
+        cwd=PROJECT_DIR, env=dict(os.environ, **{TOKEN_ENV: TOKEN}),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _lease(server: JobServer):
+    """(Worker, Vergabe) des einzigen vergebenen Jobs oder None."""
+    with server._cond:
+        jobs = list(server._leased.values())
+    return (jobs[0].worker, jobs[0].attempt) if jobs else None
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="benötigt POSIX-Signale")
+@pytest.mark.parametrize("signum", [signal.SIGKILL, signal.SIGSTOP] if hasattr(signal, "SIGKILL") else [],
+                         ids=["killed", "frozen"])
+def test_job_moves_to_surviving_worker_process(address, runner, psd_file, signum):
+    # SIGKILL: der Kernel schließt die Verbindung, der Server vergibt sofort neu.
+    # SIGSTOP: die Verbindung bleibt offen, nur der Ablauf der Lease (ohne Heartbeats) hilft.
+    server = JobServer({"listen": address, "token": TOKEN, "heartbeat_interval": 0.2,
+                        "lease_timeout": 1.0, "max_attempts": 3})
+    server.start()
+    workers = {worker_id: _start_agent_process(address, worker_id) for worker_id in ("p1", "p2")}
+    try:
+        _wait_until(lambda: server.status()["workers"] == 2, timeout=15, what="Worker-Prozesse verbunden")
+        future = runner.submit(server.run, _contentcheck_payload(psd_file), "hf", 20)
+        _wait_until(lambda: _lease(server) is not None, what="Erste Vergabe")
+        holder, attempt = _lease(server)
+        assert attempt == 1
+        workers[holder].send_signal(signum)          # mitten im Öffnen (1 s)
+        survivor = next(worker_id for worker_id in workers if worker_id != holder)
+
+        _wait_until(lambda: _lease(server) == (survivor, 2), what="Neuvergabe an den verbliebenen Worker")
+        result = future.result(10)
+        assert result["ok"]
+        assert result["log"]["layers"] == {"Freisteller": True}
+        assert server.stats["dispatched"] == 2
+        assert server.stats["completed"] == 1
+        assert server.stats["expired"] == (1 if signum == signal.SIGSTOP else 0)
+    finally:
+        for process in workers.values():
+            process.kill()
+            process.wait(5)
+        server.stop()
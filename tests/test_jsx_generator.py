@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Generiertes Contentcheck-JSX (dynamic_jsx_generator.py)."""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from dynamic_jsx_generator import build_contentcheck_jsx
+
+VALUES = ['Anführungszeichen "x"', "C:\\Bilder\\a.psd", "Zeile 1\nZeile 2\r\n\tEingerückt",
+          "Steuerzeichen \x00\x08\x0b\x0c\x1f\x7f", "Ebene “Freisteller” – ✓", "'einfach'", ""]
+
+
+def _quote_function(jsx: str) -> str:
+    lines = jsx.splitlines()
+    start = next(i for i, line in enumerate(lines) if line.startswith("    function q("))
+    end = next(i for i in range(start, len(lines)) if lines[i] == "    }")
+    return "\n".join(lines[start:end + 1])
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node nicht installiert")
+def test_quote_matches_json(hotfolder):
+    hotfolder["required_metadata"] = ["author"]
+    script = _quote_function(build_contentcheck_jsx(hotfolder)) + "\n" + (
+        "var values = JSON.parse(require('fs').readFileSync(0, 'utf8'));\n"
+        "process.stdout.write('[' + values.map(q).join(',') + ']');\n")
+    result = subprocess.run(["node", "-e", script], input=json.dumps(VALUES).encode("utf-8"),
+                            stdout=subprocess.PIPE, check=True, timeout=30)
+    output = result.stdout.decode("utf-8")
+    assert json.loads(output) == VALUES
+    assert output == "[" + ",".join(json.dumps(value, ensure_ascii=False) for value in VALUES) + "]"
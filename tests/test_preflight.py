@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Header-Parser und Regeln des Preflights (preflight.py)."""
+
+import struct
+import zlib
+
+import pytest
+
+from benchmark.workload import jpeg_bytes, psd_bytes, tiff_bytes
+from preflight import PreflightError, check_preflight, read_header_info, read_psd_layer_names, run_preflight
+
+
+def _png_bytes(width: int, height: int, color_type: int = 2, ppi: int = 300) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    ppm = int(round(ppi / 0.0254))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+            + chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+            + chunk(b"sRGB", b"\0")
+            + chunk(b"IDAT", zlib.compress(b"\0" * 16))
+            + chunk(b"IEND", b""))
+
+
+def _write(tmp_path, name: str, data: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_psd_header(tmp_path):
+    path = _write(tmp_path, "a.psd", psd_bytes(120, 80, layers=["Hintergrund", "Freisteller"], ppi=300))
+    info = read_header_info(path)
+    assert info["format"] == "PSD"
+    assert (info["width"], info["height"]) == (120, 80)
+    assert info["color_mode"] == "RGB"
+    assert info["bit_depth"] == 8
+    assert info["resolution"] == 300
+    assert info["layer_count"] == 2
+
+
+def test_psd_without_layers(tmp_path):
+    info = read_header_info(_write(tmp_path, "a.psd", psd_bytes(10, 10)))
+    assert info["layer_count"] == 0
+
+
+def test_tiff_header(tmp_path):
+    info = read_header_info(_write(tmp_path, "a.tif", tiff_bytes(40, 30, ppi=150)))
+    assert info["format"] == "TIFF"
+    assert (info["width"], info["height"]) == (40, 30)
+    assert info["color_mode"] == "RGB"
+    assert info["bit_depth"] == 8
+    assert info["resolution"] == 150
+
+
+def test_jpeg_header(tmp_path):
+    info = read_header_info(_write(tmp_path, "a.jpg", jpeg_bytes(64, 48, payload_size=100, ppi=72)))
+    assert info["format"] == "JPEG"
+    assert (info["width"], info["height"]) == (64, 48)
+    assert info["bit_depth"] == 8
+    assert info["resolution"] == 72
+
+
+def test_png_header(tmp_path):
+    info = read_header_info(_write(tmp_path, "a.png", _png_bytes(32, 16, ppi=300)))
+    assert info["format"] == "PNG"
+    assert (info["width"], info["height"]) == (32, 16)
+    assert info["color_mode"] == "RGB"
+    assert info["resolution"] == pytest.approx(300, abs=0.5)
+    assert info["icc_profile"] == "sRGB IEC61966-2.1"
+
+
+def test_unknown_format(tmp_path):
+    assert read_header_info(_write(tmp_path, "a.txt", b"kein Bild")) is None
+
+
+@pytest.mark.parametrize("data", [
+    psd_bytes(50, 50, layers=["Freisteller"]),
+    tiff_bytes(20, 20),
+    jpeg_bytes(20, 20, payload_size=10),
+    _png_bytes(20, 20)
+], ids=["psd", "tiff", "jpeg", "png"])
+def test_truncated_headers_raise_preflight_error(tmp_path, data):
+    # Jede Kürzung liefert ein Ergebnis oder PreflightError – nie struct.error/IndexError
+    path = tmp_path / "cut"
+    for length in range(0, min(len(data), 400)):
+        path.write_bytes(data[:length])
+        try:
+            read_header_info(str(path))
+        except PreflightError:
+            pass
+
+
+def test_psd_layer_names(tmp_path):
+    path = _write(tmp_path, "a.psd", psd_bytes(10, 10, layers=["Hintergrund", "Freisteller ü"]))
+    assert read_psd_layer_names(path) == ["Hintergrund", "Freisteller ü"]
+
+
+def test_corrupt_psd_layer_records_raise_preflight_error(tmp_path):
+    data = bytearray(psd_bytes(10, 10, layers=["Hintergrund", "Freisteller"]))
+    path = tmp_path / "bad.psd"
+    start = data.index(b"8BIMnorm") - 32
+    for offset in range(start, start + 120):
+        for value in (0x00, 0x7F, 0xFF):
+            corrupt = bytearray(data)
+            corrupt[offset] = value
+            path.write_bytes(bytes(corrupt))
+            try:
+                read_psd_layer_names(str(path))
+            except PreflightError:
+                pass
+
+
+def test_check_preflight_reasons():
+    info = {"format": "PSD", "width": 100, "height": 50, "resolution": 72, "color_mode": "CMYK",
+            "bit_depth": 16, "icc_profile": None, "layer_count": 1}
+    rules = {"color_modes": ["RGB"], "bit_depths": [8], "min_width": 200, "min_resolution": 300,
+             "require_icc_profile": True, "min_layers": 2}
+    reasons = check_preflight(info, rules)
+    assert len(reasons) == 6
+    assert check_preflight(info, {}) == []
+
+
+def test_run_preflight(tmp_path, hotfolder):
+    path = _write(tmp_path, "a.psd", psd_bytes(10, 10, ppi=72))
+    hotfolder["preflight"] = {"enabled": True, "min_resolution": 150}
+    info, reasons = run_preflight(path, hotfolder)
+    assert info["resolution"] == 72
+    assert reasons and "Auflösung" in reasons[0]
+    hotfolder["preflight"]["enabled"] = False
+    assert run_preflight(path, hotfolder) == (None, [])
+
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Profil-Fenster (profiling.py): Zuordnung der Threads zu genau einem Hotfolder."""
+
+import os
+import threading
+
+import pytest
+
+from async_monitor import AsyncHotfolderMonitor
+from hotfolder_monitor import HotfolderMonitor
+from profiling import ProfilingSession, call_timer
+
+
+def _busy_a(stop):
+    while not stop.is_set():
+        stop.wait(0.001)
+
+
+def _busy_b(stop):
+    while not stop.is_set():
+        stop.wait(0.001)
+
+
+@pytest.fixture
+def workers():
+    """Zwei Threads mit Namen wie die Backend-Stufen der Hotfolder "A" und "A-b"."""
+    stop = threading.Event()
+    threads = [threading.Thread(target=_busy_a, args=(stop,), name="hf-A-backend-0", daemon=True),
+               threading.Thread(target=_busy_b, args=(stop,), name="hf-A-b-backend-0", daemon=True)]
+    for thread in threads:
+        thread.start()
+    yield threads
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def _session(tmp_path, name: str, threads: dict, key) -> ProfilingSession:
+    return ProfilingSession(name, lambda: threads, str(tmp_path / name),
+                            {"duration": 0.2, "sample_interval": 0.005}, key=key)
+
+
+def test_only_registered_threads_are_sampled(tmp_path, workers):
+    thread_a, thread_b = workers
+    session_a = _session(tmp_path, "A", {thread_a.ident: "backend"}, key="A")
+    session_b = _session(tmp_path, "A-b", {thread_b.ident: "backend"}, key="A-b")
+    session_a.start()
+    session_b.start()                 # zweiter Hotfolder darf gleichzeitig profilieren
+    session_a.stop()
+    session_b.stop()
+    assert session_a.samples > 0 and session_b.samples > 0
+    with open(os.path.join(session_a.output_dir, "cpu.folded"), encoding="utf-8") as f:
+        folded = f.read().splitlines()
+    assert folded
+    assert all(line.startswith("backend;") for line in folded)
+    assert any("_busy_a" in line for line in folded)
+    assert not any("_busy_b" in line for line in folded)
+
+
+def test_one_session_per_key(tmp_path, workers):
+    first = _session(tmp_path, "A", {workers[0].ident: "backend"}, key="A")
+    first.start()
+    try:
+        with pytest.raises(RuntimeError):
+            _session(tmp_path, "A2", {workers[0].ident: "backend"}, key="A").start()
+    finally:
+        first.stop()
+
+
+def test_call_timer_only_in_registered_threads(tmp_path):
+    session = _session(tmp_path, "A", {threading.get_ident(): "ready"}, key="A")
+    session.start()
+    try:
+        with call_timer("messpunkt"):
+            pass
+        def foreign():
+            with call_timer("fremd"):
+                pass
+        other = threading.Thread(target=foreign)
+        other.start()
+        other.join()
+    finally:
+        session.stop()
+    assert list(session._calls) == ["messpunkt"]
+
+
+def _monitor(cls, hotfolder, name: str, tmp_path):
+    monitor_dir = tmp_path / name
+    monitor_dir.mkdir()
+    config = dict(hotfolder, name=name, monitor_dir=str(monitor_dir),
+                  backend={"type": "simulated", "session": f"profiling-{name}"})
+    return cls(config)
+
+
+def test_monitor_reports_only_its_own_threads(hotfolder, tmp_path):
+    monitors = [_monitor(HotfolderMonitor, hotfolder, name, tmp_path) for name in ("A", "A-b")]
+    for monitor in monitors:
+        monitor.start()
+    try:
+        own = monitors[0].profiling_threads()
+        other = monitors[1].profiling_threads()
+        assert own and other and not set(own) & set(other)
+        assert set(own.values()) == {"ready", "preflight", "backend", "evaluate", "move"}
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        assert all(names[ident].startswith("hf-A-") and not names[ident].startswith("hf-A-b-") for ident in own)
+    finally:
+        for monitor in monitors:
+            monitor.stop()
+
+
+def test_asyncio_engine_rejects_profiling(hotfolder, tmp_path):
+    monitor = _monitor(AsyncHotfolderMonitor, hotfolder, "async", tmp_path)
+    with pytest.raises(RuntimeError, match="asyncio"):
+        monitor.start_profiling(1)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Record-Cache (record_cache.py) und Neubewertung von fault_dir (reevaluate_faults)."""
+
+import json
+import os
+import time
+
+from benchmark.workload import build_xmp_packet, psd_bytes
+from hotfolder_monitor import HotfolderMonitor, fail_log_path, reevaluate_faults
+from record_cache import RecordCache, evaluate_contentcheck, records_enabled
+
+
+def _record(metadata: dict, layer_names=None) -> dict:
+    record = {"metadata": metadata}
+    if layer_names is not None:
+        record["layer_names"] = layer_names
+    return record
+
+
+def test_disabled_by_default(hotfolder):
+    assert not records_enabled(hotfolder)
+    assert RecordCache.for_config(hotfolder) is None
+
+
+def test_default_path(hotfolder):
+    hotfolder["records"] = {"enabled": True}
+    cache = RecordCache.for_config(hotfolder)
+    assert cache.path == os.path.join(hotfolder["logfiles_dir"], "records_test.jsonl")
+
+
+def test_last_entry_wins(tmp_path):
+    cache = RecordCache(str(tmp_path / "records.jsonl"))
+    cache.add("a.psd", "fault", _record({"author": ""}))
+    cache.add("a.psd", "success", _record({"author": "X"}), partners=["a.jpg"])
+    cache.add("b.psd", "fault", _record({}))
+    entries = cache.load()
+    assert set(entries) == {"a.psd", "b.psd"}
+    assert entries["a.psd"]["dir"] == "success"
+    assert entries["a.psd"]["partners"] == ["a.jpg"]
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    cache = RecordCache(str(tmp_path / "records.jsonl"))
+    cache.add("a.psd", "fault", _record({}))
+    with open(cache.path, "a", encoding="utf-8") as f:
+        f.write('{"file": "b.psd", "dir"')
+    assert list(cache.load()) == ["a.psd"]
+
+
+def test_save_keeps_newer_entries(tmp_path):
+    cache = RecordCache(str(tmp_path / "records.jsonl"))
+    cache.add("a.psd", "fault", _record({}))
+    entries = cache.load()
+    time.sleep(0.01)              # Zeitstempel haben Millisekunden-Auflösung
+    # Laufender Monitor schreibt zwischen load() und save()
+    cache.add("a.psd", "success", _record({"author": "X"}))
+    cache.add("c.psd", "fault", _record({}))
+    entries["a.psd"] = dict(entries["a.psd"], dir="reevaluated")
+    cache.save(entries)
+    merged = cache.load()
+    assert merged["a.psd"]["dir"] == "success"
+    assert "c.psd" in merged
+    with open(cache.path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+
+def test_evaluate_contentcheck():
+    hf_config = {"required_metadata": ["author", "credit"], "required_layers": ["Freisteller", "Schatten"]}
+    missing, missing_layers, unknown = evaluate_contentcheck(
+        _record({"author": "undefined"}, ["Freisteller"]), hf_config)
+    assert missing == {"author": "undefined", "credit": "undefined"}
+    assert missing_layers == ["Schatten"]
+    assert unknown == ["credit"]
+
+
+def test_reevaluate_faults(hotfolder):
+    hotfolder["records"] = {"enabled": True}
+    hotfolder["required_metadata"] = ["author"]
+    cache = RecordCache.for_config(hotfolder)
+    for name, author in (("ok.psd", "X"), ("bad.psd", "")):
+        with open(os.path.join(hotfolder["fault_dir"], name), "wb") as f:
+            f.write(b"8BPS")
+        cache.add(name, "fault", _record({"author": author, "credit": ""}, []))
+    with open(os.path.join(hotfolder["fault_dir"], "partner.jpg"), "wb") as f:
+        f.write(b"")
+    cache.add("ok.psd", "fault", _record({"author": "X", "credit": ""}, []), partners=["partner.jpg"])
+    cache.add("gone.psd", "fault", _record({}))
+
+    # Vorher war zusätzlich "credit" gefordert; jetzt nur noch "author"
+    summary = reevaluate_faults(hotfolder)
+    assert summary["checked"] == 2
+    assert summary["moved"] == 1
+    assert summary["still_failing"] == 1
+    assert summary["missing_file"] == 1
+    assert sorted(os.listdir(hotfolder["success_dir"])) == ["ok.psd", "partner.jpg"]
+    with open(fail_log_path(hotfolder["logfiles_dir"], "bad.psd"), encoding="utf-8") as f:
+        assert json.load(f)["missing"] == {"author": ""}
+    assert cache.load()["ok.psd"]["dir"] == "success"
+
+
+def test_reevaluate_unknown_field_is_not_moved(hotfolder):
+    hotfolder["records"] = {"enabled": True}
+    hotfolder["required_metadata"] = ["headline"]
+    cache = RecordCache.for_config(hotfolder)
+    with open(os.path.join(hotfolder["fault_dir"], "a.psd"), "wb") as f:
+        f.write(b"8BPS")
+    cache.add("a.psd", "fault", _record({"author": "X"}))
+    summary = reevaluate_faults(hotfolder)
+    assert summary["unknown"] == 1
+    assert summary["moved"] == 0
+    assert os.listdir(hotfolder["success_dir"]) == []
+
+
+def test_same_name_in_different_subfolders(hotfolder, request):
+    hotfolder["records"] = {"enabled": True}
+    hotfolder["required_metadata"] = ["author"]
+    hotfolder["backend"] = {"type": "simulated", "session": request.node.name,
+                            "simulated": {"open_latency": 0, "jsx_latency": 0, "close_latency": 0}}
+    hotfolder["pipeline"] = {"stable_interval": 0, "stable_checks": 1, "log_timeout": 1}
+    monitor = HotfolderMonitor(hotfolder)
+    for folder, author in (("a", "Autorin"), ("b", "")):
+        os.mkdir(os.path.join(hotfolder["monitor_dir"], folder))
+        path = os.path.join(hotfolder["monitor_dir"], folder, "bild.psd")
+        with open(path, "wb") as f:
+            f.write(psd_bytes(10, 10, xmp=build_xmp_packet({"author": author})))
+        monitor.process_file(path)
+
+    # Unterordner bleiben erhalten, der Datensatz gehört zur jeweiligen Datei
+    assert os.path.exists(os.path.join(hotfolder["success_dir"], "a", "bild.psd"))
+    assert os.path.exists(os.path.join(hotfolder["fault_dir"], "b", "bild.psd"))
+    assert os.path.exists(fail_log_path(hotfolder["logfiles_dir"], "b/bild.psd"))
+    entries = RecordCache.for_config(hotfolder).load()
+    assert {name: entry["dir"] for name, entry in entries.items()} == {"a/bild.psd": "success",
+                                                                       "b/bild.psd": "fault"}
+
+    hotfolder["required_metadata"] = []
+    summary = reevaluate_faults(hotfolder)
+    assert summary["moved"] == 1 and summary["missing_file"] == 0
+    assert os.path.exists(os.path.join(hotfolder["success_dir"], "b", "bild.psd"))
+    assert os.listdir(os.path.join(hotfolder["fault_dir"], "b")) == []
+    assert not os.path.exists(fail_log_path(hotfolder["logfiles_dir"], "b/bild.psd"))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Aufzeichnung roher Hotfolder-Ereignisse (event_trace.py, watch_service.py) und Replay (benchmark/replay_trace.py)."""
+
+import os
+import queue
+
+import pytest
+from watchdog.events import FileSystemEventHandler
+
+from benchmark.replay_trace import TraceReplayer
+from event_trace import TraceRecorder, read_trace
+from watch_service import PathFilter, WatchService
+
+
+class _Handler(FileSystemEventHandler):
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def on_created(self, event):
+        self.events.put(("created", os.path.basename(event.src_path)))
+
+    def on_moved(self, event):
+        self.events.put(("moved", os.path.basename(event.dest_path)))
+
+    def on_deleted(self, event):
+        self.events.put(("deleted", os.path.basename(event.src_path)))
+
+
+@pytest.fixture
+def service():
+    service = WatchService()
+    tokens = []
+    yield service, tokens
+    for token in tokens:
+        service.unregister(token)
+
+
+def _register(service, hotfolder, recorder) -> _Handler:
+    service, tokens = service
+    handler = _Handler()
+    tokens.append(service.register(hotfolder["monitor_dir"], handler, PathFilter.from_config(hotfolder),
+                                   recorder=recorder))
+    return handler
+
+
+def _events(trace_path: str) -> list:
+    """Ereignisse ohne Zeitstempel; aufeinanderfolgende gleiche modified zusammengefasst."""
+    _header, events = read_trace(trace_path)
+    result = []
+    for event in events:
+        entry = (event["e"], event["p"], event.get("d"))
+        if not result or entry != result[-1] or entry[0] != "modified":
+            result.append(entry)
+    return result
+
+
+def test_raw_events_are_recorded_before_filter(service, hotfolder, tmp_path):
+    monitor_dir = hotfolder["monitor_dir"]
+    hotfolder["success_dir"] = os.path.join(monitor_dir, "success")
+    os.mkdir(hotfolder["success_dir"])
+    recorder = TraceRecorder(str(tmp_path / "trace.jsonl"), monitor_dir)
+    handler = _register(service, hotfolder, recorder)
+
+    part = os.path.join(monitor_dir, "bild.psd.part")
+    final = os.path.join(monitor_dir, "bild.psd")
+    with open(part, "wb") as f:
+        f.write(b"\0" * 100)
+    with open(part, "ab") as f:
+        f.write(b"\0" * 200)
+    os.replace(part, final)
+    # Der Hotfolder selbst sieht nach dem Filter nur die fertige Datei
+    assert handler.events.get(timeout=5) == ("created", "bild.psd")
+    with open(os.path.join(monitor_dir, "~$notiz.tmp"), "wb") as f:
+        f.write(b"x")
+    # Verschieben in den eigenen Success-Ordner: aufgezeichnet wird nur das Verschwinden
+    os.replace(final, os.path.join(hotfolder["success_dir"], "bild.psd"))
+    assert handler.events.get(timeout=5) == ("deleted", "bild.psd")
+    recorder.close()
+
+    events = _events(recorder.path)
+    assert [event for event in events if event[0] != "modified"] == [
+        ("created", "bild.psd.part", None),
+        ("moved", "bild.psd.part", "bild.psd"),
+        ("created", "~$notiz.tmp", None),
+        ("deleted", "bild.psd", None),
+    ]
+    assert events[1] == ("modified", "bild.psd.part", None)
+    moved = next(event for event in read_trace(recorder.path)[1] if event["e"] == "moved")
+    assert moved["s"] == 300
+
+
+def test_recorder_skips_its_own_trace_file(tmp_path):
+    recorder = TraceRecorder(str(tmp_path / "trace.jsonl"), str(tmp_path))
+    recorder.record("modified", str(tmp_path / "trace.jsonl"))
+    recorder.record("created", str(tmp_path / "a.psd"))
+    recorder.close()
+    assert [e["p"] for e in read_trace(recorder.path)[1]] == ["a.psd"]
+
+
+def test_partial_upload_and_rename_round_trip(service, hotfolder, tmp_path):
+    # Aufnahme: Teil-Upload in zwei Schritten, Umbenennen, Verschieben durch den Monitor, Ergebnis
+    monitor_dir = hotfolder["monitor_dir"]
+    recorded = TraceRecorder(str(tmp_path / "recorded.jsonl"), monitor_dir)
+    part = os.path.join(monitor_dir, "upload.psd.part")
+    final = os.path.join(monitor_dir, "upload.psd")
+    with open(part, "wb") as f:
+        f.write(b"\0" * 4000)
+    recorded.record("created", part)
+    with open(part, "ab") as f:
+        f.write(b"\0" * 6000)
+    recorded.record("modified", part)
+    os.replace(part, final)
+    recorded.record("moved", part, final)
+    # Der Monitor verschiebt nach success_dir, bevor das Ergebnis aufgezeichnet wird
+    os.remove(final)
+    recorded.record("deleted", final)
+    recorded.outcome(final, "success")
+    recorded.close()
+
+    # Replay in einen überwachten Ordner, dessen rohe Ereignisse erneut aufgezeichnet werden
+    target = tmp_path / "replay"
+    target.mkdir()
+    replay_config = dict(hotfolder, monitor_dir=str(target))
+    replayed = TraceRecorder(str(tmp_path / "replayed.jsonl"), str(target))
+    handler = _register(service, replay_config, replayed)
+    replayer = TraceReplayer(recorded.path, str(target), speed=100)
+    assert replayer.expected == {"upload.psd": "success"}
+    replayer.start()
+    replayer.join(5)
+    assert handler.events.get(timeout=5) == ("created", "upload.psd")
+    replayed.close()
+
+    assert os.listdir(target) == ["upload.psd"]
+    assert os.path.getsize(target / "upload.psd") == 10000
+    expected = [("created", "upload.psd.part", None), ("modified", "upload.psd.part", None),
+                ("moved", "upload.psd.part", "upload.psd")]
+    assert _events(recorded.path)[:3] == expected
+    assert _events(replayed.path) == expected
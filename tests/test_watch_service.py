@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Watch-Service (watch_service.py): Präfix-Baum, Filter und Übergabe an die Hotfolder-Threads."""
+
+import os
+import queue
+import threading
+
+import pytest
+from watchdog.events import FileCreatedEvent, FileModifiedEvent, FileMovedEvent, FileSystemEventHandler
+
+from watch_service import PathFilter, WatchService
+
+
+class _Recorder(FileSystemEventHandler):
+    def __init__(self):
+        self.events = queue.Queue()
+        self.overflows = 0
+
+    def on_created(self, event):
+        self.events.put(("created", event.src_path))
+
+    def on_modified(self, event):
+        self.events.put(("modified", event.src_path))
+
+    def on_moved(self, event):
+        self.events.put(("moved", event.dest_path))
+
+    def on_deleted(self, event):
+        self.events.put(("deleted", event.src_path))
+
+    def on_overflow(self):
+        self.overflows += 1
+        self.events.put(("overflow", None))
+
+    def get(self):
+        return self.events.get(timeout=2)
+
+
+@pytest.fixture
+def service():
+    service = WatchService()
+    tokens = []
+    yield service, tokens
+    for token in tokens:
+        service.unregister(token)
+
+
+def _register(service, path, **kwargs):
+    service, tokens = service
+    handler = _Recorder()
+    filter_settings = kwargs.pop("watch", None)
+    path_filter = PathFilter(str(path), filter_settings, kwargs.pop("excluded_dirs", ()))
+    tokens.append(service.register(str(path), handler, path_filter, **kwargs))
+    return handler
+
+
+def test_longest_prefix_wins(service, tmp_path):
+    outer_dir = tmp_path / "outer"
+    inner_dir = outer_dir / "inner"
+    inner_dir.mkdir(parents=True)
+    outer = _register(service, outer_dir)
+    inner = _register(service, inner_dir)
+    ws = service[0]
+    assert ws._route(str(inner_dir / "a.psd")).handler is inner
+    assert ws._route(str(outer_dir / "a.psd")).handler is outer
+    assert ws._route(str(outer_dir / "sub" / "a.psd")).handler is outer
+    assert ws._route(str(tmp_path / "a.psd")) is None
+    # Nur der oberste Ordner wird überwacht
+    assert list(ws._watches) == [str(outer_dir)]
+
+
+def test_filters(service, tmp_path):
+    handler = _register(service, tmp_path, watch={"include": ["*.psd"], "max_depth": 0},
+                        excluded_dirs=[str(tmp_path / "success")])
+    ws = service[0]
+    assert ws._route(str(tmp_path / "a.psd")).handler is handler
+    assert ws._route(str(tmp_path / "a.jpg")) is None
+    assert ws._route(str(tmp_path / ".DS_Store")) is None
+    assert ws._route(str(tmp_path / "a.psd.part")) is None
+    assert ws._route(str(tmp_path / "sub" / "a.psd")) is None
+    assert ws._route(str(tmp_path / "success" / "a.psd")) is None
+
+
+def test_dispatch_delivers_in_order(service, tmp_path):
+    handler = _register(service, tmp_path)
+    ws = service[0]
+    ws.dispatch(FileCreatedEvent(str(tmp_path / "a.psd")))
+    ws.dispatch(FileModifiedEvent(str(tmp_path / "a.psd")))
+    # Umbenennen aus einem ignorierten Namen wird zu "created"
+    ws.dispatch(FileMovedEvent(str(tmp_path / "b.psd.part"), str(tmp_path / "b.psd")))
+    ws.dispatch(FileMovedEvent(str(tmp_path / "c.psd"), str(tmp_path / "d.psd")))
+    assert handler.get() == ("created", str(tmp_path / "a.psd"))
+    assert handler.get() == ("modified", str(tmp_path / "a.psd"))
+    assert handler.get() == ("created", str(tmp_path / "b.psd"))
+    assert handler.get() == ("moved", str(tmp_path / "d.psd"))
+
+
+def test_blocked_hotfolder_does_not_stall_others(service, tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    entered = threading.Event()
+    release = threading.Event()
+
+    class _Blocking(_Recorder):
+        def on_created(self, event):
+            entered.set()
+            release.wait(5)
+            super().on_created(event)
+
+    ws, tokens = service
+    blocked = _Blocking()
+    tokens.append(ws.register(str(tmp_path / "a"), blocked, backlog=3))
+    other = _register(service, tmp_path / "b")
+    ws.dispatch(FileCreatedEvent(str(tmp_path / "a" / "0.psd")))
+    assert entered.wait(2)
+    for index in range(1, 10):
+        ws.dispatch(FileCreatedEvent(str(tmp_path / "a" / f"{index}.psd")))
+    ws.dispatch(FileCreatedEvent(str(tmp_path / "b" / "x.psd")))
+    assert other.get() == ("created", str(tmp_path / "b" / "x.psd"))
+    release.set()
+    received = [blocked.get() for _ in range(5)]
+    # Erstes Ereignis + 3 in der Warteschlange, der Rest verworfen -> on_overflow
+    assert [kind for kind, _path in received] == ["created"] * 4 + ["overflow"]
+    assert blocked.overflows == 1
+
+
+def test_unregister_stops_delivery(service, tmp_path):
+    handler = _register(service, tmp_path)
+    ws, tokens = service
+    ws.unregister(tokens.pop())
+    assert ws._route(str(tmp_path / "a.psd")) is None
+    assert ws._observer is None
+    assert handler.events.empty()
+
+
+def test_scan_applies_filter(tmp_path):
+    for name in ("a.psd", "b.jpg", ".hidden", "c.tmp"):
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "success").mkdir()
+    (tmp_path / "success" / "d.psd").write_bytes(b"")
+    path_filter = PathFilter(str(tmp_path), {"exclude": ["*.jpg"]}, [str(tmp_path / "success")])
+    assert [os.path.basename(p) for p in path_filter.scan()] == ["a.psd"]
@@ -4,6 +4,8 @@
 import os
 from PyQt5 import QtWidgets, QtCore
 from config.config_manager import load_config, save_config, get_recent_dirs, update_recent_dirs
+from preflight import COLOR_MODES, DEFAULT_PREFLIGHT
+from record_cache import records_enabled
 
 DEBUG_OUTPUT = True
 def debug_print(msg):
@@ -126,6 +128,104 @@ class HotfolderConfigDialog(QtWidgets.QDialog):
         meta_group.setLayout(meta_layout)
         form_layout.addRow(meta_group)
 
+        preflight = dict(DEFAULT_PREFLIGHT)
+        preflight.update(self.hotfolder.get("preflight", {}))
+        preflight_group = QtWidgets.QGroupBox("Preflight (Header-Prüfung vor Photoshop)")
+        preflight_layout = QtWidgets.QFormLayout()
+        self.preflight_enabled_cb = QtWidgets.QCheckBox("Preflight aktiv")
+        self.preflight_enabled_cb.setChecked(bool(preflight.get("enabled")))
+        preflight_layout.addRow(self.preflight_enabled_cb)
+
+        # Alle Modi, die preflight.py melden kann; von Hand eingetragene Werte bleiben erhalten
+        self.color_mode_checks = {}
+        color_mode_layout = QtWidgets.QGridLayout()
+        color_modes = COLOR_MODES + [m for m in preflight.get("color_modes", []) if m not in COLOR_MODES]
+        for index, mode in enumerate(color_modes):
+            cb = QtWidgets.QCheckBox(mode)
+            cb.setChecked(mode in preflight.get("color_modes", []))
+            color_mode_layout.addWidget(cb, index // 4, index % 4)
+            self.color_mode_checks[mode] = cb
+        preflight_layout.addRow("Farbmodus:", color_mode_layout)
+
+        self.bit_depth_checks = {}
+        bit_depth_layout = QtWidgets.QHBoxLayout()
+        configured_depths = [int(d) for d in preflight.get("bit_depths", [])]
+        for depth in sorted(set([1, 8, 16, 32] + configured_depths)):
+            cb = QtWidgets.QCheckBox(f"{depth} Bit")
+            cb.setChecked(depth in configured_depths)
+            bit_depth_layout.addWidget(cb)
+            self.bit_depth_checks[depth] = cb
+        preflight_layout.addRow("Bittiefe:", bit_depth_layout)
+
+        self.min_width_spin = QtWidgets.QSpinBox()
+        self.min_width_spin.setRange(0, 300000)
+        self.min_width_spin.setValue(int(preflight.get("min_width", 0)))
+        self.min_height_spin = QtWidgets.QSpinBox()
+        self.min_height_spin.setRange(0, 300000)
+        self.min_height_spin.setValue(int(preflight.get("min_height", 0)))
+        size_layout = QtWidgets.QHBoxLayout()
+        size_layout.addWidget(self.min_width_spin)
+        size_layout.addWidget(QtWidgets.QLabel("×"))
+        size_layout.addWidget(self.min_height_spin)
+        size_layout.addWidget(QtWidgets.QLabel("px"))
+        preflight_layout.addRow("Mindestgröße:", size_layout)
+
+        self.min_resolution_spin = QtWidgets.QSpinBox()
+        self.min_resolution_spin.setRange(0, 10000)
+        self.min_resolution_spin.setSuffix(" ppi")
+        self.min_resolution_spin.setValue(int(preflight.get("min_resolution", 0)))
+        preflight_layout.addRow("Mindestauflösung:", self.min_resolution_spin)
+
+        self.icc_profiles_edit = QtWidgets.QLineEdit(", ".join(preflight.get("icc_profiles", [])))
+        self.icc_profiles_edit.setPlaceholderText("z.B. Adobe RGB, eciRGB v2 (leer = alle)")
+        preflight_layout.addRow("ICC-Profile:", self.icc_profiles_edit)
+        self.require_icc_cb = QtWidgets.QCheckBox("ICC-Profil erforderlich")
+        self.require_icc_cb.setChecked(bool(preflight.get("require_icc_profile")))
+        preflight_layout.addRow(self.require_icc_cb)
+        preflight_group.setLayout(preflight_layout)
+        form_layout.addRow(preflight_group)
+
+        # Dateifilter (siehe watch_service.py)
+        watch = self.hotfolder.get("watch", {})
+        watch_group = QtWidgets.QGroupBox("Dateifilter")
+        watch_layout = QtWidgets.QFormLayout()
+        self.include_edit = QtWidgets.QLineEdit(", ".join(watch.get("include", [])))
+        self.include_edit.setPlaceholderText("z.B. *.psd, *.tif (leer = alle Dateien)")
+        watch_layout.addRow("Einschließen:", self.include_edit)
+        self.exclude_edit = QtWidgets.QLineEdit(", ".join(watch.get("exclude", [])))
+        self.exclude_edit.setPlaceholderText("z.B. *_preview.jpg, Archiv/*")
+        watch_layout.addRow("Ausschließen:", self.exclude_edit)
+        self.max_depth_spin = QtWidgets.QSpinBox()
+        self.max_depth_spin.setRange(-1, 64)
+        self.max_depth_spin.setSpecialValueText("unbegrenzt")
+        self.max_depth_spin.setValue(int(watch.get("max_depth", -1)))
+        watch_layout.addRow("Max. Ordnertiefe:", self.max_depth_spin)
+        self.ignore_defaults_cb = QtWidgets.QCheckBox("Temporäre Dateien ignorieren (*.part, ~$*, .DS_Store, ._* …)")
+        self.ignore_defaults_cb.setChecked(watch.get("ignore_defaults", True))
+        watch_layout.addRow(self.ignore_defaults_cb)
+        watch_group.setLayout(watch_layout)
+        form_layout.addRow(watch_group)
+
+        self.interactive_jsx_cb = QtWidgets.QCheckBox("Interaktives Debug-JSX (zeigt Werte per Alert, blockiert Photoshop)")
+        self.interactive_jsx_cb.setChecked(self.hotfolder.get("jsx_mode", "headless") == "interactive")
+        form_layout.addRow(self.interactive_jsx_cb)
+
+        self.trace_cb = QtWidgets.QCheckBox("Ereignisse aufzeichnen (Trace im Logfiles-Ordner)")
+        self.trace_cb.setChecked(self.hotfolder.get("trace", {}).get("enabled", False))
+        form_layout.addRow(self.trace_cb)
+
+        self.asyncio_cb = QtWidgets.QCheckBox("asyncio-Engine (eine Event-Loop statt Threads pro Stufe)")
+        self.asyncio_cb.setChecked(self.hotfolder.get("pipeline", {}).get("engine", "threads") == "asyncio")
+        form_layout.addRow(self.asyncio_cb)
+
+        self.records_cb = QtWidgets.QCheckBox("Vollständigen Datensatz speichern (Fault-Dateien bei Änderung neu bewerten)")
+        self.records_cb.setChecked(records_enabled(self.hotfolder))
+        form_layout.addRow(self.records_cb)
+
+        self.grouping_cb = QtWidgets.QCheckBox("Dateigruppen gemeinsam verarbeiten (RAW + XMP-Sidecar, PSD + JPEG)")
+        self.grouping_cb.setChecked(self.hotfolder.get("grouping", {}).get("enabled", False))
+        form_layout.addRow(self.grouping_cb)
+
         self.additional_jsx_edit = QtWidgets.QLineEdit(self.hotfolder.get("additional_jsx", ""))
         self.jsx_browse_btn = QtWidgets.QPushButton("JSX durchsuchen")
         jsx_layout = QtWidgets.QHBoxLayout()
@@ -197,6 +297,28 @@ class HotfolderConfigDialog(QtWidgets.QDialog):
                 req_meta.append(meta)
         self.hotfolder["required_metadata"] = req_meta
 
+        preflight = dict(self.hotfolder.get("preflight", DEFAULT_PREFLIGHT))
+        preflight["enabled"] = self.preflight_enabled_cb.isChecked()
+        preflight["color_modes"] = [m for m, cb in self.color_mode_checks.items() if cb.isChecked()]
+        preflight["bit_depths"] = [d for d, cb in self.bit_depth_checks.items() if cb.isChecked()]
+        preflight["min_width"] = self.min_width_spin.value()
+        preflight["min_height"] = self.min_height_spin.value()
+        preflight["min_resolution"] = self.min_resolution_spin.value()
+        preflight["icc_profiles"] = [p.strip() for p in self.icc_profiles_edit.text().split(",") if p.strip()]
+        preflight["require_icc_profile"] = self.require_icc_cb.isChecked()
+        self.hotfolder["preflight"] = preflight
+
+        self.hotfolder["watch"] = {
+            "include": [p.strip() for p in self.include_edit.text().split(",") if p.strip()],
+            "exclude": [p.strip() for p in self.exclude_edit.text().split(",") if p.strip()],
+            "max_depth": self.max_depth_spin.value(),
+            "ignore_defaults": self.ignore_defaults_cb.isChecked()
+        }
+        self.hotfolder["jsx_mode"] = "interactive" if self.interactive_jsx_cb.isChecked() else "headless"
+        self.hotfolder.setdefault("trace", {})["enabled"] = self.trace_cb.isChecked()
+        self.hotfolder.setdefault("pipeline", {})["engine"] = "asyncio" if self.asyncio_cb.isChecked() else "threads"
+        self.hotfolder.setdefault("records", {})["enabled"] = self.records_cb.isChecked()
+        self.hotfolder.setdefault("grouping", {})["enabled"] = self.grouping_cb.isChecked()
         self.hotfolder["additional_jsx"] = self.additional_jsx_edit.text()
 
         debug_print("Hotfolder-Konfiguration gespeichert/aktualisiert.")
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Hotfolder-Übersicht als Model/View – auch bei Hunderten Hotfoldern schnell:
+
+- HotfolderModel hält Konfiguration und Laufzeitstatus (Monitor, aktuelle Datei,
+  Warteschlangen) pro Zeile; Hinzufügen/Entfernen ändert nur die betroffene Zeile.
+- HotfolderDelegate zeichnet die Zeilen (Name, Status, Spinner, Start/Stop, Edit) –
+  gezeichnet wird nur, was sichtbar ist; es gibt keine Widgets pro Zeile.
+- Die Details (Ordner, Bearbeitung, Contentcheck) sind eine Kindzeile, deren Widget erst
+  beim Aufklappen erzeugt und beim Zuklappen wieder gelöscht wird.
+- Ein gemeinsamer Spinner läuft nur, solange mindestens ein Hotfolder eine Datei verarbeitet.
+
+Callbacks der Monitore kommen aus Worker-Threads und werden per Signal in den GUI-Thread gebracht.
+"""
+
+import os
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from async_monitor import create_monitor
+from ui.hotfolder_widget import HotfolderDetailsWidget, preflight_summary
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+ConfigRole = QtCore.Qt.UserRole + 1
+StateRole = QtCore.Qt.UserRole + 2          # "inactive", "active", "busy"
+FileRole = QtCore.Qt.UserRole + 3
+QueueRole = QtCore.Qt.UserRole + 4
+DetailsRole = QtCore.Qt.UserRole + 5        # True für die Kindzeile mit den Details
+
+ROW_HEIGHT = 46
+SPINNER_SIZE = 20
+
+
+class _RowState:
+    __slots__ = ("key", "config", "monitor", "current_file", "queue_text")
+
+    def __init__(self, key: int, config: dict):
+        self.key = key               # stabil über Einfügen/Entfernen (internalId der Detailzeile)
+        self.config = config
+        self.monitor = None
+        self.current_file = None
+        self.queue_text = ""
+
+    @property
+    def state(self) -> str:
+        if not self.monitor or not self.monitor.active:
+            return "inactive"
+        return "busy" if self.current_file else "active"
+
+
+class HotfolderModel(QtCore.QAbstractItemModel):
+    """
+    Zwei Ebenen: Hotfolder (internalId 0) und je eine Detail-Kindzeile (internalId = Schlüssel
+    der Zeile, damit aufgeklappte Details beim Entfernen anderer Zeilen richtig zugeordnet bleiben).
+    """
+    # Aus Worker-Threads: (Zeilenobjekt, Dateiname oder None)
+    _file_processing = QtCore.pyqtSignal(object, object)
+    busyChanged = QtCore.pyqtSignal(bool)
+    startFailed = QtCore.pyqtSignal(str)
+
+    def __init__(self, hotfolders: list, parent=None):
+        super().__init__(parent)
+        self._next_key = 1
+        self._rows = []
+        for hf in hotfolders:
+            self._rows.append(self._new_row(hf))
+        self._rebuild_keys()
+        self._busy = 0
+        self._file_processing.connect(self._on_file_processing)
+        # Warteschlangen nur für laufende Hotfolder abfragen
+        self._queue_timer = QtCore.QTimer(self)
+        self._queue_timer.setInterval(500)
+        self._queue_timer.timeout.connect(self._update_queues)
+
+    def _new_row(self, config: dict) -> _RowState:
+        state = _RowState(self._next_key, config)
+        self._next_key += 1
+        return state
+
+    def _rebuild_keys(self):
+        self._key_rows = {state.key: row for row, state in enumerate(self._rows)}
+
+    def _row_of(self, index) -> int:
+        if index.internalId() == 0:
+            return index.row()
+        return self._key_rows.get(index.internalId(), -1)
+
+    # --- Qt-Model-Schnittstelle -------------------------------------------------
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if column != 0:
+            return QtCore.QModelIndex()
+        if not parent.isValid():
+            if 0 <= row < len(self._rows):
+                return self.createIndex(row, 0, 0)
+            return QtCore.QModelIndex()
+        if parent.internalId() == 0 and row == 0 and 0 <= parent.row() < len(self._rows):
+            return self.createIndex(0, 0, self._rows[parent.row()].key)
+        return QtCore.QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QtCore.QModelIndex()
+        row = self._key_rows.get(index.internalId())
+        if row is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(row, 0, 0)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return len(self._rows)
+        return 1 if parent.internalId() == 0 else 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        if index.internalId() == 0:
+            return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        return QtCore.Qt.ItemIsEnabled
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        details = index.internalId() != 0
+        row_number = self._row_of(index)
+        if not 0 <= row_number < len(self._rows):
+            return None
+        row = self._rows[row_number]
+        if role == DetailsRole:
+            return details
+        if role == ConfigRole:
+            return row.config
+        if details:
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return row.config.get("name", "Unbenannt")
+        if role == StateRole:
+            return row.state
+        if role == FileRole:
+            return row.current_file
+        if role == QueueRole:
+            return row.queue_text
+        if role == QtCore.Qt.ToolTipRole:
+            return (f"Monitor: {row.config.get('monitor_dir', '')}\n"
+                    f"Preflight: {preflight_summary(row.config)}")
+        return None
+
+    # --- Hotfolder hinzufügen/entfernen/ändern ------------------------------------
+
+    def append_hotfolder(self, config: dict) -> QtCore.QModelIndex:
+        row = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._rows.append(self._new_row(config))
+        self._rebuild_keys()
+        self.endInsertRows()
+        return self.index(row, 0)
+
+    def remove_hotfolder(self, row: int):
+        if not 0 <= row < len(self._rows):
+            return
+        self.stop(row)
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._rows[row]
+        self._rebuild_keys()
+        self.endRemoveRows()
+
+    def config_changed(self, row: int):
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index)
+        child = self.index(0, 0, index)
+        self.dataChanged.emit(child, child)
+
+    def stop_all(self):
+        for row in range(len(self._rows)):
+            self.stop(row)
+
+    # --- Monitore ------------------------------------------------------------------
+
+    def monitor(self, row: int):
+        """Laufender HotfolderMonitor der Zeile oder None."""
+        return self._rows[row].monitor
+
+    def is_running(self, row: int) -> bool:
+        monitor = self._rows[row].monitor
+        return bool(monitor and monitor.active)
+
+    def toggle(self, row: int):
+        if self.is_running(row):
+            self.stop(row)
+        else:
+            self.start(row)
+
+    def start(self, row: int):
+        state = self._rows[row]
+        debug_print(f"Starte Monitor für: {state.config.get('name', '?')}")
+        try:
+            state.monitor = create_monitor(
+                hf_config=state.config,
+                on_file_processing=lambda filename, state=state: self._file_processing.emit(state, filename)
+            )
+        except ValueError as e:
+            debug_print(f"Monitor konnte nicht gestartet werden: {e}")
+            self.startFailed.emit(f"{state.config.get('name', '?')}: {e}")
+            return
+        state.monitor.start()
+        self._row_changed(state)
+        if not self._queue_timer.isActive():
+            self._queue_timer.start()
+
+    def stop(self, row: int):
+        state = self._rows[row]
+        if not state.monitor:
+            return
+        debug_print(f"Stoppe Monitor für: {state.config.get('name', '?')}")
+        state.monitor.stop()
+        state.monitor = None
+        self._set_current_file(state, None)
+        state.queue_text = ""
+        self._row_changed(state)
+        if not any(r.monitor for r in self._rows):
+            self._queue_timer.stop()
+
+    def _row_changed(self, state: _RowState):
+        row = self._key_rows.get(state.key)
+        if row is None:
+            return  # Zeile wurde inzwischen entfernt
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index)
+
+    def _set_current_file(self, state: _RowState, filename):
+        was_busy = state.current_file is not None
+        state.current_file = filename
+        is_busy = filename is not None
+        if was_busy != is_busy:
+            self._busy += 1 if is_busy else -1
+            if self._busy in (0, 1):
+                self.busyChanged.emit(self._busy > 0)
+
+    def _on_file_processing(self, state: _RowState, filename):
+        if state.monitor is None and filename:
+            return  # verspätete Meldung nach dem Stoppen
+        self._set_current_file(state, filename or None)
+        self._row_changed(state)
+
+    def _update_queues(self):
+        for row, state in enumerate(self._rows):
+            if not state.monitor:
+                continue
+            depths = state.monitor.get_queue_depths()
+            text = " · ".join(f"{stage} {d['queued']}/{d['active']}" for stage, d in depths.items()
+                              if d["queued"] or d["active"])
+            if text != state.queue_text:
+                state.queue_text = text
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index, [QueueRole])
+
+    def busy_rows(self):
+        return [row for row, state in enumerate(self._rows) if state.current_file]
+
+
+class HotfolderDelegate(QtWidgets.QStyledItemDelegate):
+    """Zeichnet eine Hotfolder-Zeile; Start/Stop und Edit sind gezeichnete Buttons."""
+    startStopClicked = QtCore.pyqtSignal(int)
+    editClicked = QtCore.pyqtSignal(int)
+
+    BUTTON_WIDTH = 70
+
+    def __init__(self, view: QtWidgets.QTreeView):
+        super().__init__(view)
+        self.view = view
+        self.spinner = None
+        self._angle = 0
+        spinner_path = os.path.join("assets", "spinner.gif")
+        if os.path.exists(spinner_path):
+            # Ein QMovie für alle Zeilen; läuft nur, solange etwas verarbeitet wird
+            self.spinner = QtGui.QMovie(spinner_path)
+            self.spinner.setScaledSize(QtCore.QSize(SPINNER_SIZE, SPINNER_SIZE))
+            self.spinner.frameChanged.connect(self._repaint_busy_rows)
+            self.spinner.jumpToFrame(0)
+        else:
+            self._spinner_timer = QtCore.QTimer(self)
+            self._spinner_timer.setInterval(80)
+            self._spinner_timer.timeout.connect(self._advance_angle)
+
+    def set_busy(self, busy: bool):
+        if self.spinner:
+            if not busy:
+                self.spinner.setPaused(True)
+            elif self.spinner.state() == QtGui.QMovie.Paused:
+                self.spinner.setPaused(False)
+            else:
+                self.spinner.start()
+        elif busy:
+            self._spinner_timer.start()
+        else:
+            self._spinner_timer.stop()
+
+    def _advance_angle(self):
+        self._angle = (self._angle + 30) % 360
+        self._repaint_busy_rows()
+
+    def _repaint_busy_rows(self, *_args):
+        model = self.view.model()
+        if model is None:
+            return
+        # Nur sichtbare Zeilen werden tatsächlich neu gezeichnet
+        for row in model.busy_rows():
+            rect = self.view.visualRect(model.index(row, 0))
+            if rect.isValid() and rect.intersects(self.view.viewport().rect()):
+                self.view.viewport().update(rect)
+
+    def _button_rects(self, rect: QtCore.QRect):
+        height = 26
+        top = rect.top() + (rect.height() - height) // 2
+        edit = QtCore.QRect(rect.right() - self.BUTTON_WIDTH - 8, top, self.BUTTON_WIDTH, height)
+        start_stop = QtCore.QRect(edit.left() - self.BUTTON_WIDTH - 6, top, self.BUTTON_WIDTH, height)
+        return start_stop, edit
+
+    def sizeHint(self, option, index):
+        if index.data(DetailsRole):
+            widget = self.view.indexWidget(index)
+            height = widget.sizeHint().height() if widget else 0
+            return QtCore.QSize(option.rect.width(), height)
+        return QtCore.QSize(option.rect.width(), ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        if index.data(DetailsRole):
+            return
+        style = self.view.style()
+        style.drawPrimitive(QtWidgets.QStyle.PE_PanelItemViewItem, option, painter, self.view)
+        painter.save()
+        rect = option.rect.adjusted(6, 4, -6, -4)
+        state = index.data(StateRole)
+        start_stop_rect, edit_rect = self._button_rects(option.rect)
+
+        # Name
+        font = QtGui.QFont(option.font)
+        font.setBold(True)
+        painter.setFont(font)
+        text_right = start_stop_rect.left() - 10
+        name_rect = QtCore.QRect(rect.left(), rect.top(), text_right - rect.left(), rect.height() // 2)
+        painter.drawText(name_rect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter,
+                         QtGui.QFontMetrics(font).elidedText(index.data(), QtCore.Qt.ElideRight, name_rect.width()))
+
+        # Status mit Spinner
+        painter.setFont(option.font)
+        status_top = rect.top() + rect.height() // 2
+        x = rect.left()
+        if state == "busy":
+            spinner_rect = QtCore.QRect(x, status_top + (rect.height() // 2 - SPINNER_SIZE) // 2,
+                                        SPINNER_SIZE, SPINNER_SIZE)
+            self._paint_spinner(painter, spinner_rect)
+            x += SPINNER_SIZE + 6
+        if state == "inactive":
+            painter.setPen(QtGui.QColor("red"))
+            status = "Inaktiv"
+        else:
+            painter.setPen(QtGui.QColor("green"))
+            status = f"Aktiv (Verarbeite: {index.data(FileRole)})" if state == "busy" else "Aktiv"
+        status_rect = QtCore.QRect(x, status_top, text_right - x, rect.height() - rect.height() // 2)
+        metrics = QtGui.QFontMetrics(option.font)
+        painter.drawText(status_rect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter,
+                         metrics.elidedText(status, QtCore.Qt.ElideMiddle, status_rect.width()))
+        queue_text = index.data(QueueRole)
+        if queue_text:
+            used = min(metrics.horizontalAdvance(status), status_rect.width()) + 15
+            painter.setPen(QtGui.QColor("gray"))
+            painter.drawText(status_rect.adjusted(used, 0, 0, 0), QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter,
+                             metrics.elidedText(queue_text, QtCore.Qt.ElideRight, status_rect.width() - used))
+        painter.restore()
+
+        # Buttons
+        for button_rect, text in ((start_stop_rect, "Start" if state == "inactive" else "Stop"),
+                                  (edit_rect, "Edit")):
+            button = QtWidgets.QStyleOptionButton()
+            button.rect = button_rect
+            button.text = text
+            button.state = QtWidgets.QStyle.State_Enabled | QtWidgets.QStyle.State_Raised
+            style.drawControl(QtWidgets.QStyle.CE_PushButton, button, painter, self.view)
+
+    def _paint_spinner(self, painter, rect):
+        if self.spinner:
+            painter.drawPixmap(rect, self.spinner.currentPixmap())
+            return
+        pen = QtGui.QPen(QtGui.QColor("green"), 2.5)
+        painter.setPen(pen)
+        painter.drawArc(rect.adjusted(2, 2, -2, -2), -self._angle * 16, 270 * 16)
+
+    def editorEvent(self, event, model, option, index):
+        if index.data(DetailsRole) or event.type() != QtCore.QEvent.MouseButtonRelease:
+            return False
+        start_stop_rect, edit_rect = self._button_rects(option.rect)
+        if start_stop_rect.contains(event.pos()):
+            self.startStopClicked.emit(index.row())
+            return True
+        if edit_rect.contains(event.pos()):
+            self.editClicked.emit(index.row())
+            return True
+        return False
+
+
+class HotfolderOverview(QtWidgets.QTreeView):
+    """Baumansicht der Hotfolder; Details werden beim Aufklappen erzeugt."""
+    editRequested = QtCore.pyqtSignal(int)
+
+    def __init__(self, model: HotfolderModel, parent=None):
+        super().__init__(parent)
+        self.setHeaderHidden(True)
+        self.setUniformRowHeights(False)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.setModel(model)
+        self.delegate = HotfolderDelegate(self)
+        self.setItemDelegate(self.delegate)
+        model.busyChanged.connect(self.delegate.set_busy)
+        model.dataChanged.connect(self._on_data_changed)
+        self.delegate.startStopClicked.connect(model.toggle)
+        self.delegate.editClicked.connect(self.editRequested)
+        self.expanded.connect(self._create_details)
+        self.collapsed.connect(self._remove_details)
+
+    def _create_details(self, index):
+        child = self.model().index(0, 0, index)
+        if self.indexWidget(child) is None:
+            widget = HotfolderDetailsWidget(index.data(ConfigRole))
+            self.setIndexWidget(child, widget)
+            self.delegate.sizeHintChanged.emit(child)
+
+    def _remove_details(self, index):
+        child = self.model().index(0, 0, index)
+        widget = self.indexWidget(child)
+        if widget is not None:
+            self.setIndexWidget(child, None)
+            widget.deleteLater()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        # Geänderte Konfiguration -> Details neu beschriften, falls aufgeklappt
+        if top_left.internalId() != 0:
+            widget = self.indexWidget(top_left)
+            if widget is not None:
+                widget.update_labels()
+                self.delegate.sizeHintChanged.emit(top_left)
+
+    def selected_row(self):
+        indexes = self.selectionModel().selectedIndexes() if self.selectionModel() else []
+        for index in indexes:
+            if index.internalId() == 0:
+                return index.row()
+        return None
@@ -3,10 +3,16 @@
 
 import sys
 import os
+import threading
 from PyQt5 import QtWidgets, QtGui, QtCore
 
 from config.config_manager import load_config, save_config
-from ui.hotfolder_widget import HotfolderWidget
+from ui.hotfolder_overview import HotfolderModel, HotfolderOverview
+from preflight import DEFAULT_PREFLIGHT
+from metrics import start_metrics, stop_metrics
+from job_server import stop_job_servers
+from hotfolder_monitor import reevaluate_faults
+from record_cache import records_enabled
 
 DEBUG_OUTPUT = True
 def debug_print(msg):
@@ -14,6 +20,11 @@ def debug_print(msg):
         print("[DEBUG]", msg)
 
 class MainWindow(QtWidgets.QMainWindow):
+    # Profil fertig (aus dem Profiler-Thread): Hotfolder-Name, Ausgabeordner
+    profilingFinished = QtCore.pyqtSignal(str, str)
+    # Neubewertung von fault_dir fertig (aus dem Hintergrund-Thread): Hotfolder-Name, Zusammenfassung
+    reevaluationFinished = QtCore.pyqtSignal(str, object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("PRisM-RAC")
@@ -67,20 +78,30 @@ class MainWindow(QtWidgets.QMainWindow):
 
         main_layout.addLayout(hf_button_layout)
 
-        # Scroll-Bereich für HotfolderWidgets
-        self.hf_scroll = QtWidgets.QScrollArea()
-        self.hf_scroll.setWidgetResizable(True)
-        self.hf_container = QtWidgets.QWidget()
-        self.hf_layout = QtWidgets.QVBoxLayout(self.hf_container)
-        self.hf_layout.setContentsMargins(0, 0, 0, 0)
-        self.hf_layout.setSpacing(10)
-        self.hf_scroll.setWidget(self.hf_container)
-        main_layout.addWidget(self.hf_scroll, stretch=1)
+        # Hotfolder-Übersicht (Model/View, Details beim Aufklappen)
+        self.hf_model = None
+        self.hf_view = None
+        self.hf_view_layout = QtWidgets.QVBoxLayout()
+        main_layout.addLayout(self.hf_view_layout, stretch=1)
 
         # Signale
         self.add_hf_btn.clicked.connect(self.add_hotfolder)
         self.del_hf_btn.clicked.connect(self.delete_hotfolder)
 
+        # Statusleiste: Profil des ausgewählten Hotfolders aufzeichnen
+        self.profile_seconds = QtWidgets.QSpinBox()
+        self.profile_seconds.setRange(5, 3600)
+        self.profile_seconds.setValue(60)
+        self.profile_seconds.setSuffix(" s")
+        self.profile_btn = QtWidgets.QPushButton("Profil aufzeichnen")
+        self.profile_btn.setToolTip("CPU-, Speicher- und Aufrufprofil des ausgewählten Hotfolders "
+                                    "in dessen Logfiles-Ordner schreiben")
+        self.profile_btn.clicked.connect(self.start_profiling)
+        self.statusBar().addPermanentWidget(self.profile_seconds)
+        self.statusBar().addPermanentWidget(self.profile_btn)
+        self.profilingFinished.connect(self._on_profiling_finished)
+        self.reevaluationFinished.connect(self._on_reevaluation_finished)
+
         self.load_hotfolders()
 
     def toggle_debug(self):
@@ -94,21 +115,69 @@ class MainWindow(QtWidgets.QMainWindow):
         debug_print(f"DEBUG_OUTPUT={DEBUG_OUTPUT}")
 
     def load_hotfolders(self):
-        # Vorhandene Widgets entfernen
-        for i in reversed(range(self.hf_layout.count())):
-            item = self.hf_layout.takeAt(i)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-
+        # Nur beim Start: Model einmal aufbauen, danach ändern Add/Delete es direkt
         self.config_data = load_config()
-        hotfolders = self.config_data.get("hotfolders", [])
+        hotfolders = self.config_data.setdefault("hotfolders", [])
+        self.hf_model = HotfolderModel(hotfolders, parent=self)
+        self.hf_view = HotfolderOverview(self.hf_model)
+        self.hf_view.editRequested.connect(self.edit_hotfolder)
+        self.hf_model.startFailed.connect(lambda message: self.statusBar().showMessage(message, 10000))
+        self.hf_view_layout.addWidget(self.hf_view)
+
+    def edit_hotfolder(self, row: int):
+        from ui.hotfolder_config import HotfolderConfigDialog
+        hotfolder = self.config_data["hotfolders"][row]
+        criteria = (list(hotfolder.get("required_metadata", [])), list(hotfolder.get("required_layers", [])))
+        dlg = HotfolderConfigDialog(hotfolder, parent=self)
+        if dlg.exec_() == QtWidgets.QDialog.Accepted:
+            debug_print("Hotfolder geändert, speichere Konfiguration.")
+            save_config(self.config_data)
+            # Laufender Monitor arbeitet mit der alten Konfiguration weiter -> stoppen
+            self.hf_model.stop(row)
+            self.hf_model.config_changed(row)
+            changed = criteria != (hotfolder.get("required_metadata", []), hotfolder.get("required_layers", []))
+            if changed and records_enabled(hotfolder):
+                self.reevaluate_faults(dict(hotfolder))
+
+    def reevaluate_faults(self, hotfolder: dict):
+        """Fault-Dateien anhand des Record-Caches gegen die neuen Kriterien prüfen (ohne Backend)."""
+        name = hotfolder.get("name", "?")
+        self.statusBar().showMessage(f"{name}: bewerte Fault-Dateien neu …")
+        threading.Thread(target=lambda: self.reevaluationFinished.emit(name, reevaluate_faults(hotfolder)),
+                         name=f"reevaluate-{name}", daemon=True).start()
+
+    def _on_reevaluation_finished(self, name: str, summary: dict):
+        message = (f"{name}: {summary['checked']} Fault-Dateien neu bewertet, "
+                   f"{summary['moved']} nach Success verschoben")
+        if summary["needs_backend"]:
+            message += f", {summary['needs_backend']} bestanden (zusätzliches JSX nötig, nicht verschoben)"
+        if summary["unknown"]:
+            message += f", {summary['unknown']} ohne Daten zu neuen Feldern"
+        self.statusBar().showMessage(message)
+
+    def start_profiling(self):
+        row = self.hf_view.selected_row()
+        monitor = self.hf_model.monitor(row) if row is not None else None
+        if monitor is None or not monitor.active:
+            self.statusBar().showMessage("Profil: bitte einen laufenden Hotfolder auswählen.", 5000)
+            return
+        try:
+            session = monitor.start_profiling(
+                self.profile_seconds.value(),
+                on_finished=lambda s: self.profilingFinished.emit(s.name, s.output_dir))
+        except RuntimeError as e:
+            self.statusBar().showMessage(str(e), 5000)
+            return
+        self.statusBar().showMessage(f"Profil für {monitor.name} läuft ({self.profile_seconds.value()} s) …")
+        debug_print(f"Profil-Ausgabe: {session.output_dir}")
 
-        for hf in hotfolders:
-            widget = HotfolderWidget(hf, parent=self.hf_container)
-            self.hf_layout.addWidget(widget)
+    def _on_profiling_finished(self, name: str, output_dir: str):
+        self.statusBar().showMessage(f"Profil für {name} gespeichert: {output_dir}")
 
-        self.hf_layout.addStretch()
+    def closeEvent(self, event):
+        if self.hf_model:
+            self.hf_model.stop_all()
+        super().closeEvent(event)
 
     def add_hotfolder(self):
         hf_template = {
@@ -119,11 +188,15 @@ class MainWindow(QtWidgets.QMainWindow):
             "logfiles_dir": "04_Logfiles",
             "required_layers": [],
             "required_metadata": [],
+            "preflight": dict(DEFAULT_PREFLIGHT),
+            "jsx_mode": "headless",
             "additional_jsx": ""
         }
         self.config_data.setdefault("hotfolders", []).append(hf_template)
         save_config(self.config_data)
-        self.load_hotfolders()
+        index = self.hf_model.append_hotfolder(hf_template)
+        self.hf_view.setCurrentIndex(index)
+        self.hf_view.scrollTo(index)
 
     def delete_hotfolder(self):
         hotfolders = self.config_data.get("hotfolders", [])
@@ -131,20 +204,39 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Entfernen", "Keine Hotfolder vorhanden.")
             return
 
-        index, ok = QtWidgets.QInputDialog.getInt(
-            self, "Hotfolder entfernen",
-            "Index des Hotfolders eingeben (1-basiert):",
-            1, 1, len(hotfolders)
-        )
+        # Ausgewählte Zeile entfernen, sonst nach Index fragen
+        selected = self.hf_view.selected_row()
+        if selected is not None:
+            index, ok = selected + 1, True
+        else:
+            index, ok = QtWidgets.QInputDialog.getInt(
+                self, "Hotfolder entfernen",
+                "Index des Hotfolders eingeben (1-basiert):",
+                1, 1, len(hotfolders)
+            )
         if ok:
             idx = index - 1
             if 0 <= idx < len(hotfolders):
+                name = hotfolders[idx].get("name", f"#{index}")
+                answer = QtWidgets.QMessageBox.question(
+                    self, "Hotfolder entfernen",
+                    f"Hotfolder \"{name}\" wirklich entfernen?",
+                    QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                    QtWidgets.QMessageBox.No
+                )
+                if answer != QtWidgets.QMessageBox.Yes:
+                    return
+                self.hf_model.remove_hotfolder(idx)
                 del hotfolders[idx]
                 save_config(self.config_data)
-                self.load_hotfolders()
 
-def main():
+def main(metrics_settings: dict = None):
     app = QtWidgets.QApplication(sys.argv)
+    settings = dict(load_config().get("metrics", {}))
+    settings.update(metrics_settings or {})
+    start_metrics(settings)
+    app.aboutToQuit.connect(stop_job_servers)
+    app.aboutToQuit.connect(stop_metrics)
     win = MainWindow()
     win.show()
     sys.exit(app.exec_())
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Watch-Service – ein gemeinsamer watchdog-Observer für alle Hotfolder des Prozesses.
+
+- Ereignisse werden über einen Präfix-Baum (Pfadkomponenten) dem Hotfolder mit dem
+  längsten passenden monitor_dir zugeordnet. Verschachtelte Hotfolder teilen sich eine
+  Überwachung des obersten Ordners (keine doppelten inotify/FSEvents-Watches).
+- Pro Hotfolder werden Include-/Exclude-Muster, Standard-Ignorierliste (Teil-Downloads,
+  Office-Sperrdateien, macOS-Metadaten) und maximale Ordnertiefe einmalig kompiliert.
+  Ordner für Success/Fault/Logfiles innerhalb des monitor_dir werden automatisch ausgeschlossen.
+- Ausgeschlossene Pfade werden verworfen, bevor irgendeine Arbeit pro Ereignis anfällt.
+- Der Observer-Thread ruft die Handler nicht selbst auf, sondern legt die Ereignisse in eine
+  begrenzte Warteschlange pro Hotfolder, die ein eigener Thread abarbeitet. Blockiert ein
+  Hotfolder (volle Pipeline), laufen die anderen weiter. Läuft seine Warteschlange über,
+  werden weitere Ereignisse verworfen und der Handler danach per on_overflow() benachrichtigt
+  (HotfolderMonitor: monitor_dir neu einlesen).
+- Optional hat jede Registrierung einen Recorder (event_trace.TraceRecorder). Er erhält die
+  rohen Ereignisse unter ihrem monitor_dir noch vor dem Filter – also auch Teil-Uploads
+  (*.part, *.tmp, ~$*) und Umbenennungen wie x.psd.part -> x.psd als "moved". Ausgenommen
+  sind nur die eigenen Success-/Fault-/Logfiles-Ordner des Hotfolders.
+"""
+
+__all__ = ["DEFAULT_WATCH", "DEFAULT_IGNORE", "PathFilter", "WatchService", "get_watch_service"]
+
+import os
+import re
+import fnmatch
+import threading
+from collections import deque
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler, FileCreatedEvent, FileDeletedEvent
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+# Standardwerte (pro Hotfolder unter "watch" überschreibbar)
+DEFAULT_WATCH = {
+    "include": [],                # leer = alle Dateien
+    "exclude": [],
+    "max_depth": -1,              # -1 = unbegrenzt, 0 = nur Dateien direkt im monitor_dir
+    "ignore_defaults": True
+}
+
+# Temporäre/partielle Dateien und Systemdateien (gelten für jede Pfadkomponente)
+DEFAULT_IGNORE = [
+    ".*",                         # versteckte Dateien, .DS_Store, ._AppleDouble, .~lock.*
+    "~$*",                        # Office-Sperrdateien
+    "*.part", "*.partial", "*.crdownload", "*.download", "*.tmp", "*.temp", "*.icloud",
+    "Thumbs.db", "desktop.ini", "Icon\r", "$RECYCLE.BIN", "__MACOSX"
+]
+
+EVENT_BACKLOG = 10000             # Ereignisse pro Hotfolder, die auf ihren Handler warten dürfen
+
+
+def _compile(patterns) -> "re.Pattern":
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns), re.IGNORECASE)
+
+
+def _split(path: str) -> tuple:
+    return tuple(part for part in os.path.normpath(os.path.abspath(path)).split(os.sep) if part)
+
+
+class PathFilter:
+    """
+    Kompilierte Filter eines Hotfolders. Muster ohne "/" gelten für den Dateinamen
+    (ignore: für jede Pfadkomponente), Muster mit "/" für den Pfad relativ zum monitor_dir.
+    """
+
+    def __init__(self, monitor_dir: str, settings: dict = None, excluded_dirs=()):
+        cfg = dict(DEFAULT_WATCH)
+        cfg.update(settings or {})
+        self.monitor_dir = os.path.abspath(monitor_dir)
+        self.max_depth = int(cfg["max_depth"])
+        ignore = list(DEFAULT_IGNORE) if cfg["ignore_defaults"] else []
+        self._ignore = _compile(ignore)
+        self._include_name = _compile([p for p in cfg["include"] if "/" not in p])
+        self._include_path = _compile([p for p in cfg["include"] if "/" in p])
+        self._exclude_name = _compile([p for p in cfg["exclude"] if "/" not in p])
+        self._exclude_path = _compile([p for p in cfg["exclude"] if "/" in p])
+        self._has_include = bool(cfg["include"])
+        # Success-/Fault-/Logfiles-Ordner innerhalb des monitor_dir (als Komponenten-Tupel)
+        root = _split(self.monitor_dir)
+        self._excluded_dirs = set()
+        for directory in excluded_dirs:
+            if not directory:
+                continue
+            parts = _split(directory)
+            if len(parts) > len(root) and parts[:len(root)] == root:
+                self._excluded_dirs.add(parts[len(root):])
+
+    @classmethod
+    def from_config(cls, hf_config: dict):
+        return cls(hf_config.get("monitor_dir", ""), hf_config.get("watch", {}),
+                   [hf_config.get(key, "") for key in ("success_dir", "fault_dir", "logfiles_dir")])
+
+    def _dir_excluded(self, rel_dirs: tuple) -> bool:
+        for depth in range(1, len(rel_dirs) + 1):
+            if rel_dirs[:depth] in self._excluded_dirs:
+                return True
+        if self._ignore:
+            for part in rel_dirs:
+                if self._ignore.match(part):
+                    return True
+        return False
+
+    def accepts_parts(self, rel_parts: tuple) -> bool:
+        """rel_parts: Pfadkomponenten relativ zum monitor_dir (letzte = Dateiname)."""
+        if not rel_parts:
+            return False
+        if self.max_depth >= 0 and len(rel_parts) - 1 > self.max_depth:
+            return False
+        name = rel_parts[-1]
+        if self._ignore and self._ignore.match(name):
+            return False
+        if len(rel_parts) > 1 and self._dir_excluded(rel_parts[:-1]):
+            return False
+        rel_path = "/".join(rel_parts)
+        if self._exclude_name and self._exclude_name.match(name):
+            return False
+        if self._exclude_path and self._exclude_path.match(rel_path):
+            return False
+        if self._has_include:
+            return bool((self._include_name and self._include_name.match(name))
+                        or (self._include_path and self._include_path.match(rel_path)))
+        return True
+
+    def accepts(self, path: str) -> bool:
+        parts = _split(path)
+        root = _split(self.monitor_dir)
+        if parts[:len(root)] != root:
+            return False
+        return self.accepts_parts(parts[len(root):])
+
+    def in_excluded_dir(self, rel_parts: tuple) -> bool:
+        """Ob der Pfad in einem der eigenen Ordner des Hotfolders (Success/Fault/Logfiles) liegt."""
+        return any(rel_parts[:depth] in self._excluded_dirs for depth in range(1, len(rel_parts)))
+
+    def accepts_dir(self, rel_dirs: tuple) -> bool:
+        """Ob in diesen Unterordner (für den initialen Scan) überhaupt hinabgestiegen werden muss."""
+        if self.max_depth >= 0 and len(rel_dirs) > self.max_depth:
+            return False
+        return not self._dir_excluded(rel_dirs)
+
+    def scan(self):
+        """Vorhandene Dateien im monitor_dir, die den Filter passieren."""
+        for root, dirs, files in os.walk(self.monitor_dir):
+            rel_root = _split(root)[len(_split(self.monitor_dir)):]
+            dirs[:] = [d for d in dirs if self.accepts_dir(rel_root + (d,))]
+            for name in files:
+                if self.accepts_parts(rel_root + (name,)):
+                    yield os.path.join(root, name)
+
+
+class _Registration:
+    """Ein registrierter Hotfolder mit eigener Ereignis-Warteschlange und Handler-Thread."""
+
+    def __init__(self, path: str, handler, path_filter: PathFilter, backlog: int = EVENT_BACKLOG,
+                 recorder=None):
+        self.path = os.path.normpath(os.path.abspath(path))
+        self.root = _split(path)
+        self.handler = handler
+        self.path_filter = path_filter
+        self.recorder = recorder
+        self.backlog = backlog
+        self._events = deque()       # (Handler-Methode, Ereignis)
+        self._cond = threading.Condition()
+        self._overflow = 0           # verworfene Ereignisse seit dem letzten on_overflow()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"watch-{os.path.basename(self.path)}",
+                                        daemon=True)
+        self._thread.start()
+
+    def post(self, method: str, event):
+        """Aus dem Observer-Thread: blockiert nie."""
+        with self._cond:
+            if not self._running:
+                return
+            if len(self._events) >= self.backlog:
+                self._overflow += 1
+                return
+            self._events.append((method, event))
+            self._cond.notify()
+
+    def close(self):
+        # Nicht joinen: Der Handler kann gerade in einer vollen Pipeline warten, die erst
+        # nach dem Abmelden gestoppt wird.
+        with self._cond:
+            self._running = False
+            self._events.clear()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._events and not self._overflow:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                dropped = 0
+                if self._events:
+                    method, event = self._events.popleft()
+                else:
+                    dropped, self._overflow = self._overflow, 0
+            try:
+                if dropped:
+                    debug_print(f"Watch-Service: {dropped} Ereignis(se) für {self.path} verworfen (Warteschlange voll)")
+                    if hasattr(self.handler, "on_overflow"):
+                        self.handler.on_overflow()
+                else:
+                    getattr(self.handler, method)(event)
+            except Exception as e:
+                debug_print(f"Watch-Service: Fehler im Handler für {self.path}: {e}")
+
+
+def _build_trie(registrations) -> dict:
+    """Präfix-Baum über Pfadkomponenten; der Wert eines Knotens steht unter dem Schlüssel None."""
+    trie = {}
+    for registration in registrations:
+        node = trie
+        for part in registration.root:
+            node = node.setdefault(part, {})
+        node.setdefault(None, []).append(registration)
+    return trie
+
+
+class WatchService(FileSystemEventHandler):
+    """Ein Observer für alle Hotfolder; Registrierungen liefern ein Token zum Abmelden."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._registrations = {}     # token -> _Registration
+        self._next_token = 1
+        self._trie = {}              # wird bei Änderungen komplett ersetzt (lesen ohne Lock)
+        self._observer = None
+        self._watches = {}           # überwachter Ordner -> ObservedWatch
+
+    def register(self, monitor_dir: str, handler, path_filter: PathFilter = None,
+                 backlog: int = EVENT_BACKLOG, recorder=None) -> int:
+        """
+        handler: FileSystemEventHandler des Hotfolders (erhält nur akzeptierte Ereignisse, im
+        eigenen Thread) und optional on_overflow() nach verworfenen Ereignissen.
+        recorder: optional, erhält record(kind, path, dest_path=None) für die rohen Ereignisse
+        (im Observer-Thread, muss also schnell sein).
+        """
+        path_filter = path_filter or PathFilter(monitor_dir)
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._registrations[token] = _Registration(monitor_dir, handler, path_filter, backlog, recorder)
+            self._update_locked()
+        return token
+
+    def unregister(self, token: int):
+        with self._lock:
+            registration = self._registrations.pop(token, None)
+            if registration is not None:
+                self._update_locked()
+        if registration is not None:
+            registration.close()
+
+    def _update_locked(self):
+        self._trie = _build_trie(self._registrations.values())
+        # Nur oberste Ordner überwachen; verschachtelte Hotfolder werden mit abgedeckt
+        registrations = sorted(self._registrations.values(), key=lambda r: len(r.root))
+        top = []
+        for registration in registrations:
+            if not any(registration.root[:len(other.root)] == other.root for other in top):
+                top.append(registration)
+        wanted = {registration.path for registration in top}
+
+        if not wanted:
+            if self._observer:
+                self._observer.stop()
+                self._observer.join()
+                self._observer = None
+                self._watches.clear()
+            return
+        if self._observer is None:
+            self._observer = Observer()
+            self._observer.start()
+        for path in set(self._watches) - wanted:
+            self._observer.unschedule(self._watches.pop(path))
+        for path in wanted - set(self._watches):
+            debug_print(f"Watch-Service: überwache {path}")
+            self._watches[path] = self._observer.schedule(self, path, recursive=True)
+
+    def _match(self, path: str):
+        """Registrierungen mit längstem passendem Präfix und der Pfad relativ dazu."""
+        node = self._trie
+        parts = _split(path)
+        match, depth = None, 0
+        for index, part in enumerate(parts):
+            node = node.get(part)
+            if node is None:
+                break
+            if None in node:
+                match, depth = node[None], index + 1
+        return match or (), parts[depth:]
+
+    def _route(self, path: str):
+        """Registrierung mit längstem passendem Präfix, falls der Pfad deren Filter passiert."""
+        match, rel_parts = self._match(path)
+        for registration in match:
+            if registration.path_filter.accepts_parts(rel_parts):
+                return registration
+        return None
+
+    def _recording(self, path: str):
+        """Registrierung mit Recorder, unter deren monitor_dir der Pfad liegt (ohne Filter)."""
+        match, rel_parts = self._match(path)
+        for registration in match:
+            if registration.recorder is not None and not registration.path_filter.in_excluded_dir(rel_parts):
+                return registration
+        return None
+
+    def _record(self, event):
+        kind = event.event_type
+        if kind not in ("created", "modified", "moved", "deleted"):
+            return
+        src = self._recording(event.src_path)
+        if kind != "moved":
+            if src is not None:
+                src.recorder.record(kind, event.src_path)
+            return
+        dest = self._recording(event.dest_path)
+        if src is not None and src is dest:
+            src.recorder.record("moved", event.src_path, event.dest_path)
+            return
+        # Verschieben aus dem bzw. in den Hotfolder (z.B. nach success_dir außerhalb)
+        if src is not None:
+            src.recorder.record("deleted", event.src_path)
+        if dest is not None:
+            dest.recorder.record("created", event.dest_path)
+
+    def dispatch(self, event):
+        if event.is_directory:
+            return
+        # Aufzeichnung vor dem Filter, damit Teil-Uploads und Umbenennungen im Trace bleiben
+        self._record(event)
+        if event.event_type == "moved":
+            src = self._route(event.src_path)
+            dest = self._route(event.dest_path)
+            if dest is not None and dest is src:
+                dest.post("on_moved", event)
+                return
+            # Umbenennen über Hotfoldergrenzen bzw. aus/in ausgeschlossene Namen (z.B. *.part -> *.psd)
+            if src is not None:
+                src.post("on_deleted", FileDeletedEvent(event.src_path))
+            if dest is not None:
+                dest.post("on_created", FileCreatedEvent(event.dest_path))
+            return
+        registration = self._route(event.src_path)
+        if registration is None:
+            return
+        method = f"on_{event.event_type}"
+        if hasattr(registration.handler, method):
+            registration.post(method, event)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_watch_service() -> WatchService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = WatchService()
+        return _service
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Worker-Agent – holt Jobs vom Job-Server eines Hotfolder-Monitors (siehe job_server.py),
+führt sie im lokalen Backend aus und schickt das Contentcheck-Log zurück.
+
+- Ein Job gleichzeitig (eine Photoshop-Instanz pro Rechner); mehrere Agenten pro Rechner
+  sind mit dem simulierten Backend möglich.
+- Während ein Job läuft, verlängern Heartbeats die Lease. Ergebnisse bleiben bis zum ack
+  des Servers gespeichert und werden nach einem Verbindungsabbruch erneut gesendet.
+- Die Dateien liegen auf gemeinsamem Speicher; --path-map schreibt Pfade des Servers
+  in lokale Pfade um (z.B. /Volumes/Hotfolder=/mnt/hotfolder).
+- Das Token des Job-Servers kommt aus PRISM_JOB_TOKEN (oder --token, dann aber in der
+  Prozessliste sichtbar). Weist der Server es ab, beendet sich der Agent.
+
+Aufruf:
+    PRISM_JOB_TOKEN=... python worker_agent.py --server unix:///tmp/prism.sock --backend simulated
+    PRISM_JOB_TOKEN=... python worker_agent.py --server tcp://monitor-host:7878 --backend photoshop --path-map /Volumes/HF=/mnt/hf
+"""
+
+__all__ = ["WorkerAgent", "main"]
+
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import shutil
+import argparse
+import tempfile
+import threading
+
+from backend.photoshop_backend import BackendUnavailable
+from backend.backend_session import BackendSession, backend_settings, create_backend
+from job_server import TOKEN_ENV, parse_address, send_message, read_message
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+
+class _Connection:
+    """Eine Verbindung zum Job-Server; Anfrage und Antwort sind zusammen atomar."""
+
+    def __init__(self, address: str, timeout: float):
+        family, target = parse_address(address)
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(target)
+        self.rfile = self.socket.makefile("rb")
+        self.wfile = self.socket.makefile("wb")
+        self.lock = threading.Lock()
+
+    def request(self, message: dict) -> dict:
+        with self.lock:
+            send_message(self.wfile, message)
+            response = read_message(self.rfile)
+        if response is None:
+            raise ConnectionError("Job-Server hat die Verbindung geschlossen")
+        return response
+
+    def close(self):
+        # shutdown weckt einen Heartbeat, der gerade auf Antwort wartet; ohne Schließen der
+        # makefile-Objekte bliebe der Socket trotz close() offen
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        for stream in (self.rfile, self.wfile, self.socket):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class WorkerAgent:
+    def __init__(self, address: str, backend_config: dict, worker_id: str = None, path_map: dict = None,
+                 work_dir: str = None, token: str = None):
+        self.address = address
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV, "")
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.path_map = path_map or {}
+        self.settings = backend_settings({"backend": backend_config})
+        self.session = BackendSession(create_backend(self.settings), self.settings)
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="prism_worker_")
+        self.heartbeat_interval = 5.0
+        self._outbox = []             # Ergebnisse ohne ack
+        self._current = None          # Job-ID des laufenden Jobs
+        self._stop = threading.Event()
+        self.stats = {"jobs": 0, "ok": 0, "failed": 0, "reconnects": 0}
+
+    def stop(self):
+        self._stop.set()
+
+    def map_path(self, path: str) -> str:
+        for remote, local in self.path_map.items():
+            if path == remote or path.startswith(remote.rstrip("/") + "/"):
+                return local.rstrip("/") + path[len(remote.rstrip("/")):]
+        return path
+
+    # --- Verbindung ----------------------------------------------------------------
+
+    def run(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            try:
+                self._serve()
+                delay = 1.0
+            except (OSError, ConnectionError, ValueError) as e:
+                if self._stop.is_set():
+                    break
+                debug_print(f"Worker {self.worker_id}: Verbindung zu {self.address} fehlgeschlagen ({e}), "
+                            f"neuer Versuch in {delay:.0f} s")
+                self.stats["reconnects"] += 1
+                self._stop.wait(delay)
+                delay = min(delay * 2, 30.0)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _serve(self):
+        conn = _Connection(self.address, timeout=60.0)
+        try:
+            welcome = conn.request({"type": "hello", "worker": self.worker_id, "backend": self.session.backend.name,
+                                    "token": self.token})
+            if welcome.get("type") != "welcome":
+                # Falsches Token o.ä. – erneute Versuche helfen nicht
+                debug_print(f"Worker {self.worker_id}: vom Job-Server abgewiesen ({welcome.get('error')})")
+                self.stop()
+                return
+            self.heartbeat_interval = float(welcome.get("heartbeat_interval", self.heartbeat_interval))
+            conn.socket.settimeout(self.heartbeat_interval * 2 + 30)
+            debug_print(f"Worker {self.worker_id} verbunden mit {self.address}")
+            heartbeat = threading.Thread(target=self._heartbeat_loop, args=(conn,), daemon=True)
+            heartbeat.start()
+            while not self._stop.is_set():
+                self._flush_outbox(conn)
+                message = conn.request({"type": "pull"})
+                if message.get("type") != "job":
+                    continue
+                self._current = message["job"]
+                try:
+                    result = self.process(message)
+                finally:
+                    self._current = None
+                self._outbox.append(result)
+        finally:
+            conn.close()
+
+    def _flush_outbox(self, conn: _Connection):
+        while self._outbox:
+            conn.request(self._outbox[0])    # ack (auch für verworfene Ergebnisse)
+            self._outbox.pop(0)
+
+    def _heartbeat_loop(self, conn: _Connection):
+        while not self._stop.wait(self.heartbeat_interval):
+            job_id = self._current
+            if job_id is None:
+                continue
+            try:
+                response = conn.request({"type": "heartbeat", "jobs": [job_id]})
+            except (OSError, ConnectionError, ValueError):
+                return
+            if job_id not in response.get("jobs", []):
+                debug_print(f"Worker {self.worker_id}: Lease für Job {job_id} verloren.")
+
+    # --- Jobs ----------------------------------------------------------------------
+
+    def process(self, message: dict) -> dict:
+        """Führt einen Job aus und liefert die Ergebnis-Nachricht."""
+        self.stats["jobs"] += 1
+        result = {"type": "result", "job": message["job"], "attempt": message["attempt"],
+                  "ok": False, "log": None, "error": None, "unavailable": False}
+        file_path = self.map_path(message["file_path"])
+        document_name = message["document_name"]
+        try:
+            if message["kind"] == "additional":
+                result["ok"] = self._run_additional(message, file_path, document_name)
+            else:
+                result["ok"], result["log"], result["error"] = self._run_contentcheck(message, file_path,
+                                                                                     document_name)
+        except BackendUnavailable as e:
+            result["unavailable"] = True
+            result["error"] = str(e)
+        self.stats["ok" if result["ok"] else "failed"] += 1
+        return result
+
+    def _run_contentcheck(self, message: dict, file_path: str, document_name: str):
+        # Log in ein lokales Verzeichnis schreiben und an den Server zurückgeben
+        hf_config = dict(message.get("hf_config", {}), logfiles_dir=self.work_dir)
+        log_file = os.path.join(self.work_dir, document_name.rsplit(".", 1)[0] + "_log_contentcheck.json")
+        if os.path.exists(log_file):
+            os.remove(log_file)
+        session = self.session
+        with session.lock:
+            if not session.open(file_path, document_name):
+                return False, None, "open"
+            try:
+                if not session.contentcheck(hf_config, file_path):
+                    return False, None, "contentcheck"
+            finally:
+                session.release(document_name)
+        deadline = time.monotonic() + float(message.get("log_timeout", 30))
+        while not os.path.exists(log_file) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if not os.path.exists(log_file):
+            return True, None, "log_missing"
+        try:
+            with open(log_file, "r", encoding="utf-8") as f:
+                log = json.load(f)
+        except (OSError, ValueError) as e:
+            return True, None, f"log_invalid: {e}"
+        finally:
+            if os.path.exists(log_file):
+                os.remove(log_file)
+        return True, log, None
+
+    def _run_additional(self, message: dict, file_path: str, document_name: str) -> bool:
+        jsx_script_path = self.map_path(message.get("additional_jsx", ""))
+        with self.session.lock:
+            try:
+                return self.session.additional(jsx_script_path, file_path, document_name)
+            finally:
+                self.session.release(document_name)
+
+
+def _parse_path_map(values) -> dict:
+    path_map = {}
+    for value in values or []:
+        remote, sep, local = value.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"--path-map erwartet SERVER=LOKAL: {value}")
+        path_map[remote] = local
+    return path_map
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PRisM-RAC Worker-Agent")
+    parser.add_argument("--server", required=True, help="tcp://host:port oder unix:///pfad des Job-Servers")
+    parser.add_argument("--backend", default="photoshop", choices=["photoshop", "simulated"])
+    parser.add_argument("--backend-settings", help="JSON mit weiteren Backend-Einstellungen (z.B. simulated)")
+    parser.add_argument("--id", help="Worker-Name (Standard: rechnername-pid)")
+    parser.add_argument("--token", help=f"Token des Job-Servers (Standard: Umgebungsvariable {TOKEN_ENV})")
+    parser.add_argument("--path-map", action="append", help="SERVERPFAD=LOKALER_PFAD (mehrfach möglich)")
+    parser.add_argument("--quiet", action="store_true", help="keine Debug-Ausgaben")
+    args = parser.parse_args(argv)
+
+    if args.quiet:
+        for module in list(sys.modules.values()):
+            if hasattr(module, "DEBUG_OUTPUT"):
+                module.DEBUG_OUTPUT = False
+    backend_config = json.loads(args.backend_settings) if args.backend_settings else {}
+    backend_config["type"] = args.backend
+    agent = WorkerAgent(args.server, backend_config, args.id, _parse_path_map(args.path_map), token=args.token)
+
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: agent.stop())
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop()
+    debug_print(f"Worker {agent.worker_id} beendet: {agent.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+XMP-Reader – liest XMP-Pakete direkt aus Dateien (eingebettet oder .xmp-Sidecar),
+ohne Photoshop. Die Felder werden nach demselben Mapping wie im Contentcheck-JSX
+ausgewertet, sodass die Ergebnisse mit dem JSX-Log vergleichbar sind.
+"""
+
+__all__ = ["find_xmp_packet", "read_xmp_fields"]
+
+import mmap
+import xml.etree.ElementTree as ET
+
+from dynamic_jsx_generator import FIELD_MAPPING
+
+DEBUG_OUTPUT = True
+def debug_print(msg):
+    if DEBUG_OUTPUT:
+        print("[DEBUG]", msg)
+
+NS_RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+NS_XML = "http://www.w3.org/XML/1998/namespace"
+
+
+def find_xmp_packet(file_path: str):
+    """
+    Sucht das erste <x:xmpmeta>-Paket in der Datei und gibt es als Bytes zurück (oder None).
+    Die Datei wird per mmap durchsucht, also nicht komplett eingelesen.
+    """
+    with open(file_path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None  # leere Datei
+        try:
+            start = data.find(b"<x:xmpmeta")
+            if start < 0:
+                return None
+            end = data.find(b"</x:xmpmeta>", start)
+            if end < 0:
+                return None
+            return data[start:end + len(b"</x:xmpmeta>")]
+        finally:
+            data.close()
+
+
+def _property_value(description, ns: str, prop: str, alt_text: bool, is_array: bool) -> str:
+    tag = "{%s}%s" % (ns, prop)
+    attr = description.get(tag)
+    if attr is not None:
+        return attr
+    element = description.find(tag)
+    if element is None:
+        return ""
+    container = None
+    for kind in ("Alt", "Seq", "Bag"):
+        container = element.find("{%s}%s" % (NS_RDF, kind))
+        if container is not None:
+            break
+    if container is None:
+        return (element.text or "").strip()
+    items = container.findall("{%s}li" % NS_RDF)
+    if not items:
+        return ""
+    if alt_text and not is_array:
+        for li in items:
+            if li.get("{%s}lang" % NS_XML) == "x-default":
+                return (li.text or "").strip()
+    return (items[0].text or "").strip()
+
+
+def _remove_surrounding_quotes(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def read_xmp_fields(packet: bytes, keys=None) -> dict:
+    """
+    Wertet ein XMP-Paket aus. Rückgabe: {feld: wert}, fehlende Felder als "undefined"
+    (gleiche Konvention wie das Contentcheck-JSX).
+    """
+    keys = list(FIELD_MAPPING) if keys is None else keys
+    result = {key: "undefined" for key in keys}
+    if not packet:
+        return result
+    try:
+        root = ET.fromstring(packet)
+    except ET.ParseError as e:
+        debug_print(f"XMP-Paket nicht lesbar: {e}")
+        return result
+    descriptions = root.iter("{%s}Description" % NS_RDF)
+    for description in descriptions:
+        for key in keys:
+            if result[key] != "undefined" or key not in FIELD_MAPPING:
+                continue
+            ns, prop, alt_text, is_array = FIELD_MAPPING[key]
+            value = _remove_surrounding_quotes(_property_value(description, ns, prop, alt_text, is_array))
+            if value:
+                result[key] = value
+    return result